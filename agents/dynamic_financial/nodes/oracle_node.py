@@ -1,16 +1,17 @@
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from gen_ai_hub.proxy.langchain import init_llm
+from langchain_core.messages import AIMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
 
 from agents.dynamic_financial.tools import (
-    pl_extractor_tool,
-    balance_sheet_tool,
-    cash_flow_tool,
-    final_answer_tool,
+    extract_pl_data,
+    extract_balance_sheet_data,
+    extract_cash_flow_data,
+    final_answer,
 )
 
-import os
-
 from agents.dynamic_financial.utils.scratchpad import create_scratchpad
+from services.llm_service import get_tool_calls_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
 
 # system prompt for the main orchestrator decision making node
 ORACLE_SYSTEM_PROMPT = """
@@ -35,41 +36,28 @@ Be efficient - only call tools that are necessary for answering the user's query
 """
 
 
+ORACLE_MAX_TOKENS = 1000
+
+
 class OracleAgent:
     """
     oracle decision making node/agent
     """
 
     def __init__(self):
-        self.llm = init_llm(
-            "gpt-4o-mini",
-            temperature=0.0,
-            max_tokens=1000
-        )
-
         # binding tools
         self.tools = [
-            pl_extractor_tool,
-            balance_sheet_tool,
-            cash_flow_tool,
-            final_answer_tool,
+            extract_pl_data,
+            extract_balance_sheet_data,
+            extract_cash_flow_data,
+            final_answer,
         ]
 
-        self.llm_with_tools = self.llm.bind_tools(self.tools)
-
-        # creating prompt template
-        self.prompt = self.prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", ORACLE_SYSTEM_PROMPT),
-                MessagesPlaceholder(variable_name="chat_history", optional=True),
-                ("user", "{input}"),
-                ("assistant", "Scratchpad:\n{scratchpad}"),
-            ]
-        )
-
-        # creating chain
-        self.oracle = self.prompt | self.llm_with_tools
+        # function-calling specs of the tools (name, description, argument schema)
+        self.tool_specs = [convert_to_openai_tool(tool) for tool in self.tools]
 
+    @traced("agent.oracle")
+    @usage_caller("oracle")
     async def run(self, state: dict) -> dict:
         """
         running oracle to decide next steps
@@ -78,13 +66,32 @@ class OracleAgent:
         # creating scratchpad
         scratchpad = create_scratchpad(state.get("intermediate_steps", []))
 
+        chat_history = [
+            {"role": "assistant" if message.type == "ai" else "user", "content": message.content}
+            for message in state.get("chat_history", [])
+        ]
+        messages = [
+            *chat_history,
+            {"role": "user", "content": state["input"]},
+            {"role": "assistant", "content": f"Scratchpad:\n{scratchpad}"},
+        ]
+
         # invoke oracle
-        response = await self.oracle.ainvoke(
-            {
-                "input": state["input"],
-                "chat_history": state.get("chat_history", []),
-                "scratchpad": scratchpad
-            }
+        response = await get_tool_calls_async(
+            system_prompt=ORACLE_SYSTEM_PROMPT,
+            messages=messages,
+            tools=self.tool_specs,
+            temperature=0.0,
+            max_tokens=ORACLE_MAX_TOKENS,
+        )
+
+        # as a langchain message: the router and the tool executor read its tool_calls
+        decision = AIMessage(
+            content=response["content"] or "",
+            tool_calls=[
+                {"name": tool_call["name"], "args": tool_call["args"], "id": tool_call["id"]}
+                for tool_call in response["tool_calls"]
+            ],
         )
 
-        return {"intermediate_steps": [(response,)]}
\ No newline at end of file
+        return {"intermediate_steps": [(decision,)]}
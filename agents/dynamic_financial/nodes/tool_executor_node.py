@@ -1,8 +1,9 @@
-from langchain.tools import tool
+from utils.tracing import tracer
+from services.usage_service import usage_caller
 from agents.dynamic_financial.tools import (
     extract_balance_sheet_data,
     extract_cash_flow_data,
-    extract_income_statement_data,
+    extract_pl_data,
     final_answer,
 )
 
@@ -14,7 +15,7 @@ class ToolExecutor:
 
     def __init__(self):
         self.tools_map = {
-            "extract_pl_data": extract_income_statement_data,
+            "extract_pl_data": extract_pl_data,
             "extract_balance_sheet_data": extract_balance_sheet_data,
             "extract_cash_flow_data": extract_cash_flow_data,
             "final_answer": final_answer,
@@ -40,10 +41,11 @@ class ToolExecutor:
 
         text = state["input"].split("DOCUMENT:")[-1].strip()
 
-        if tool_name == "final_answer":
-            observation = await tool.ainvoke(tool_input)
-        else:
-            observation = await tool.ainvoke({"text": text})
+        with tracer.span(f"tool.{tool_name}", iteration=state.get("iterations", 0)), usage_caller(tool_name):
+            if tool_name == "final_answer":
+                observation = await tool.ainvoke(tool_input)
+            else:
+                observation = await tool.ainvoke({"text": text})
 
         
         # update state
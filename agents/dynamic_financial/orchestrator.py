@@ -3,6 +3,7 @@ from agents.dynamic_financial.schemas.state_schema import FinancialAgentState
 from agents.dynamic_financial.nodes.oracle_node import OracleAgent
 from agents.dynamic_financial.nodes.tool_executor_node import ToolExecutor
 from agents.dynamic_financial.nodes.router_node import route_next
+from utils.tracing import traced
 
 class DynamicFinancialOrchestrator:
     """
@@ -43,6 +44,7 @@ class DynamicFinancialOrchestrator:
         return workflow.compile()
 
     
+    @traced("agent.financial.dynamic")
     async def extract(self, query: str, document_text: str) -> str:
         """
         run dynamic extraction
@@ -61,13 +63,14 @@ class DynamicFinancialOrchestrator:
         # runing the graph
         final_state = await self.graph.ainvoke(initial_state)
 
-        # extracting final answer from intermediate steps
+        # extracting final answer from intermediate steps (the router ends the graph
+        # on the oracle's final_answer call, so the report is the call's argument)
         for step in reversed(final_state.get("intermediate_steps", [])):
-            if isinstance(step, tuple) and len(step) == 2:
-                action, observation = step
-                if hasattr(action, "tool_calls") and action.tool_calls:
-                    if action.tool_calls[0]["name"] == "final_answer":
-                        return observation
+            action = step[0]
+            if hasattr(action, "tool_calls") and action.tool_calls:
+                tool_call = action.tool_calls[0]
+                if tool_call["name"] == "final_answer":
+                    return step[1] if len(step) == 2 else tool_call["args"].get("report", "")
         return "No final answer found."
 
 
@@ -0,0 +1,4 @@
+from agents.dynamic_financial.tools.pl_extractor_tool import extract_pl_data
+from agents.dynamic_financial.tools.balance_sheet_tool import extract_balance_sheet_data
+from agents.dynamic_financial.tools.cash_flow_tool import extract_cash_flow_data
+from agents.dynamic_financial.tools.final_answer_tool import final_answer
@@ -1,9 +1,9 @@
 from langchain.tools import tool
-from services.llm_service import llm_service
-import json
-import re
+from agents.sequential_financial.schemas.financial_schema import BalanceSheetData, format_amount
+from services.llm_service import get_structured_response_async
 
 
+@tool
 async def extract_balance_sheet_data(text: str) -> str:
     """
     extract balance sheet data: total assets, liabilities, equity.
@@ -14,15 +14,11 @@ async def extract_balance_sheet_data(text: str) -> str:
 
 Text: {text[:2000]}
 
-JSON format:
-{{"total_assets": 5000000.0, "total_liabilities": 3000000.0, "equity": 2000000.0}}
-
+If a value is not found, use null. Extract numbers without currency symbols.
 JSON:"""
-    response = await llm_service.get_llm_response_async(prompt)
-    response = re.sub(r"```json\n?|```\n?", "", response.strip())
-    
+
     try:
-        data = json.loads(response)
-        return f"Balance Sheet extracted: Assets=${data.get('total_assets', 0):,.0f}, Liabilities=${data.get('total_liabilities', 0):,.0f}, Equity=${data.get('equity', 0):,.0f}"
-    except:
-        return f"Balance Sheet extraction result: {response}"
+        data = await get_structured_response_async(prompt, schema=BalanceSheetData, temperature=0.0)
+        return f"Balance Sheet extracted: Assets={format_amount(data.total_assets)}, Liabilities={format_amount(data.total_liabilities)}, Equity={format_amount(data.equity)}"
+    except ValueError as e:
+        return f"Balance Sheet extraction failed: {e}"
@@ -1,7 +1,6 @@
 from langchain.tools import tool
-from services.llm_service import llm_service
-import json
-import re
+from agents.sequential_financial.schemas.financial_schema import CashFlowData, format_amount
+from services.llm_service import get_structured_response_async
 
 
 @tool
@@ -14,17 +13,11 @@ async def extract_cash_flow_data(text: str) -> str:
 
 Text: {text[:2000]}
 
-JSON format:
-{{"operating_cash_flow": 500000.0, "investing_cash_flow": -200000.0, "financing_cash_flow": -100000.0}}
-
+If a value is not found, use null. Extract numbers without currency symbols.
 JSON:"""
-    
-    response = await llm_service.get_llm_response_async(prompt)
-    response = re.sub(r"```json\n?|```\n?", "", response.strip())
-    
-    try:
-        data = json.loads(response)
-        return f"Cash Flow extracted: Operating=${data.get('operating_cash_flow', 0):,.0f}, Investing=${data.get('investing_cash_flow', 0):,.0f}, Financing=${data.get('financing_cash_flow', 0):,.0f}"
-    except:
-        return f"Cash Flow extraction result: {response}"
 
+    try:
+        data = await get_structured_response_async(prompt, schema=CashFlowData, temperature=0.0)
+        return f"Cash Flow extracted: Operating={format_amount(data.operating_cash_flow)}, Investing={format_amount(data.investing_cash_flow)}, Financing={format_amount(data.financing_cash_flow)}"
+    except ValueError as e:
+        return f"Cash Flow extraction failed: {e}"
@@ -1,5 +1,4 @@
 from langchain.tools import tool
-from services.llm_service import llm_service
 import json
 import re
 
@@ -1,7 +1,6 @@
 from langchain.tools import tool
-from services.llm_service import llm_service
-import json
-import re
+from agents.sequential_financial.schemas.financial_schema import PLData, format_amount
+from services.llm_service import get_structured_response_async
 
 
 @tool
@@ -15,16 +14,11 @@ async def extract_pl_data(text: str) -> str:
 
 Text: {text[:2000]}
 
-JSON format:
-{{"revenue": 1000000.0, "expenses": 600000.0, "net_income": 400000.0}}
-
+If a value is not found, use null. Extract numbers without currency symbols.
 JSON:"""
 
-    response = await llm_service.get_llm_response_async(prompt)
-    response = re.sub(r"```json\n?|```\n?", "", response.strip())
-
     try:
-        data = json.loads(response)
-        return f"P&L Data extracted: Revenue=${data.get('revenue', 0):,.0f}, Expenses=${data.get('expenses', 0):,.0f}, Net Income=${data.get('net_income', 0):,.0f}"
-    except:
-        return f"P&L extraction result: {response}"
+        data = await get_structured_response_async(prompt, schema=PLData, temperature=0.0)
+        return f"P&L Data extracted: Revenue={format_amount(data.revenue)}, Expenses={format_amount(data.expenses)}, Net Income={format_amount(data.net_income)}"
+    except ValueError as e:
+        return f"P&L extraction failed: {e}"
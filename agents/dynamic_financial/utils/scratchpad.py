@@ -7,9 +7,12 @@ def create_scratchpad(intermediate_steps: list) -> str:
     
     scratchpad = "previous actions:\n"
 
-    for i, (action, observation) in enumerate(intermediate_steps):
-        scratchpad += f"\n{i}. Tool: {action.tool}\n"
-        scratchpad += f"   Input: {action.tool_input}\n"
+    # oracle decisions are (message,), executed tool calls (message, observation)
+    executed = [step for step in intermediate_steps if len(step) == 2]
+    for i, (action, observation) in enumerate(executed):
+        tool_call = action.tool_calls[0]
+        scratchpad += f"\n{i}. Tool: {tool_call['name']}\n"
+        scratchpad += f"   Input: {tool_call['args']}\n"
         scratchpad += f"   Result: {observation}\n"
     
     return scratchpad
@@ -1,11 +1,16 @@
 from typing import List, Dict, Any
 from agents.schemas.state_schema import TripletState
+from utils.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
 
 class AggregatorAgent:
     """
     aggregates results from all the agents and determines final output
     """
 
+    @traced("agent.aggregator")
     def process(self, state: TripletState) -> TripletState:
 
         try:
@@ -17,7 +22,7 @@ class AggregatorAgent:
             # calculating overall quality score
             overall_score = self._calculate_overall_quality(state)
             state.quality_scores["overall"] = overall_score
-            print("Final Triplets:", state.final_triplets)
+            logger.debug(f"aggregated {len(state.final_triplets)} final triplets", extra={"triplets": state.final_triplets})
         
         except Exception as e:
             state.error_messages.append(f"Aggregator exception: {str(e)}")
@@ -1,35 +1,35 @@
-from typing import Dict, Any
-import re
 from agents.schemas.state_schema import TripletState
 from agents.schemas.agent_schemas import AnalyzerResponse
-from agents.utils.parse_llm_response import ParseLLMResponse
-from services.llm_service import get_llm_response_async
-import json
+from services.llm_service import get_structured_response_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
+import logging
+
+logger = logging.getLogger(__name__)
 
 class AnalyzerAgent:
     """
     Analyzes text and extracts initial triplets with quality assessment
     """
+    @traced("agent.analyzer")
+    @usage_caller("analyzer")
     async def process(self, state: TripletState) -> TripletState:
         """
         extracts triplets and assesses their quality
         """
         try:
             prompt = self._create_analysis_prompt(state.raw_text)
-            response = await get_llm_response_async(prompt)
-            print("LLM response:", response)        
+            # the answer is constrained to the AnalyzerResponse schema
+            analysis_result = await get_structured_response_async(prompt, schema=AnalyzerResponse, temperature=0.0)
+            logger.debug("analyzer result", extra={"result": analysis_result.model_dump()})
 
-            # parsing LLM response
-            analysis_result = self._parse_response(response)
-            print("Analyzer Result:", analysis_result)
+            state.initial_triplets = analysis_result.triplets
+            state.quality_scores["analyzer"] = analysis_result.quality_score
+            state.analyzer_feedback = analysis_result.feedback
+            state.processing_state = "analyzed"
 
-            if analysis_result["success"]:
-                state.initial_triplets = analysis_result["triplets"]
-                state.quality_scores["analyzer"] = analysis_result["quality_score"]
-                state.analyzer_feedback = analysis_result["feedback"]
-                state.processing_state = "analyzed"
-            else:
-                state.error_messages.append(f"Analyzer failed: {analysis_result['error']}")
+        except ValueError as e:
+            state.error_messages.append(f"Analyzer failed: {str(e)}")
 
         except Exception as e:
             state.error_messages.append(f"Analyzer exception: {str(e)}")
@@ -57,35 +57,3 @@ class AnalyzerAgent:
 
         JSON Response:
         """
-    
-    def _parse_response(self, response: str) -> Dict[str, Any]:
-        """
-        parse LLM response and validate structure
-        """
-
-        try:
-            data = ParseLLMResponse._extract_json_from_markdown_response(response=response)
-            # validating required fields
-            if not all(key in data for key in ["triplets", "quality_score", "feedback"]):
-                return {"success": False, "error": "Missing required fields in response"}
-
-            # validate triplet structure
-            triplets = data["triplets"]
-            if not isinstance(triplets, list):
-                return {"success": False, "error": "Triplets should be a list"}
-
-            for triplet in triplets:
-                if not isinstance(triplet, list) or len(triplet) !=3:
-                    return {"success": False, "error": f"Invalid triplet format: {triplet}"}
-            
-            return {
-                "success": True,
-                "triplets": triplets,
-                "quality_score": float(data["quality_score"]),
-                "feedback": data["feedback"]
-            }
-        
-        except json.JSONDecodeError as e:
-            return {"success": False, "error": f"JSON decode error: {str(e)}"}
-        except Exception as e:
-            return {"success": False, "error": f"Unexpected error: {str(e)}"}
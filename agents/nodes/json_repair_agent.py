@@ -1,37 +1,40 @@
 from typing import Dict, Any
-from agents.utils.parse_llm_response import ParseLLMResponse
 from services.llm_service import get_llm_response_async
-import json
+from utils.json_parser import parse_json
+from utils.tracing import traced
+from services.usage_service import usage_caller
 import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 class JSONRepairAgent:
     """
     repairs malformed JSON responses from other agents
     """
     
+    @traced("agent.json_repair")
+    @usage_caller("json_repair")
     async def repair_json(self, malformed_json: str) -> Dict[str, Any]:
         """
         attempt to repair malformed JSON
         """
 
         try:
-            cleaned = self._basic_json_cleaning(malformed_json)
-
-            try:
-                return {"success": True, "data": json.loads(cleaned)}
-            except json.JSONDecodeError:
-                pass
+            # fences, surrounding prose and unquoted keys are repaired locally
+            repaired_json = parse_json(self._basic_json_cleaning(malformed_json))
+            if repaired_json is not None:
+                return {"success": True, "data": repaired_json}
 
-            # if basic cleaning fails, using LLM repair
+            # if basic cleaning fails, using LLM repair (JSON mode: the answer is valid JSON)
             prompt = self._create_repair_prompt(malformed_json)
-            response = await get_llm_response_async(prompt)
+            response = await get_llm_response_async(prompt, temperature=0.0, json_mode=True)
 
-            # extracting json from response
-            repaired_json = ParseLLMResponse._extract_json_from_markdown_response(response)
-            print("Repaired JSON:", repaired_json)
+            repaired_json = parse_json(response)
+            logger.debug("repaired json", extra={"repaired_json": repaired_json})
 
-            if repaired_json:
-                return {"success": True, "data": json.loads(repaired_json)}
+            if repaired_json is not None:
+                return {"success": True, "data": repaired_json}
             else:
                 return {"success": False, "error": "LLM repair failed to produce valid JSON."}
         
@@ -68,23 +71,3 @@ class JSONRepairAgent:
 
         Repaired JSON:
         """
-    
-    def _extract_json_from_response(self, response: str) -> Dict[str, Any]:
-        """
-        extract JSON object from LLM response
-        """
-        try:
-            json_match = re.search(r'({.*})', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1)
-                return json.loads(json_str)
-        except:
-            pass
-
-        try:
-            return json.loads(response)
-        except:
-            pass
-
-        return None
-            
\ No newline at end of file
@@ -1,14 +1,21 @@
-from typing import List, Dict, Any
+from typing import List
 from agents.schemas.state_schema import TripletState
-from agents.utils.parse_llm_response import ParseLLMResponse
-from services.llm_service import get_llm_response_async
+from agents.schemas.agent_schemas import CleanerResponse
+from services.llm_service import get_structured_response_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 class SemanticCleanerAgent:
     """
     cleans and standardizes triplets for consistency
     """
 
+    @traced("agent.semantic_cleaner")
+    @usage_caller("cleaner")
     async def process(self, state: TripletState) -> TripletState:
         """
         cleans and standardizes triplets
@@ -16,24 +23,21 @@ class SemanticCleanerAgent:
 
         try:
             if not state.initial_triplets:
-                state.error_messsages.append("No initial triplets to clean.")
+                state.error_messages.append("No initial triplets to clean.")
                 return state
 
             prompt = self._create_cleaning_prompt(state.initial_triplets)
-            response = await get_llm_response_async(prompt)
-            llm_response_parsed = ParseLLMResponse._extract_json_from_markdown_response(response)
-            cleaning_result = self._parse_response(llm_response_parsed)
-            print("Cleaning Result:", cleaning_result)
+            cleaning_result = await get_structured_response_async(prompt, schema=CleanerResponse, temperature=0.0)
+            logger.debug("semantic cleaner result", extra={"result": cleaning_result.model_dump()})
+
+            state.cleaned_triplets = cleaning_result.cleaned_triplets
+            state.quality_scores["cleaner"] = cleaning_result.quality_score
+            state.cleaner_feedback = cleaning_result.feedback
+            state.processing_state = "cleaned"
 
-            if cleaning_result["success"]:
-                state.cleaned_triplets = cleaning_result["cleaned_triplets"]
-                state.quality_scores["cleaner"] = cleaning_result["quality_score"]
-                state.cleaner_feedback = cleaning_result["feedback"]
-                state.processing_state = "cleaned"
-            
-            else:
-                state.error_messages.append(f"Cleaner failed: {cleaning_result['error']}")
-                state.cleaned_triplets = state.initial_triplets  # fallback to initial triplets
+        except ValueError as e:
+            state.error_messages.append(f"Cleaner failed: {str(e)}")
+            state.cleaned_triplets = state.initial_triplets  # fallback to initial triplets
         
         except Exception as e:
             state.error_messages.append(f"Cleaner exception: {str(e)}")
@@ -71,35 +75,3 @@ class SemanticCleanerAgent:
 
         JSON Response:
         """
-    
-    def _parse_response(self, data: Dict[str, Any]) -> Dict[str, Any]:  # Changed parameter type
-        """
-        parse cleaning response - expects already parsed dict
-        """
-        try:
-            required_fields = ["cleaned_triplets", "cleaning_actions", "quality_score", "feedback"]
-            if not all(key in data for key in required_fields):
-                return {
-                    "success": False,
-                    "error": "Missing required fields in cleaner response"
-                }
-
-            # validating triplet response
-            triplets = data["cleaned_triplets"]
-            if not isinstance(triplets, list):
-                return {"success": False, "error": "cleaned_triplets should be a list"}
-            
-            for triplet in triplets:
-                if not isinstance(triplet, list) or len(triplet) != 3:
-                    return {"success": False, "error": f"Invalid triplet format: {triplet}"}
-            
-            return {
-                "success": True,
-                "cleaned_triplets": triplets,
-                "cleaning_actions": data["cleaning_actions"],
-                "quality_score": float(data["quality_score"]),
-                "feedback": data["feedback"]
-            }
-
-        except Exception as e:
-            return {"success": False, "error": f"Unexpected error: {str(e)}"}
\ No newline at end of file
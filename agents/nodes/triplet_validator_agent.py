@@ -1,8 +1,9 @@
-from typing import List, Dict, Any
+from typing import List
 from agents.schemas.state_schema import TripletState
-from agents.utils.parse_llm_response import ParseLLMResponse
-from agents.utils.parse_llm_response import ParseLLMResponse
-from services.llm_service import get_llm_response_async
+from agents.schemas.agent_schemas import ValidatorResponse
+from services.llm_service import get_structured_response_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
 import json
 
 
@@ -11,6 +12,8 @@ class TripletValidatorAgent:
     validates triplets for factual accuracy and relevance
     """
 
+    @traced("agent.triplet_validator")
+    @usage_caller("validator")
     async def process(self, state: TripletState) -> TripletState:
         """
         validate triplets for accuracy and consistency
@@ -24,22 +27,20 @@ class TripletValidatorAgent:
             prompt = self._create_validation_prompt(
                 triplets_to_validate, state.raw_text
             )
-            response = await get_llm_response_async(prompt)
-            llm_response_parsed = ParseLLMResponse._extract_json_from_markdown_response(response)
-            validation_result = self._parse_response(llm_response_parsed)
+            validation_result = await get_structured_response_async(
+                prompt, schema=ValidatorResponse, temperature=0.0
+            )
+
+            state.validated_triplets = validation_result.validated_triplets
+            state.quality_scores["validator"] = validation_result.quality_score
+            state.validator_feedback = validation_result.feedback
+            state.processing_state = "validated"
 
-            if validation_result["success"]:
-                state.validated_triplets = validation_result["validated_triplets"]
-                state.quality_scores["validator"] = validation_result["quality_score"]
-                state.validator_feedback = validation_result["feedback"]
-                state.processing_state = "validated"
-            else:
-                state.error_messages.append(
-                    f"Validator failed: {validation_result['error']}"
-                )
-                state.validated_triplets = (
-                    triplets_to_validate  # fallback to input triplets
-                )
+        except ValueError as e:
+            state.error_messages.append(f"Validator failed: {str(e)}")
+            state.validated_triplets = (
+                triplets_to_validate  # fallback to input triplets
+            )
 
         except Exception as e:
             state.error_messages.append(f"Validator exception: {str(e)}")
@@ -83,47 +84,3 @@ class TripletValidatorAgent:
 
         JSON Response:
         """
-
-    def _parse_response(self, response: str) -> Dict[str, Any]:
-        """
-        parse validation response
-        """
-
-        try:
-            data = json.loads(response)
-            required_fields = [
-                "validated_triplets",
-                "validation_issues",
-                "quality_score",
-                "feedback",
-            ]
-            if not all(key in data for key in required_fields):
-                return {
-                    "success": False,
-                    "error": "Missing required fields in validator response",
-                }
-
-            # validating triplet structure
-            triplets = data["validated_triplets"]
-            if not isinstance(triplets, list):
-                return {"success": False, "error": "Validated triplets must be a list"}
-
-            for triplet in triplets:
-                if not isinstance(triplet, list) or len(triplet) != 3:
-                    return {
-                        "success": False,
-                        "error": "Each triplet must have exactly 3 elements",
-                    }
-
-            return {
-                "success": True,
-                "validated_triplets": triplets,
-                "validation_issues": data["validation_issues"],
-                "quality_score": float(data["quality_score"]),
-                "feedback": data["feedback"],
-            }
-
-        except json.JSONDecodeError as e:
-            return {"success": False, "error": f"JSON decode error: {str(e)}"}
-        except Exception as e:
-            return {"success": False, "error": f"Unexpected error: {str(e)}"}
@@ -5,6 +5,10 @@ from agents.nodes.semantic_cleaner_agent import SemanticCleanerAgent
 from agents.nodes.triplet_validator_agent import TripletValidatorAgent
 from agents.nodes.aggregator_node import AggregatorAgent
 from agents.nodes.json_repair_agent import JSONRepairAgent
+from utils.tracing import traced
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 class TripletOrchestrator:
@@ -19,6 +23,7 @@ class TripletOrchestrator:
         self.aggregator = AggregatorAgent()
         self.json_repair = JSONRepairAgent()
 
+    @traced("agent.triplet_pipeline")
     async def preprocess_text_chunk(self, text_chunk: str) ->List[Tuple[str, str, str]]:
         """
         process a single text chunk through the multi agent pipeline
@@ -33,31 +38,15 @@ class TripletOrchestrator:
         state = TripletState(raw_text=text_chunk)
         try:
             # stage 1: initial analysis
-            while True:
-                state = await self.analyzer.process(state)
-                if not self._should_retry(state):
-                    break
-                state.retry_count += 1
+            state = await self._run_stage(self.analyzer, state)
 
             # stage 2: semantic cleaning
             if state.initial_triplets and not self._has_critical_errors(state):
-                stage_retry_count = 0
-                while True:
-                    state = await self.cleaner.process(state)
-                    print
-                    if not self._should_retry(state):
-                        break
-                    state.retry_count += 1
-                    stage_retry_count += 1
+                state = await self._run_stage(self.cleaner, state)
 
             # stage 3: validation (if cleaning succeeded or was skipped)
             if (state.cleaned_triplets or state.initial_triplets) and not self._has_critical_errors(state):
-                
-                while True:
-                    state = await self.validator.process(state)
-                    if not self._should_retry(state):
-                        break
-                    state.retry_count += 1
+                state = await self._run_stage(self.validator, state)
 
             # stage 4: aggregation (if validation succeeded or was skipped)
             # doesn't need retrying logic as it is simple aggregation
@@ -69,10 +58,11 @@ class TripletOrchestrator:
             return final_triplets
         
         except Exception as e:
-            print(f"Orchestrator exception: {str(e)}")
+            logger.error(f"Orchestrator exception: {str(e)}")
             return []
     
 
+    @traced("agent.triplet_corpus")
     async def process_corpus(self, corpus: List[str]) -> List[List[Tuple[str, str, str]]]:
         """
         process entire corpus through the multi agent pipeline using async concurrency
@@ -83,18 +73,30 @@ class TripletOrchestrator:
         results = []
 
         for i, text_chunk in enumerate(corpus):
-            print(f"processing chunk {i+1}/{len(corpus)}")
+            logger.info(f"processing chunk {i+1}/{len(corpus)}")
 
             try:
                 chunk_triplets = await self.preprocess_text_chunk(text_chunk)
                 results.append(chunk_triplets)
             except Exception as e:
-                print(f"Error processing chunk {i}: {e}")
+                logger.error(f"Error processing chunk {i}: {e}")
                 results.append([])
 
         return results
     
 
+    async def _run_stage(self, agent, state: TripletState) -> TripletState:
+        """
+        run an agent, retrying while it fails (shared retry budget of the chunk)
+        """
+        while True:
+            errors_before = len(state.error_messages)
+            state = await agent.process(state)
+            if not self._should_retry(state, errors_before):
+                return state
+            state.retry_count += 1
+
+
     def _has_critical_errors(self, state: TripletState) -> bool:
         """
         determine if state has critical errors that should halt further processing
@@ -102,12 +104,16 @@ class TripletOrchestrator:
         return len(state.error_messages) > state.max_retries
     
 
-    def _should_retry(self, state: TripletState) -> bool:
+    def _should_retry(self, state: TripletState, errors_before: int = 0) -> bool:
         """
         determine if we should retry a failed agent based on error messages and retry count
+
+        args:
+            errors_before: number of error messages before the agent ran; only
+                           errors of this run count (not those of earlier stages)
         """
         return (
-            state.retry_count < state.max_retries and 
+            state.retry_count < state.max_retries and
             not state.final_triplets and
-            state.error_messages
+            len(state.error_messages) > errors_before
         )
\ No newline at end of file
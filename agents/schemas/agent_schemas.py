@@ -1,5 +1,21 @@
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from pydantic import AfterValidator, BaseModel
+from typing import Annotated, List, Dict, Any, Optional
+
+
+def _valid_triplets(triplets: List[List[str]]) -> List[List[str]]:
+    """
+    keep well-formed [subject, predicate, object] triplets
+    """
+    return [triplet for triplet in triplets if len(triplet) == 3 and all(part.strip() for part in triplet)]
+
+
+def _clamp_score(score: float) -> float:
+    return min(max(score, 0.0), 1.0)
+
+
+Triplets = Annotated[List[List[str]], AfterValidator(_valid_triplets)]
+QualityScore = Annotated[float, AfterValidator(_clamp_score)]
+
 
 class AgentResponse(BaseModel):
     """
@@ -11,30 +27,38 @@ class AgentResponse(BaseModel):
     quality_score: Optional[float] = None
     error_message: Optional[str] = None
 
-class AnalyzerResponse(AgentResponse):
+# the LLM answers of the triplet pipeline agents; their JSON schemas are sent as the
+# response format (structured outputs), so the fields are what the model must return
+
+class AnalyzerResponse(BaseModel):
     """
     Response from the analyzer agent
     """
-    triplets: List[List[str]]
-    quality_assessment: Dict[str, Any]
+    triplets: Triplets
+    quality_score: QualityScore
+    feedback: str
 
-class CleanerResponse(AgentResponse):
+class CleanerResponse(BaseModel):
     """
     Response from semantic cleaner agent
     """
-    cleaned_triplets: List[List[str]]
+    cleaned_triplets: Triplets
     cleaning_actions: List[str]
+    quality_score: QualityScore
+    feedback: str
 
-class ValidatorResponse(AgentResponse):
+class ValidatorResponse(BaseModel):
     """
     Response from the validator agent
     """
-    validated_triplets: List[List[str]]
+    validated_triplets: Triplets
     validation_issues: List[str]
+    quality_score: QualityScore
+    feedback: str
 
 class RepairResponse(AgentResponse):
     """
     Response from the repair agent
     """
     repaired_json: Dict[str, Any]
-    repair_actions: List[str]
\ No newline at end of file
+    repair_actions: List[str]
@@ -1,16 +1,20 @@
+from typing import Any, Dict
 from agents.sequential_financial.schemas.state_schema import FinancialState
+from utils.tracing import traced
 
 class Aggregator:
     """
     combine all extracted data
     """
 
-    def process(self, state: FinancialState) -> FinancialState:
+    @traced("agent.financial.aggregator")
+    def process(self, state: FinancialState) -> Dict[str, Any]:
         """
         aggregate extracted financial data into a single dictionary
+        (runs once all extractors have finished)
         """
 
-        state.financial_data = {
+        financial_data = {
             "income_statement": {
                 "revenue": state.revenue,
                 "expenses": state.expenses,
@@ -21,7 +25,12 @@ class Aggregator:
                 "total_liabilities": state.total_liabilities,
                 "equity": state.equity
             },
+            "cash_flow": {
+                "operating_cash_flow": state.operating_cash_flow,
+                "investing_cash_flow": state.investing_cash_flow,
+                "financing_cash_flow": state.financing_cash_flow
+            },
             "errors": state.errors
         }
 
-        return state
+        return {"financial_data": financial_data}
@@ -1,13 +1,17 @@
-import json
-import re
+from typing import Any, Dict
 from agents.sequential_financial.schemas.state_schema import FinancialState
-from services.llm_service import llm_service
+from agents.sequential_financial.schemas.financial_schema import BalanceSheetData
+from services.llm_service import get_structured_response_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
 
 class BalanceSheetExtractor:
     """Extract Balance Sheet data"""
     
-    async def process(self, state: FinancialState) -> FinancialState:
-        """Extract assets, liabilities, equity"""
+    @traced("agent.financial.balance_sheet")
+    @usage_caller("balance_sheet")
+    async def process(self, state: FinancialState) -> Dict[str, Any]:
+        """Extract assets, liabilities, equity (returns only the fields it sets)"""
         
         prompt = f"""
 Extract balance sheet data from this text. Return ONLY valid JSON, no markdown.
@@ -26,20 +30,8 @@ If a value is not found, use null. Extract numbers without currency symbols.
 JSON:"""
 
         try:
-            response = await llm_service.get_llm_response_async(prompt)
-            
-            # Clean response
-            response = response.strip()
-            if response.startswith("```"):
-                response = re.sub(r"```json\n?|```\n?", "", response)
-            
-            data = json.loads(response)
-            
-            state.total_assets = data.get("total_assets")
-            state.total_liabilities = data.get("total_liabilities")
-            state.equity = data.get("equity")
+            data = await get_structured_response_async(prompt, schema=BalanceSheetData, temperature=0.0)
+            return data.model_dump()
             
         except Exception as e:
-            state.errors.append(f"Balance sheet extraction failed: {str(e)}")
-        
-        return state
\ No newline at end of file
+            return {"errors": [f"Balance sheet extraction failed: {str(e)}"]}
\ No newline at end of file
@@ -0,0 +1,37 @@
+from typing import Any, Dict
+from agents.sequential_financial.schemas.state_schema import FinancialState
+from agents.sequential_financial.schemas.financial_schema import CashFlowData
+from services.llm_service import get_structured_response_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
+
+class CashFlowExtractor:
+    """Extract Cash Flow Statement data"""
+
+    @traced("agent.financial.cash_flow")
+    @usage_caller("cash_flow")
+    async def process(self, state: FinancialState) -> Dict[str, Any]:
+        """Extract operating, investing, financing cash flows (returns only the fields it sets)"""
+
+        prompt = f"""
+Extract cash flow statement data from this text. Return ONLY valid JSON, no markdown.
+
+Text:
+{state.text[:3000]}
+
+Return JSON:
+{{
+    "operating_cash_flow": 500000.0,
+    "investing_cash_flow": -200000.0,
+    "financing_cash_flow": -100000.0
+}}
+
+If a value is not found, use null. Extract numbers without currency symbols; outflows are negative.
+JSON:"""
+
+        try:
+            data = await get_structured_response_async(prompt, schema=CashFlowData, temperature=0.0)
+            return data.model_dump()
+
+        except Exception as e:
+            return {"errors": [f"Cash flow extraction failed: {str(e)}"]}
@@ -1,14 +1,18 @@
-import json
-import re
+from typing import Any, Dict
 from agents.sequential_financial.schemas.state_schema import FinancialState
-from services.llm_service import llm_service
+from agents.sequential_financial.schemas.financial_schema import PLData
+from services.llm_service import get_structured_response_async
+from utils.tracing import traced
+from services.usage_service import usage_caller
 
 
 class PLExtractor:
     """Extract Profit & Loss data"""
 
-    async def process(self, state: FinancialState) -> FinancialState:
-        """Extract revenue, expenses, net income"""
+    @traced("agent.financial.pl_extractor")
+    @usage_caller("pl_extractor")
+    async def process(self, state: FinancialState) -> Dict[str, Any]:
+        """Extract revenue, expenses, net income (returns only the fields it sets)"""
 
         prompt = f"""
         Extract financial data from this text. Return ONLY valid JSON, no markdown.
@@ -28,20 +32,8 @@ class PLExtractor:
         """
 
         try:
-            response = await llm_service.get_llm_response_async(prompt)
-
-            # Clean response
-            response = response.strip()
-            if response.startswith("```"):
-                response = re.sub(r"```json\n?|```\n?", "", response)
-
-            data = json.loads(response)
-
-            state.revenue = data.get("revenue")
-            state.expenses = data.get("expenses")
-            state.net_income = data.get("net_income")
+            data = await get_structured_response_async(prompt, schema=PLData, temperature=0.0)
+            return data.model_dump()
 
         except Exception as e:
-            state.errors.append(f"P&L extraction failed: {str(e)}")
-
-        return state
+            return {"errors": [f"P&L extraction failed: {str(e)}"]}
@@ -1,8 +1,10 @@
-from langgraph.graph import StateGraph, END
+from langgraph.graph import StateGraph, START, END
 from agents.sequential_financial.schemas.state_schema import FinancialState
 from agents.sequential_financial.nodes.pl_extractor import PLExtractor
 from agents.sequential_financial.nodes.balance_sheet_agent import BalanceSheetExtractor
+from agents.sequential_financial.nodes.cash_flow_agent import CashFlowExtractor
 from agents.sequential_financial.nodes.aggregator_agent import Aggregator
+from utils.tracing import traced
 
 class FinancialOrchestrator:
     """Minimal financial extraction orchestrator"""
@@ -10,6 +12,7 @@ class FinancialOrchestrator:
     def __init__(self):
         self.pl_extractor = PLExtractor()
         self.bs_extractor = BalanceSheetExtractor()
+        self.cf_extractor = CashFlowExtractor()
         self.aggregator = Aggregator()
         self.graph = self._build_graph()
     
@@ -18,23 +21,31 @@ class FinancialOrchestrator:
         workflow = StateGraph(FinancialState)
         
         # Add nodes
-        workflow.add_node("extract_pl", self.pl_extractor.process)
-        workflow.add_node("extract_bs", self.bs_extractor.process)
+        extractors = {
+            "extract_pl": self.pl_extractor.process,
+            "extract_bs": self.bs_extractor.process,
+            "extract_cf": self.cf_extractor.process,
+        }
+        for name, extractor in extractors.items():
+            workflow.add_node(name, extractor)
         workflow.add_node("aggregate", self.aggregator.process)
         
-        # Define flow
-        workflow.set_entry_point("extract_pl")
-        workflow.add_edge("extract_pl", "extract_bs")
-        workflow.add_edge("extract_bs", "aggregate")
+        # Define flow: the extractors are independent LLM calls, so they run in
+        # parallel (one superstep) and the aggregator waits for all of them
+        for name in extractors:
+            workflow.add_edge(START, name)
+        workflow.add_edge(list(extractors), "aggregate")
         workflow.add_edge("aggregate", END)
         
         return workflow.compile()
     
+    @traced("agent.financial.sequential")
     async def extract(self, text: str) -> dict:
         """Run extraction pipeline"""
         initial_state = FinancialState(text=text)
+        # the compiled graph returns the state values as a dict
         final_state = await self.graph.ainvoke(initial_state)
-        return final_state.financial_data
+        return final_state["financial_data"]
 
 
 # Global instance
@@ -0,0 +1,34 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+# extraction answers of the financial agents and tools; their JSON schemas are sent as
+# the response format (structured outputs). Figures are plain numbers, null when absent
+
+
+class PLData(BaseModel):
+    """Profit & Loss figures"""
+
+    revenue: Optional[float] = Field(None, description="Total revenue")
+    expenses: Optional[float] = Field(None, description="Total expenses")
+    net_income: Optional[float] = Field(None, description="Net income (negative for a loss)")
+
+
+class BalanceSheetData(BaseModel):
+    """Balance Sheet figures"""
+
+    total_assets: Optional[float] = Field(None, description="Total assets")
+    total_liabilities: Optional[float] = Field(None, description="Total liabilities")
+    equity: Optional[float] = Field(None, description="Shareholders' equity")
+
+
+class CashFlowData(BaseModel):
+    """Cash Flow Statement figures"""
+
+    operating_cash_flow: Optional[float] = Field(None, description="Net cash from operating activities")
+    investing_cash_flow: Optional[float] = Field(None, description="Net cash from investing activities")
+    financing_cash_flow: Optional[float] = Field(None, description="Net cash from financing activities")
+
+
+def format_amount(value: Optional[float]) -> str:
+    """format a figure for reports, n/a when it was not found"""
+    return "n/a" if value is None else f"${value:,.0f}"
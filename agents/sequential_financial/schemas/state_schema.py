@@ -1,5 +1,6 @@
-from typing import Dict, Any, Optional, List
+from typing import Annotated, Dict, Any, Optional, List
 from pydantic import BaseModel, Field
+import operator
 
 class FinancialState(BaseModel):
     """Minimal state for financial extraction"""
@@ -14,12 +15,15 @@ class FinancialState(BaseModel):
     total_assets: Optional[float] = None
     total_liabilities: Optional[float] = None
     equity: Optional[float] = None
+    operating_cash_flow: Optional[float] = None
+    investing_cash_flow: Optional[float] = None
+    financing_cash_flow: Optional[float] = None
     
     # Final output
     financial_data: Dict[str, Any] = Field(default_factory=dict)
     
-    # Status
-    errors: List[str] = Field(default_factory=list)
+    # Status (extractors run in parallel: their errors are concatenated)
+    errors: Annotated[List[str], operator.add] = Field(default_factory=list)
     
     class Config:
         arbitrary_types_allowed = True
\ No newline at end of file
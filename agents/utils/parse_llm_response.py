@@ -1,6 +1,5 @@
-import json
-import re
 from typing import Dict, Any
+from utils.json_parser import parse_json
 
 class ParseLLMResponse:
     """
@@ -11,17 +10,5 @@ class ParseLLMResponse:
         """
         extract JSON object from markdown formatted LLM response
         """
-        try:
-            json_match = re.search(r'```json(.*?)```', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group(1).strip()
-                return json.loads(json_str)
-        except:
-            pass
-
-        try:
-            return json.loads(response)
-        except:
-            return {}
-
-    
\ No newline at end of file
+        data = parse_json(response)
+        return data if isinstance(data, dict) else {}
@@ -0,0 +1,162 @@
+"""
+HTTP request metrics (Prometheus), tracing and token usage as plain ASGI middlewares.
+
+Routes are labelled with their path template ("/api/rag-pipeline/chat"), never the
+raw path, so label cardinality stays bounded. Streaming responses are timed
+until the last body chunk is sent.
+"""
+
+import time
+import logging
+from typing import Any, Callable, Dict
+
+from utils.metrics import metrics_registry
+from utils.tracing import tracer, extract_context, current_span, KIND_SERVER
+from services.usage_service import usage_scope
+
+logger = logging.getLogger(__name__)
+
+# seconds; RAG requests span cache hits (ms) to full generation (tens of seconds)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# not worth a time series of their own
+EXCLUDED_PATHS = {"/metrics", "/health"}
+
+http_requests_total = metrics_registry.counter(
+    "http_requests_total", "HTTP requests by method, route and status", ["method", "route", "status"]
+)
+http_request_duration_seconds = metrics_registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by method and route", ["method", "route"], buckets=REQUEST_BUCKETS
+)
+http_requests_in_flight = metrics_registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ["method"]
+)
+http_request_llm_tokens = metrics_registry.histogram(
+    "http_request_llm_tokens",
+    "LLM + embedding tokens spent per HTTP request (requests that made calls)",
+    ["route"],
+    buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000),
+)
+
+
+class PrometheusMiddleware:
+    """
+    records count, latency and in-flight requests per route
+
+    usage:
+        app.add_middleware(PrometheusMiddleware)
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope.get("path") in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        status = {"code": 500}
+        started = time.perf_counter()
+        http_requests_in_flight.inc(method=method)
+
+        async def send_wrapper(message: Dict[str, Any]):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method=method)
+            route = self._route_of(scope)
+            http_requests_total.inc(method=method, route=route, status=str(status["code"]))
+            http_request_duration_seconds.observe(time.perf_counter() - started, method=method, route=route)
+
+    def _route_of(self, scope: Dict[str, Any]) -> str:
+        """
+        path template of the matched route (FastAPI stores the route in the scope)
+        """
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        return path or "unmatched"
+
+
+class TracingMiddleware:
+    """
+    opens the root server span of each request (continuing an incoming W3C
+    traceparent) and returns its trace id in the X-Trace-Id response header
+
+    usage:
+        app.add_middleware(TracingMiddleware)
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope.get("path") in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope.get("method", "GET")
+        headers = dict(scope.get("headers") or [])
+        parent = extract_context(headers.get(b"traceparent", b"").decode("latin-1"))
+
+        with tracer.span(f"HTTP {method}", kind=KIND_SERVER, parent=parent) as span:
+            span.set_attributes(**{"http.method": method, "http.target": scope.get("path")})
+
+            async def send_wrapper(message: Dict[str, Any]):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-trace-id", span.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    span.name = f"{method} {route}"
+                    span.set_attribute("http.route", route)
+
+
+class UsageMiddleware:
+    """
+    aggregates the token usage of each request (all LLM / embedding calls made
+    while serving it) into a histogram, the request span and one log record
+
+    usage:
+        app.add_middleware(UsageMiddleware)
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope.get("path") in EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        with usage_scope(scope.get("path", "")) as usage:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                if usage.calls:
+                    route = getattr(scope.get("route"), "path", None) or "unmatched"
+                    summary = usage.summary()
+                    http_request_llm_tokens.observe(summary["total_tokens"], route=route)
+
+                    span = current_span()
+                    if span is not None:
+                        span.set_attributes(**{
+                            "llm.calls": summary["calls"],
+                            "llm.total_tokens": summary["total_tokens"],
+                            "llm.cost_usd": summary["cost_usd"],
+                        })
+                    logger.info(
+                        f"{scope.get('method')} {route}: {summary['calls']} LLM calls, "
+                        f"{summary['total_tokens']} tokens, ${summary['cost_usd']:.4f}",
+                        extra={"usage": summary},
+                    )
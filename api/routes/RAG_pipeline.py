@@ -1,11 +1,20 @@
 from fastapi import APIRouter, HTTPException
-from services.context_service import context_service
-from services.llm_service import llm_service
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from services.context_service import context_service, build_rag_prompt
+from services.embedding_service import embedding_service
+from services.llm_service import get_llm_response_async, stream_llm_response_async
 import logging
 import hashlib
+import json
+import time
 
 # Import schemas
 from schemas.llm_schemas import RAGChatRequest, RAGChatResponse
+from config.redis_config import redis_config
+from utils.metrics import time_stage
+from utils.tracing import traced
+from services.usage_service import usage_caller
 
 # Create router
 rag_pipeline_router = APIRouter()
@@ -20,6 +29,124 @@ def _make_query_hash(query: str, temperature: float, max_tokens: int) -> str:
     return hashlib.md5(key_str.encode()).hexdigest()[:16]
 
 
+def _make_cache_key(request: RAGChatRequest) -> str:
+    """
+    cache key shared by the blocking and the streaming chat endpoints
+    """
+    return context_service.cache.make_key(
+        "rag_response",
+        _make_query_hash(request.query, request.temperature, request.max_tokens),
+    )
+
+
+def _semantic_partition(request: RAGChatRequest) -> str:
+    """
+    answers generated with different parameters are never shared semantically
+    """
+    return f"{request.temperature}:{request.max_tokens}:{request.k}"
+
+
+def _dependency_tags(chunks: List[Dict[str, Any]]) -> List[str]:
+    """
+    invalidation tags for an answer: the chunks and documents it was built from
+    """
+    tags = set()
+    for chunk in chunks:
+        if chunk.get("ref_id"):
+            tags.add(f"ref:{chunk['ref_id']}")
+        source_url = (chunk.get("metadata") or {}).get("source_url")
+        if source_url:
+            tags.add(f"source:{source_url}")
+    return sorted(tags)
+
+
+@traced("rag.cache_lookup")
+async def _get_cached_response(
+    request: RAGChatRequest, cache_key: str
+) -> Tuple[Optional[Dict[str, Any]], Optional[List[float]]]:
+    """
+    exact-key lookup first, then semantic lookup by query embedding
+
+    returns:
+        - (cached response or None, query embedding if one was computed)
+          the embedding is reused by retrieval on a miss
+    """
+    entry = await context_service.cache.get_envelope(cache_key, beta=redis_config.xfetch_beta)
+    if entry and entry["value"]:
+        cached_response = entry["value"]
+        if entry["refresh"]:
+            # serving the cached answer now, one background task regenerates it
+            started = context_service.cache.refresh_in_background(
+                cache_key,
+                lambda: _generate_response(request, cache_key, None),
+                lock_timeout=redis_config.lock_timeout,
+            )
+            logger.info(f"Cache hit for RAG response ({'stale' if entry['stale'] else 'early refresh'}, refresh started: {started})")
+        else:
+            logger.info("Cache hit for RAG response")
+        cached_response["from_cache"] = True
+        return cached_response, None
+
+    if not context_service.semantic_cache.enabled:
+        return None, None
+
+    try:
+        query_embedding = await embedding_service.get_embedding(request.query)
+    except Exception as e:
+        logger.warning(f"Could not embed query for semantic cache lookup: {e}")
+        return None, None
+
+    hit = await context_service.semantic_cache.lookup(query_embedding, partition=_semantic_partition(request))
+    if hit:
+        cached_response = dict(hit["value"])
+        cached_response.update(
+            {"query": request.query, "from_cache": True, "semantic_similarity": hit["similarity"]}
+        )
+        return cached_response, query_embedding
+
+    return None, query_embedding
+
+
+async def _store_response(
+    request: RAGChatRequest,
+    cache_key: str,
+    response_data: Dict[str, Any],
+    chunks: List[Dict[str, Any]],
+    query_embedding: Optional[List[float]],
+    compute_seconds: float = 0.0,
+):
+    """
+    write a generated answer to the exact and the semantic cache
+    compute_seconds: how long the answer took (earlier probabilistic refresh for slow answers)
+    """
+    tags = _dependency_tags(chunks)
+    # long-lived: entries are evicted as soon as one of their documents changes
+    await context_service.cache.set_envelope(
+        cache_key,
+        response_data,
+        ttl=redis_config.rag_response_ttl,
+        delta=compute_seconds,
+        stale_ttl=redis_config.rag_response_stale_ttl,
+        tags=tags,
+    )
+    if query_embedding is not None:
+        await context_service.semantic_cache.store(
+            request.query,
+            query_embedding,
+            response_data,
+            partition=_semantic_partition(request),
+            tags=tags,
+            ttl=redis_config.rag_response_ttl,
+        )
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    format one server-sent event
+    """
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
 @rag_pipeline_router.post("/chat", response_model=RAGChatResponse)
 async def rag_chat(request: RAGChatRequest) -> RAGChatResponse:
     """
@@ -37,60 +164,183 @@ async def rag_chat(request: RAGChatRequest) -> RAGChatResponse:
             raise HTTPException(status_code=400, detail="Query is required")
 
         # checking cache first
-        cache_key = context_service.cache.make_key(
-            "rag_response",
-            _make_query_hash(request.query, request.temperature, request.max_tokens),
-        )
+        cache_key = _make_cache_key(request)
 
-        cached_response = await context_service.cache.get(cache_key)
+        cached_response, query_embedding = await _get_cached_response(request, cache_key)
         if cached_response:
-            logger.info("Cache hit for RAG response")
-            cached_response["from_cache"] = True
             return RAGChatResponse(**cached_response)
 
-        logger.info(f"Cache miss for RAG response, processing query: {request.query}")
-
-        # searching similiar documents and triplets for building context
-        context = await context_service.hybrid_search_context(
-            request.query, top_k=request.k, expand_graph=True
+        # identical concurrent queries (in this worker or others) run the pipeline once
+        response_data = await context_service.single_flight.do(
+            cache_key,
+            lambda: _generate_response(request, cache_key, query_embedding),
+            result_key=cache_key,
         )
+        return RAGChatResponse(**response_data)
+
+    except Exception as e:
+        logger.error(f"Error occurred: {str(e)}")
+        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
 
-        logger.info(f"Retrieved context: {context}")
 
-        if context == "":
-            return RAGChatResponse(
-                success=True,
-                query=request.query,
-                answer="I couldn't find any relevant documents to answer your question.",
-            )
+@traced("rag.generate_response")
+@usage_caller("rag")
+async def _generate_response(
+    request: RAGChatRequest, cache_key: str, query_embedding: Optional[List[float]]
+) -> Dict[str, Any]:
+    """
+    retrieve + augment + generate, then cache the answer
+    """
+    logger.info(f"Cache miss for RAG response, processing query: {request.query}")
+    started = time.perf_counter()
+
+    # searching similiar documents and triplets for building context
+    retrieval = await context_service.retrieve_context(
+        request.query,
+        top_k=request.k,
+        expand_graph=True,
+        query_embedding=query_embedding,
+        max_tokens=request.max_tokens,
+    )
+    context = retrieval["context"]
+
+    logger.debug(f"Retrieved context ({len(context)} chars)", extra={"context": context})
+
+    if context == "":
+        return {
+            "success": True,
+            "query": request.query,
+            "answer": "I couldn't find any relevant documents to answer your question.",
+            "retrieval_latencies_ms": retrieval["latencies_ms"],
+        }
+
+    answer = await generate_rag_response(
+        request.query, context, request.temperature, request.max_tokens
+    )
+    response_data = {
+        "success": True,
+        "query": request.query,
+        "answer": answer,
+        "context_used": context,
+        "from_cache": False,
+        "retrieval_latencies_ms": retrieval["latencies_ms"],
+        "context_tokens_saved": retrieval["context_stats"].get("tokens_saved"),
+    }
+
+    logger.debug(f"Generated answer ({len(answer or '')} chars)", extra={"answer": answer})
+
+    # storing in cache
+    await _store_response(
+        request, cache_key, response_data, retrieval["chunks"], query_embedding,
+        compute_seconds=time.perf_counter() - started,
+    )
+
+    return response_data
+
+
+@rag_pipeline_router.post("/chat/stream")
+async def rag_chat_stream(request: RAGChatRequest) -> StreamingResponse:
+    """
+    Streaming RAG pipeline over Server-Sent Events
+
+    Events:
+    - metadata: retrieval sources, latencies and context stats (sent before generation starts)
+    - token: {"content": "..."} answer deltas
+    - done: end of a generated answer (the answer is cached at this point)
+    - answer: complete response in one event (cache hit or nothing retrieved)
+    - error: {"error": "..."}
+    """
+    if not request.query:
+        raise HTTPException(status_code=400, detail="Query is required")
+
+    return StreamingResponse(
+        _stream_rag_events(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
-        answer = await generate_rag_response(
-            request.query, context, request.temperature, request.max_tokens
+async def _stream_rag_events(request: RAGChatRequest) -> AsyncIterator[str]:
+    """
+    retrieval metadata first, then tokens; the full answer is cached once the stream completes
+    """
+    try:
+        cache_key = _make_cache_key(request)
+
+        cached_response, query_embedding = await _get_cached_response(request, cache_key)
+        if cached_response:
+            yield _sse("answer", cached_response)
+            return
+
+        started = time.perf_counter()
+        retrieval = await context_service.retrieve_context(
+            request.query,
+            top_k=request.k,
+            expand_graph=True,
+            query_embedding=query_embedding,
+            max_tokens=request.max_tokens,
         )
+        context = retrieval["context"]
+
+        if context == "":
+            yield _sse("answer", {
+                "success": True,
+                "query": request.query,
+                "answer": "I couldn't find any relevant documents to answer your question.",
+                "from_cache": False,
+                "retrieval_latencies_ms": retrieval["latencies_ms"],
+            })
+            return
+
+        yield _sse("metadata", {
+            "query": request.query,
+            "sources": [
+                {
+                    "ref_id": chunk["ref_id"],
+                    "source_url": chunk["metadata"].get("source_url"),
+                    "score": chunk["rrf_score"],
+                }
+                for chunk in retrieval["chunks"]
+            ],
+            "retrieval_latencies_ms": retrieval["latencies_ms"],
+            "context_tokens_saved": retrieval["context_stats"].get("tokens_saved"),
+        })
+
+        answer_parts = []
+        with time_stage("llm_generation"):
+            async for delta in stream_llm_response_async(
+                build_rag_prompt(request.query, context),
+                temperature=request.temperature,
+                max_tokens=request.max_tokens,
+                caller="rag",
+            ):
+                answer_parts.append(delta)
+                yield _sse("token", {"content": delta})
+
+        # only reached when the stream completed (not on client disconnect)
         response_data = {
             "success": True,
             "query": request.query,
-            "answer": answer,
+            "answer": "".join(answer_parts),
             "context_used": context,
-            "from_cache": False
+            "from_cache": False,
+            "retrieval_latencies_ms": retrieval["latencies_ms"],
+            "context_tokens_saved": retrieval["context_stats"].get("tokens_saved"),
         }
-
-        logger.info(f"Generated answer: {answer}")
-
-        # storing in cache
-        await context_service.cache.set(
-            cache_key,
-            response_data,
-            ttl=3600,  # cache for 1 hour
+        await _store_response(
+            request, cache_key, response_data, retrieval["chunks"], query_embedding,
+            compute_seconds=time.perf_counter() - started,
         )
 
-        return RAGChatResponse(**response_data)
+        yield _sse("done", {"from_cache": False})
 
     except Exception as e:
-        logger.error(f"Error occurred: {str(e)}")
-        raise HTTPException(status_code=500, detail={"success": False, "error": str(e)})
+        logger.error(f"Error occurred while streaming: {str(e)}")
+        yield _sse("error", {"success": False, "error": str(e)})
 
 
+@traced("rag.llm_generation")
+@time_stage("llm_generation")
 async def generate_rag_response(
     query: str, context: str, temperature: float = 0.1, max_tokens: int = 500
 ) -> str:
@@ -98,18 +348,9 @@ async def generate_rag_response(
     Generate response using LLM with retrieved context
     """
     try:
-        prompt = f"""
-        Based on the following context, answer the question:
-
-        Context: 
-        {context}
-
-        Question: {query}
-
-        Answer based only on the context provided:
-        """
+        prompt = build_rag_prompt(query, context)
 
-        response = await llm_service.get_llm_response_async(prompt=prompt)
+        response = await get_llm_response_async(prompt, temperature=temperature, max_tokens=max_tokens)
 
         return response
 
@@ -1,14 +1,18 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from typing import Any
 
 from services.document_processing_service import process_and_embed_file_from_url
-from repositories.hana_repository import search_similiar_documents
+from repositories.hana_repository import search_similiar_documents, delete_document_by_source
+from services.context_service import context_service
+from services.job_service import job_service
 from auth.oauth_token import get_access_token_async
 
 # Import schemas
 from schemas.auth_schemas import TokenResponse
-from schemas.embedding_schemas import EmbeddingKGRequest, EmbeddingKGResponse
+from schemas.embedding_schemas import EmbeddingKGRequest, EmbeddingKGResponse, JobStatusResponse
 from schemas.search_schemas import SearchRequest, SearchResponse, SearchResult
+from schemas.document_schemas import DocumentDeleteRequest, DocumentDeleteResponse
 
 # Create router
 genai_router = APIRouter()
@@ -37,15 +41,19 @@ async def create_and_store_embedding(
     - doc_type
     """
     try:
-        # Processing and embedding the file in background
+        # Processing and embedding the file in background, tracked as a job
+        job = await job_service.create("ingest_document", file_url=request.file_url)
         background_tasks.add_task(
-            process_and_embed_file_from_url,
-            request.file_url
+            job_service.run,
+            job["job_id"],
+            lambda: process_and_embed_file_from_url(request.file_url),
+            summarize=_ingestion_summary,
         )
 
         return EmbeddingKGResponse(
             success=True,
-            message=f"Successfully processed and embedded document from {request.file_url}"
+            message=f"Processing document from {request.file_url}, poll /jobs/{job['job_id']} for status",
+            job_id=job["job_id"],
         )
 
     except Exception as e:
@@ -59,6 +67,55 @@ async def create_and_store_embedding(
         )
 
 
+def _ingestion_summary(combined: list) -> dict:
+    return {
+        "chunks": len(combined),
+        "triplets": sum(len(item.get("triplets") or []) for item in combined),
+    }
+
+
+@genai_router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def job_status(job_id: str) -> JobStatusResponse:
+    """
+    Status of a background job (ingestion), including token usage and cost per caller
+    """
+    job = await job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatusResponse(**job)
+
+
+@genai_router.post("/delete-document", response_model=DocumentDeleteResponse)
+async def delete_document(request: DocumentDeleteRequest) -> DocumentDeleteResponse:
+    """
+    Delete a document's chunks and triplets and evict cached answers built from it
+    Request parameters:
+    - file_url: url the document was ingested from
+    """
+    try:
+        ref_ids = await asyncio.to_thread(delete_document_by_source, request.file_url)
+        invalidated = await context_service.invalidate_documents(
+            source_urls=[request.file_url], ref_ids=ref_ids
+        )
+
+        return DocumentDeleteResponse(
+            success=True,
+            message=f"Deleted {len(ref_ids)} chunks of {request.file_url}",
+            chunks_deleted=len(ref_ids),
+            cache_entries_invalidated=invalidated,
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail={
+                "success": False,
+                "error": str(e),
+                "message": "Failed to delete document"
+            }
+        )
+
+
 @genai_router.post("/search-similiar-documents", response_model=SearchResponse)
 async def search_documents(request: SearchRequest) -> SearchResponse:
     """
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
+import asyncio
 import uvicorn
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -13,6 +14,12 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# request count / latency / token usage per route (exported at /metrics) and root trace spans
+from api.middleware import PrometheusMiddleware, TracingMiddleware, UsageMiddleware
+app.add_middleware(PrometheusMiddleware)
+app.add_middleware(UsageMiddleware)      # inside the tracing middleware, so it can annotate the request span
+app.add_middleware(TracingMiddleware)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,6 +34,14 @@ from api.routes.RAG_pipeline import rag_pipeline_router
 from api.routes.genai_hub import genai_router
 from api.routes.financial_extraction import financial_router
 from api.routes.dynamic_financial_extration import dfr
+from repositories.hana_repository import run_schema_migrations
+from config.settings import hana_config
+from config.redis_config import close_async_redis_connection
+from services.cache_service import cache_service
+from fastapi.responses import Response
+from utils.metrics import metrics_registry, PROMETHEUS_CONTENT_TYPE
+from utils.tracing import tracer
+from utils.http_client import close_session
 
 # Including routers with their prefixes
 # app.include_router(document_router, prefix="/api/documents", tags=["documents"])
@@ -35,6 +50,33 @@ app.include_router(genai_router, prefix="/api/genai", tags=["genai"])
 app.include_router(financial_router, prefix="/api/financial", tags=["financial"])
 app.include_router(dfr, prefix="/api/dynamic-financial", tags=["dynamic-financial"])
 
+# applying HANA schema migrations once per worker, so ingestion writes can skip DDL checks
+@app.on_event("startup")
+async def migrate_schema():
+    if hana_config.run_migrations_on_startup:
+        await asyncio.to_thread(run_schema_migrations)
+
+# listening for cache invalidations from other workers (memory tier coherence)
+@app.on_event("startup")
+async def start_cache():
+    await cache_service.start()
+
+# closing the shared redis pool once, instead of per cache instance
+@app.on_event("shutdown")
+async def close_redis():
+    await cache_service.stop()
+    await close_async_redis_connection()
+
+# closing the pooled connections to AI Core
+@app.on_event("shutdown")
+async def close_http_client():
+    await close_session()
+
+# exporting spans still queued in this worker
+@app.on_event("shutdown")
+async def flush_traces():
+    await asyncio.to_thread(tracer.shutdown)
+
 # Root endpoint
 @app.get("/")
 async def home():
@@ -45,6 +87,12 @@ async def home():
 async def health():
     return {"status": "healthy"}
 
+# Prometheus metrics of this worker (cache telemetry, ...)
+@app.get("/metrics")
+async def metrics():
+    await cache_service.collect_metrics()
+    return Response(content=metrics_registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 if __name__ == '__main__':
     
     cf_port = os.getenv("PORT")
@@ -4,7 +4,9 @@ from dotenv import load_dotenv
 import requests
 import os
 from fastapi import HTTPException
-import aiohttp
+from utils.http_client import get_session
+from utils.metrics import time_stage
+from utils.tracing import traced, KIND_CLIENT
 
 logger = getLogger(__name__)
 load_dotenv()
@@ -40,6 +42,8 @@ def get_access_token() -> str:
         raise HTTPException(status_code=500, detail=f"OAuth error: {str(e)}")
 
 
+@traced("http.oauth_token", kind=KIND_CLIENT)
+@time_stage("token")
 async def get_access_token_async() -> str:
     """Async version using aiohttp"""
     oauth_endpoint = os.getenv("AICORE_AUTH_URL")
@@ -58,16 +62,15 @@ async def get_access_token_async() -> str:
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(oauth_endpoint, data=urlencode(params), headers=headers) as response:
-                response.raise_for_status()
-                response_data = await response.json()
-                access_token = response_data.get("access_token")
-                
-                if not access_token:
-                    raise HTTPException(status_code=500, detail="No access token received")
-                
-                return access_token
+        async with get_session().post(oauth_endpoint, data=urlencode(params), headers=headers) as response:
+            response.raise_for_status()
+            response_data = await response.json()
+            access_token = response_data.get("access_token")
+            
+            if not access_token:
+                raise HTTPException(status_code=500, detail="No access token received")
+            
+            return access_token
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OAuth error: {str(e)}")
\ No newline at end of file
@@ -9,11 +9,21 @@ by establishing clear contracts about:
 """
 
 from abc import ABC, abstractmethod
-from typing import Optional, Any, List, Dict, Union
+from typing import Optional, Any, Awaitable, Callable, List, Dict, Union
+import time
+import math
+import random
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
+# marker of values stored by set_envelope
+ENVELOPE_MARKER = "__envelope__"
+
+# background refreshes kept referenced until they finish
+_refresh_tasks: set = set()
+
 
 class CacheError(Exception):
     """Base exception for cache errors"""
@@ -51,8 +61,19 @@ class BaseCache(ABC):
         pass
     
     @abstractmethod
-    async def clear_pattern(self, pattern: str) -> int:
-        """Delete keys matching pattern. Returns number of deleted keys."""
+    async def clear_pattern(
+        self,
+        pattern: str,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], Any]] = None,
+        max_keys_per_second: Optional[int] = None,
+        use_lua: bool = False,
+    ) -> int:
+        """
+        Delete keys matching pattern. Returns number of deleted keys.
+        Backends should delete incrementally (batch_size keys at a time, at most
+        max_keys_per_second) and report progress as progress_callback(scanned, deleted).
+        """
         pass
     
     @abstractmethod
@@ -82,4 +103,121 @@ class BaseCache(ABC):
             return await self.set(key, value, ttl)
         except Exception as e:
             logger.warning(f"Cache set failed for key {key}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    async def set_with_tags(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        """
+        Set value and record that it depends on the given tags (e.g. source documents).
+        Backends without tag support just set the value.
+        """
+        return await self.set(key, value, ttl)
+
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """Delete every key recorded under any of the tags. Returns number of deleted keys."""
+        return 0
+
+    # ========================================
+    # STALE-WHILE-REVALIDATE ENVELOPES
+    # ========================================
+
+    async def set_envelope(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        delta: float = 0.0,
+        stale_ttl: int = 0,
+        tags: Optional[List[str]] = None,
+    ) -> bool:
+        """
+        Store value with its compute time and logical expiry.
+        args:
+            - ttl: seconds the value is fresh
+            - delta: seconds it took to compute (drives early refresh, see get_envelope)
+            - stale_ttl: grace period after ttl during which the value is still served
+        The key physically lives ttl + stale_ttl seconds.
+        """
+        envelope = {
+            ENVELOPE_MARKER: 1,
+            "value": value,
+            "delta": delta,
+            "expiry": time.time() + ttl if ttl else None,
+        }
+        physical_ttl = ttl + stale_ttl if ttl else None
+        return await self.set_with_tags(key, envelope, ttl=physical_ttl, tags=tags)
+
+    async def get_envelope(self, key: str, beta: float = 1.0) -> Optional[Dict[str, Any]]:
+        """
+        Read a value stored with set_envelope.
+        returns:
+            - None on miss, else {"value", "delta", "expiry", "stale", "refresh"}
+              stale: past expiry (inside the grace window)
+              refresh: stale, or picked for probabilistic early refresh (XFetch):
+                       now - delta * beta * ln(rand) >= expiry, so entries that are
+                       expensive to compute start refreshing earlier and refreshes
+                       of popular keys are spread out instead of all at expiry
+        Plain values (not written by set_envelope) are returned as fresh.
+        """
+        raw = await self.get_or_none(key)
+        if raw is None:
+            return None
+        if not (isinstance(raw, dict) and raw.get(ENVELOPE_MARKER)):
+            return {"value": raw, "delta": 0.0, "expiry": None, "stale": False, "refresh": False}
+
+        now = time.time()
+        expiry = raw.get("expiry")
+        delta = raw.get("delta") or 0.0
+        stale = expiry is not None and now >= expiry
+        early = (
+            expiry is not None
+            and delta > 0
+            and now - delta * beta * math.log(1.0 - random.random()) >= expiry
+        )
+        return {
+            "value": raw.get("value"),
+            "delta": delta,
+            "expiry": expiry,
+            "stale": stale,
+            "refresh": stale or early,
+        }
+
+    async def get_value(self, key: str) -> Optional[Any]:
+        """Get value, unwrapping set_envelope entries."""
+        entry = await self.get_envelope(key)
+        return entry["value"] if entry else None
+
+    def refresh_in_background(self, key: str, refresh: Callable[[], Awaitable[Any]], lock_timeout: float = 60) -> bool:
+        """
+        Run refresh (expected to recompute and store key) in a background task,
+        at most once at a time per key. Returns False if a refresh is already running.
+        """
+        refreshing = self.__dict__.setdefault("_refreshing", set())
+        if key in refreshing:
+            return False
+        refreshing.add(key)
+
+        async def run():
+            try:
+                if not await self._acquire_refresh_lock(key, lock_timeout):
+                    logger.debug(f"refresh of {key} already running in another worker")
+                    return
+                try:
+                    await refresh()
+                finally:
+                    await self._release_refresh_lock(key)
+            except Exception as e:
+                logger.warning(f"background refresh of {key} failed: {e}")
+            finally:
+                refreshing.discard(key)
+
+        task = asyncio.create_task(run())
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+        return True
+
+    async def _acquire_refresh_lock(self, key: str, timeout: float) -> bool:
+        """Cross-process refresh lock; in-process dedup is enough for local backends."""
+        return True
+
+    async def _release_refresh_lock(self, key: str):
+        pass
@@ -0,0 +1,108 @@
+"""
+Per-namespace cache telemetry (hits, misses, bytes, (de)serialization time,
+Redis round trips, invalidations, evictions) registered in the shared metrics
+registry and exported at /metrics.
+
+The namespace is the first segment of the key ("embedding:<hash>" -> "embedding");
+unknown prefixes are grouped under "other" to keep label cardinality bounded.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from utils.metrics import metrics_registry
+from utils.tracing import tracer, KIND_CLIENT
+
+KNOWN_NAMESPACES = {
+    "embedding",
+    "search",
+    "llm",
+    "rag_response",
+    "rag_semantic",
+    "triplets",
+    "tag",
+    "lock",
+    "refresh",
+    "job",
+}
+
+# serialization of large payloads is sub-millisecond to tens of ms
+_CODEC_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+
+requests_total = metrics_registry.counter(
+    "cache_requests_total", "Cache lookups by namespace, tier and result (hit/miss)", ["namespace", "tier", "result"]
+)
+read_bytes_total = metrics_registry.counter(
+    "cache_read_bytes_total", "Serialized bytes read from the cache", ["namespace"]
+)
+written_bytes_total = metrics_registry.counter(
+    "cache_written_bytes_total", "Serialized bytes written to the cache", ["namespace"]
+)
+codec_seconds = metrics_registry.histogram(
+    "cache_codec_seconds", "Time spent serializing / deserializing values", ["namespace", "operation"], buckets=_CODEC_BUCKETS
+)
+redis_rtt_seconds = metrics_registry.histogram(
+    "cache_redis_rtt_seconds", "Round-trip time of Redis commands issued by the cache", ["command"]
+)
+errors_total = metrics_registry.counter(
+    "cache_errors_total", "Cache operations that failed", ["namespace", "command"]
+)
+invalidations_total = metrics_registry.counter(
+    "cache_invalidations_total", "Keys removed on purpose (delete, pattern, tag)", ["namespace", "reason"]
+)
+evictions_total = metrics_registry.counter(
+    "cache_evictions_total", "Keys evicted for space by the in-process memory tier", ["namespace"]
+)
+redis_server = metrics_registry.gauge(
+    "cache_redis_server", "Redis INFO values (evicted_keys, expired_keys, used_memory, ...)", ["field"]
+)
+redis_pool_connections = metrics_registry.gauge(
+    "cache_redis_pool_connections", "Connections of the shared Redis pool", ["pool", "state"]
+)
+
+
+def key_namespace(key: str) -> str:
+    """
+    metric namespace of a cache key (cluster hash tags are ignored)
+    """
+    prefix = str(key).split(":", 1)[0].strip("{}")
+    return prefix if prefix in KNOWN_NAMESPACES else "other"
+
+
+def record_lookup(key: str, hit: bool, tier: str = "redis"):
+    requests_total.inc(namespace=key_namespace(key), tier=tier, result="hit" if hit else "miss")
+
+
+@contextmanager
+def redis_timer(command: str):
+    """
+    time one redis round trip (and trace it as a client span)
+    """
+    started = time.perf_counter()
+    try:
+        with tracer.span(f"redis.{command}", kind=KIND_CLIENT, **{"db.system": "redis"}):
+            yield
+    finally:
+        redis_rtt_seconds.observe(time.perf_counter() - started, command=command)
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    """
+    per-namespace summary (hits, misses, hit rate, bytes) for get_cache_info
+    """
+    summary: Dict[str, Dict[str, Any]] = {}
+    for (namespace, tier, result), value in requests_total.items():
+        stats = summary.setdefault(namespace, {"hits": 0, "misses": 0})
+        stats["hits" if result == "hit" else "misses"] += value
+        stats.setdefault("by_tier", {}).setdefault(tier, {"hits": 0, "misses": 0})[
+            "hits" if result == "hit" else "misses"
+        ] += value
+    for (namespace,), value in read_bytes_total.items():
+        summary.setdefault(namespace, {"hits": 0, "misses": 0})["read_bytes"] = value
+    for (namespace,), value in written_bytes_total.items():
+        summary.setdefault(namespace, {"hits": 0, "misses": 0})["written_bytes"] = value
+    for stats in summary.values():
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return summary
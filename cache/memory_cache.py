@@ -0,0 +1,234 @@
+"""
+In-process cache: size-bounded LRU with per-key TTL and byte accounting.
+
+Used on its own or as the first tier of TieredCache. Values are kept as Python
+objects, so a hit costs no network round trip and no deserialization.
+"""
+
+import copy
+import json
+import time
+import fnmatch
+import inspect
+import logging
+from collections import OrderedDict
+from typing import Optional, Any, Callable, List, Dict
+
+from .base_cache import BaseCache
+from . import cache_metrics
+from config.redis_config import redis_config
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """
+    approximate memory footprint of a value in bytes (its serialized length)
+    """
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode("utf-8", errors="ignore"))
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class MemoryCache(BaseCache):
+    """
+    LRU + TTL cache bounded by entry count and total bytes
+
+    single event loop use: no method awaits while touching the store, so
+    operations are atomic without locks
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: Optional[int] = None,
+    ):
+        """
+        args:
+            - max_entries: entry count bound
+            - max_bytes: bound on the summed estimate_size of all values
+            - default_ttl: ttl for set() calls without one (None = no expiry)
+        """
+        self.max_entries = max_entries or redis_config.memory_cache_max_entries
+        self.max_bytes = max_bytes or redis_config.memory_cache_max_bytes
+        self.default_ttl = default_ttl
+
+        # key -> (value, expires_at or None, size)
+        self._store: "OrderedDict[str, tuple]" = OrderedDict()
+        # tag -> keys and key -> tags, so evicted keys leave the tag index too
+        self._tags: Dict[str, set] = {}
+        self._key_tags: Dict[str, set] = {}
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    # ========================================
+    # CORE METHODS (MUST IMPLEMENT)
+    # ========================================
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        get value by key, refreshing its LRU position
+        mutable values are returned as copies so callers can't alter the cached object
+        """
+        item = self._store.get(key)
+        if item is None:
+            self._record(key, hit=False)
+            return None
+
+        value, expires_at, _ = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self._record(key, hit=False)
+            return None
+
+        self._store.move_to_end(key)
+        self._record(key, hit=True)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        """
+        set value, evicting least recently used entries to stay within bounds
+        values larger than max_bytes are not cached
+        """
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            logger.debug(f"Memory cache skipping key {key}: {size} bytes exceeds max_bytes")
+            self._remove(key)
+            return False
+
+        ttl = ttl or self.default_ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+
+        self._remove(key)
+        self._store[key] = (value, expires_at, size)
+        self._bytes += size
+        self._evict()
+        return True
+
+    async def delete(self, key: str) -> bool:
+        """
+        delete key, True if it existed
+        """
+        return self._remove(key)
+
+    async def exists(self, key: str) -> bool:
+        item = self._store.get(key)
+        if item is None:
+            return False
+        if item[1] is not None and item[1] <= time.monotonic():
+            self._remove(key)
+            return False
+        return True
+
+    async def clear_pattern(
+        self,
+        pattern: str,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], Any]] = None,
+        max_keys_per_second: Optional[int] = None,
+        use_lua: bool = False,
+    ) -> int:
+        """
+        delete all keys matching a glob pattern (redis MATCH syntax)
+        batching and rate limiting don't apply in memory
+        """
+        keys = [key for key in self._store if fnmatch.fnmatchcase(key, pattern)]
+        for key in keys:
+            self._remove(key)
+
+        if progress_callback:
+            try:
+                result = progress_callback(len(keys), len(keys))
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"clear_pattern progress callback failed: {e}")
+        return len(keys)
+
+    async def get_multiple(self, keys: List[str]) -> Dict[str, Any]:
+        result = {}
+        for key in keys:
+            value = await self.get(key)
+            if value is not None:
+                result[key] = value
+        return result
+
+    # ========================================
+    # TAG BASED INVALIDATION
+    # ========================================
+
+    async def set_with_tags(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        if not await self.set(key, value, ttl):
+            return False
+        for tag in set(tags or []):
+            self._tags.setdefault(tag, set()).add(key)
+            self._key_tags.setdefault(key, set()).add(tag)
+        return True
+
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        deleted = 0
+        for tag in set(tags or []):
+            for key in list(self._tags.get(tag, ())):
+                deleted += self._remove(key)
+            self._tags.pop(tag, None)
+        return deleted
+
+    # ========================================
+    # STATS
+    # ========================================
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._store),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    # ========================================
+    # INTERNALS
+    # ========================================
+
+    def _record(self, key: str, hit: bool):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        cache_metrics.record_lookup(key, hit=hit, tier="memory")
+
+    def _remove(self, key: str) -> bool:
+        item = self._store.pop(key, None)
+        if item is None:
+            return False
+        self._bytes -= item[2]
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+        return True
+
+    def _evict(self):
+        """
+        drop least recently used entries until both bounds hold
+        """
+        while self._store and (len(self._store) > self.max_entries or self._bytes > self.max_bytes):
+            key = next(iter(self._store))
+            self._remove(key)
+            self.evictions += 1
+            cache_metrics.evictions_total.inc(namespace=cache_metrics.key_namespace(key))
@@ -1,15 +1,60 @@
 import json
+import time
+import uuid
 import pickle
+import asyncio
+import inspect
 import logging
-from typing import Optional, Any, List, Dict, Union
+from typing import Optional, Any, Callable, List, Dict, Union
 import redis.asyncio as aioredis
 from asyncio import Lock
 
 from ..base_cache import BaseCache, CacheError
-from config.redis_config import get_async_redis_connection, redis_config
+from .. import cache_metrics
+from ..cache_metrics import key_namespace, redis_timer
+from config.redis_config import get_async_redis_connection, get_pool_stats, redis_config
 
 logger = logging.getLogger(__name__)
 
+# extra lifetime of a tag set over the entries it points to (seconds)
+TAG_TTL_MARGIN = 60
+
+# INFO fields exported as gauges at /metrics
+SERVER_METRIC_FIELDS = (
+    "evicted_keys",
+    "expired_keys",
+    "used_memory",
+    "maxmemory",
+    "keyspace_hits",
+    "keyspace_misses",
+    "connected_clients",
+)
+
+# keys unlinked per command when invalidating a tag
+TAG_DELETE_BATCH = 500
+
+# server-side SCAN + UNLINK loop; one call, blocks redis while it runs (small namespaces only)
+_CLEAR_PATTERN_SCRIPT = """
+local cursor = "0"
+local deleted = 0
+repeat
+    local page = redis.call("SCAN", cursor, "MATCH", ARGV[1], "COUNT", ARGV[2])
+    cursor = page[1]
+    if #page[2] > 0 then
+        deleted = deleted + redis.call("UNLINK", unpack(page[2]))
+    end
+until cursor == "0"
+return deleted
+"""
+
+# compare-and-delete, so a refresh that outlived its lock never releases the next holder's
+_RELEASE_REFRESH_LOCK_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
 class RedisCache(BaseCache):
     """
     Redis implementation of BaseCache interface
@@ -20,6 +65,8 @@ class RedisCache(BaseCache):
     def __init__(self):
         self._redis_client: Optional[aioredis.Redis] = None
         self._lock = Lock() 
+        # refresh locks held by this instance: key -> owner token
+        self._refresh_tokens: Dict[str, str] = {}
     
     async def _get_client(self) -> Optional[aioredis.Redis]:
         """
@@ -56,6 +103,25 @@ class RedisCache(BaseCache):
                 # if all else fails, return raw string
                 return value
         
+    def _encode(self, key: str, value: Any) -> str:
+        """
+        serialize with per-namespace timing and byte accounting
+        """
+        started = time.perf_counter()
+        serialized = self._serialize_value(value)
+        namespace = key_namespace(key)
+        cache_metrics.codec_seconds.observe(time.perf_counter() - started, namespace=namespace, operation="serialize")
+        cache_metrics.written_bytes_total.inc(len(serialized), namespace=namespace)
+        return serialized
+
+    def _decode(self, key: str, raw_value: str) -> Any:
+        started = time.perf_counter()
+        value = self._deserialize_value(raw_value)
+        namespace = key_namespace(key)
+        cache_metrics.codec_seconds.observe(time.perf_counter() - started, namespace=namespace, operation="deserialize")
+        cache_metrics.read_bytes_total.inc(len(raw_value), namespace=namespace)
+        return value
+
     # ========================================
     # CORE METHODS (MUST IMPLEMENT)
     # ========================================
@@ -70,17 +136,20 @@ class RedisCache(BaseCache):
                 logger.error("Redis client not initialized")
                 return None
 
-            raw_value = await client.get(key)
+            with redis_timer("get"):
+                raw_value = await client.get(key)
+            cache_metrics.record_lookup(key, hit=raw_value is not None)
             if raw_value is None:
                 logger.debug(f"Cache miss for key: {key}")
                 return None
 
             # deserialize and return 
-            value = self._deserialize_value(raw_value)
+            value = self._decode(key, raw_value)
             logger.debug(f"Cache hit for key: {key}")
             return value
         
         except Exception as e:
+            cache_metrics.errors_total.inc(namespace=key_namespace(key), command="get")
             logger.error(f"Redis get error for key {key}: {e}")
             return None
     
@@ -94,16 +163,18 @@ class RedisCache(BaseCache):
                 logger.error("Redis client not initialized")
                 return False
             
-            serialized_value = self._serialize_value(value)
-            if ttl:
-                await client.setex(key, ttl, serialized_value)
-            else:
-                await client.set(key, serialized_value)
+            serialized_value = self._encode(key, value)
+            with redis_timer("set"):
+                if ttl:
+                    await client.setex(key, ttl, serialized_value)
+                else:
+                    await client.set(key, serialized_value)
             
             logger.debug(f"Cache set for key: {key} with ttl: {ttl}")
             return True
         
         except Exception as e:
+            cache_metrics.errors_total.inc(namespace=key_namespace(key), command="set")
             logger.error(f"Redis set error for key {key}: {e}")
             return False
         
@@ -117,9 +188,11 @@ class RedisCache(BaseCache):
                 logger.error("Redis client not initialized")
                 return False
             
-            result = await client.delete(key)
+            with redis_timer("delete"):
+                result = await client.delete(key)
 
             if result > 0:
+                cache_metrics.invalidations_total.inc(namespace=key_namespace(key), reason="delete")
                 logger.debug(f"Cache delete successful for key: {key}")
                 return True
             else:
@@ -127,6 +200,7 @@ class RedisCache(BaseCache):
                 return False
         
         except Exception as e:
+            cache_metrics.errors_total.inc(namespace=key_namespace(key), command="delete")
             logger.error(f"Redis delete error for key {key}: {e}")
             return False
     
@@ -141,7 +215,8 @@ class RedisCache(BaseCache):
                 return False
             
             # check existence in redis
-            result = await client.exists(key)
+            with redis_timer("exists"):
+                result = await client.exists(key)
 
             exists = result > 0
 
@@ -152,32 +227,130 @@ class RedisCache(BaseCache):
             logger.error(f"Redis exists error for key {key}: {e}")
             return False
         
-    async def clear_pattern(self, pattern: str) -> int:
-        """
-        delete all keys matching pattern from redis
-        """
+    async def clear_pattern(
+        self,
+        pattern: str,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], Any]] = None,
+        max_keys_per_second: Optional[int] = None,
+        use_lua: bool = False,
+    ) -> int:
+        """
+        delete all keys matching pattern from redis without blocking the server
+
+        keys are walked with incremental SCAN and removed with UNLINK (memory is
+        reclaimed in a background thread) in pipelined batches
+
+        args:
+            - batch_size: SCAN COUNT hint and keys per UNLINK pipeline
+            - progress_callback: called as (scanned, deleted) after every batch, sync or async
+            - max_keys_per_second: throttle deletes (None = redis_config default, 0 = unlimited)
+            - use_lua: delete server-side in one script call; it blocks redis while it
+              runs, so only use it for small namespaces
+        returns:
+            - number of deleted keys
+        """
+        batch_size = batch_size or redis_config.clear_batch_size
+        if max_keys_per_second is None:
+            max_keys_per_second = redis_config.clear_max_keys_per_second
+
         try:
             client = await self._get_client()
             if not client:
                 logger.error("Redis client not initialized")
                 return 0
-            
-            # finding keys matching pattern
-            keys = await client.keys(pattern)
 
-            if not keys:
-                logger.debug(f"No keys found for pattern: {pattern}")
-                return 0
-            
-            # delete all matching keys
-            deleted_count = await client.delete(*keys)
-            logger.debug(f"Cache clear pattern: {pattern}, deleted {deleted_count} keys")
+            if use_lua and redis_config.is_cluster:
+                # a script only sees the keys of the node it runs on
+                logger.warning("clear_pattern: use_lua is not supported in cluster mode, falling back to SCAN")
+                use_lua = False
+
+            if use_lua:
+                with redis_timer("clear_pattern_lua"):
+                    deleted_count = await client.eval(_CLEAR_PATTERN_SCRIPT, 0, pattern, batch_size)
+                cache_metrics.invalidations_total.inc(deleted_count, namespace=key_namespace(pattern), reason="pattern")
+                await self._report_progress(progress_callback, deleted_count, deleted_count)
+                logger.debug(f"Cache clear pattern (lua): {pattern}, deleted {deleted_count} keys")
+                return deleted_count
+
+            started = time.monotonic()
+            scanned = 0
+            deleted_count = 0
+            async for keys in self._scan_batches(client, pattern, batch_size):
+                scanned += len(keys)
+                deleted_count += await self._unlink_batches(client, keys, batch_size)
+                await self._report_progress(progress_callback, scanned, deleted_count)
+
+                if max_keys_per_second:
+                    # sleeping until the delete rate is back under the limit
+                    ahead = deleted_count / max_keys_per_second - (time.monotonic() - started)
+                    if ahead > 0:
+                        await asyncio.sleep(ahead)
+
+            cache_metrics.invalidations_total.inc(deleted_count, namespace=key_namespace(pattern), reason="pattern")
+            logger.debug(f"Cache clear pattern: {pattern}, scanned {scanned}, deleted {deleted_count} keys")
             return deleted_count
-        
+
         except Exception as e:
+            cache_metrics.errors_total.inc(namespace=key_namespace(pattern), command="clear_pattern")
             logger.error(f"Redis clear_pattern error for pattern {pattern}: {e}")
             return 0
-        
+
+    async def _scan_batches(self, client: aioredis.Redis, pattern: str, batch_size: int):
+        """
+        yield non-empty pages of keys matching pattern
+        in cluster mode scan_iter walks every primary node
+        """
+        if redis_config.is_cluster:
+            batch = []
+            async for key in client.scan_iter(match=pattern, count=batch_size):
+                batch.append(key)
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+            return
+
+        cursor = 0
+        while True:
+            with redis_timer("scan"):
+                cursor, keys = await client.scan(cursor=cursor, match=pattern, count=batch_size)
+            if keys:
+                yield keys
+            if cursor == 0:
+                break
+
+    async def _unlink_batches(self, client: aioredis.Redis, keys: List[str], batch_size: int) -> int:
+        """
+        UNLINK keys in batch_size chunks sent as one pipeline
+        returns number of keys that existed
+        """
+        if redis_config.is_cluster:
+            # the cluster pipeline can't UNLINK several keys, the cluster client
+            # splits a multi-key UNLINK by slot itself
+            deleted = 0
+            with redis_timer("unlink"):
+                for i in range(0, len(keys), batch_size):
+                    deleted += await client.unlink(*keys[i:i + batch_size])
+            return deleted
+
+        pipe = client.pipeline(transaction=False)
+        for i in range(0, len(keys), batch_size):
+            pipe.unlink(*keys[i:i + batch_size])
+        with redis_timer("unlink"):
+            return sum(await pipe.execute())
+
+    async def _report_progress(self, progress_callback: Optional[Callable[[int, int], Any]], scanned: int, deleted: int):
+        if not progress_callback:
+            return
+        try:
+            result = progress_callback(scanned, deleted)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning(f"clear_pattern progress callback failed: {e}")
+
     async def get_multiple(self, keys: List[str]) -> Dict[str, Any]:
         """
         get multiple keys at once from redis
@@ -189,12 +362,18 @@ class RedisCache(BaseCache):
                 return {}
             if not keys:
                 return {}
-            raw_values = await client.mget(keys)
+            with redis_timer("mget"):
+                if redis_config.is_cluster:
+                    # keys may live in different slots
+                    raw_values = await client.mget_nonatomic(keys)
+                else:
+                    raw_values = await client.mget(keys)
             result = {}
             for key, raw_value in zip(keys, raw_values):
+                cache_metrics.record_lookup(key, hit=raw_value is not None)
                 if raw_value is not None:
                     try:
-                        result[key] = self._deserialize_value(raw_value)
+                        result[key] = self._decode(key, raw_value)
                     except Exception as e:
                         logger.error(f"Error deserializing value for key {key}: {e}")
 
@@ -202,6 +381,7 @@ class RedisCache(BaseCache):
             return result
         
         except Exception as e:
+            cache_metrics.errors_total.inc(namespace=key_namespace(keys[0]) if keys else "other", command="mget")
             logger.error(f"Redis get_multiple error for keys {keys}: {e}")
             return {}
         
@@ -228,23 +408,24 @@ class RedisCache(BaseCache):
             serialized_data = {}
             for key, value in data.items():
                 try:
-                    serialized_data[key] = self._serialize_value(value)
+                    serialized_data[key] = self._encode(key, value)
                 except Exception as e:
                     logger.error(f"Error serializing value for key {key}: {e}")
                     return False
                 
             
-            if ttl:
-                # using pipeline for TTL operations
-                pipe = client.pipeline()
-                for key, value in serialized_data.items():
-                    pipe.setex(key, ttl, value)
+            with redis_timer("mset"):
+                if ttl:
+                    # using pipeline for TTL operations
+                    pipe = client.pipeline()
+                    for key, value in serialized_data.items():
+                        pipe.setex(key, ttl, value)
+                    
+                    await pipe.execute()
                 
-                await pipe.execute()
-            
-            else:
-                # using mset for bulk set without TTL
-                await client.mset(serialized_data)
+                else:
+                    # using mset for bulk set without TTL
+                    await client.mset(serialized_data)
             
             logger.debug(f"Cache set_multiple for keys: {list(data.keys())} with ttl: {ttl}")
             return True
@@ -291,27 +472,186 @@ class RedisCache(BaseCache):
     
     async def get_cache_info(self) -> Dict[str, Any]:
         """
-        get basic info about the redis cache
+        get basic info about the redis cache, with per-namespace hit/miss counters of this process
         """
         try:
             client = await self._get_client()
             if not client:
                 logger.error("Redis client not initialized")
                 return {}
-            info = await client.info()
+            with redis_timer("info"):
+                info = await client.info()
             return {
                 "redis_version": info.get("redis_version"),
                 "used_memory": info.get("used_memory_human"),
                 "connected_clients": info.get("connected_clients"),
                 "keyspace_hits": info.get("keyspace_hits", 0),
                 "keyspace_misses": info.get("keyspace_misses", 0),
-                "uptime_in_seconds": info.get("uptime_in_seconds")
+                "evicted_keys": info.get("evicted_keys", 0),
+                "expired_keys": info.get("expired_keys", 0),
+                "uptime_in_seconds": info.get("uptime_in_seconds"),
+                "pool": get_pool_stats(),
+                "namespaces": cache_metrics.snapshot(),
             }
         
         except Exception as e:
             logger.error(f"Redis get_cache_info error: {e}")
             return {}
+
+    async def collect_server_metrics(self):
+        """
+        refresh the server-side gauges (evictions, expirations, memory, pool usage)
+        called on every /metrics scrape
+        """
+        try:
+            client = await self._get_client()
+            if not client:
+                return
+            with redis_timer("info"):
+                info = await client.info()
+            for field in SERVER_METRIC_FIELDS:
+                if isinstance(info.get(field), (int, float)):
+                    cache_metrics.redis_server.set(info[field], field=field)
+
+            for pool, stats in get_pool_stats().get("pools", {}).items():
+                for state in ("created", "available", "in_use"):
+                    value = stats.get(f"{state}_connections")
+                    if value is not None:
+                        cache_metrics.redis_pool_connections.set(value, pool=pool, state=state)
+
+        except Exception as e:
+            logger.warning(f"Could not collect Redis server metrics: {e}")
         
+    # ========================================
+    # BACKGROUND REFRESH LOCK
+    # ========================================
+
+    async def _acquire_refresh_lock(self, key: str, timeout: float) -> bool:
+        """
+        one background refresh per key across all workers
+        (fails open: if redis is unreachable the refresh runs)
+        """
+        try:
+            client = await self._get_client()
+            if not client:
+                return True
+            token = uuid.uuid4().hex
+            acquired = bool(await client.set(f"refresh:{key}", token, nx=True, px=int(timeout * 1000)))
+            if acquired:
+                self._refresh_tokens[key] = token
+            return acquired
+        except Exception as e:
+            logger.warning(f"Redis refresh lock error for key {key}: {e}")
+            return True
+
+    async def _release_refresh_lock(self, key: str):
+        token = self._refresh_tokens.pop(key, None)
+        if token is None:
+            # the lock was never taken (redis unreachable, refresh ran anyway)
+            return
+        try:
+            client = await self._get_client()
+            if client:
+                await client.eval(_RELEASE_REFRESH_LOCK_SCRIPT, 1, f"refresh:{key}", token)
+        except Exception as e:
+            logger.warning(f"Redis refresh unlock error for key {key}: {e}")
+
+    # ========================================
+    # TAG BASED INVALIDATION
+    # ========================================
+
+    def _tag_key(self, tag: str) -> str:
+        return self.make_key("tag", tag)
+
+    async def set_with_tags(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        """
+        set value and add its key to one redis set per tag, so invalidate_tags()
+        can evict exactly the entries that depend on a document
+        """
+        if not tags:
+            return await self.set(key, value, ttl=ttl)
+
+        try:
+            client = await self._get_client()
+            if not client:
+                logger.error("Redis client not initialized")
+                return False
+
+            serialized_value = self._encode(key, value)
+            pipe = client.pipeline()
+            if ttl:
+                pipe.setex(key, ttl, serialized_value)
+            else:
+                pipe.set(key, serialized_value)
+
+            for tag in set(tags):
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                # tag sets outlive their members a little; stale members are harmless
+                if ttl:
+                    pipe.expire(tag_key, ttl + TAG_TTL_MARGIN)
+
+            with redis_timer("set_with_tags"):
+                await pipe.execute()
+            logger.debug(f"Cache set for key: {key} with ttl: {ttl}, tags: {tags}")
+            return True
+
+        except Exception as e:
+            cache_metrics.errors_total.inc(namespace=key_namespace(key), command="set_with_tags")
+            logger.error(f"Redis set_with_tags error for key {key}: {e}")
+            return False
+
+    async def tagged_keys(self, tags: List[str]) -> List[str]:
+        """
+        keys currently recorded under any of the tags
+        """
+        try:
+            client = await self._get_client()
+            if not client or not tags:
+                return []
+
+            pipe = client.pipeline()
+            for tag in set(tags):
+                pipe.smembers(self._tag_key(tag))
+            members = set()
+            with redis_timer("smembers"):
+                tag_results = await pipe.execute()
+            for tag_members in tag_results:
+                members.update(tag_members or [])
+            return list(members)
+
+        except Exception as e:
+            logger.error(f"Redis tagged_keys error for tags {tags}: {e}")
+            return []
+
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        delete every key recorded under any of the tags, and the tag sets themselves
+        returns number of deleted keys
+        """
+        try:
+            client = await self._get_client()
+            if not client:
+                logger.error("Redis client not initialized")
+                return 0
+
+            tag_keys = [self._tag_key(tag) for tag in set(tags or [])]
+            if not tag_keys:
+                return 0
+
+            members = await self.tagged_keys(tags)
+            deleted = await self._unlink_batches(client, members, TAG_DELETE_BATCH) if members else 0
+            for member in members:
+                cache_metrics.invalidations_total.inc(namespace=key_namespace(member), reason="tag")
+            await client.unlink(*tag_keys)
+
+            logger.info(f"Invalidated {deleted} cache entries for tags: {sorted(tags)}")
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Redis invalidate_tags error for tags {tags}: {e}")
+            return 0
+
     # ========================================
     # AI specific methods (OPTIONAL TO OVERRIDE)
     # ========================================
@@ -330,12 +670,13 @@ class RedisCache(BaseCache):
         key = self.make_key("embedding", text)
         return await self.get(key)
     
-    async def cache_search_results(self, query: str, results: Any) -> bool:
+    async def cache_search_results(self, query: str, results: Any, tags: Optional[List[str]] = None) -> bool:
         """
         cache search results for a query
+        tags: source documents of the results (see invalidate_tags)
         """
         key = self.make_key("search", query)
-        return await self.set(key, results, ttl=redis_config.search_ttl)
+        return await self.set_with_tags(key, results, ttl=redis_config.search_ttl, tags=tags)
 
     async def get_cached_search_results(self, query: str) -> Optional[Any]:
         """
@@ -344,18 +685,18 @@ class RedisCache(BaseCache):
         key = self.make_key("search", query)
         return await self.get(key)
     
-    async def cache_llm_response(self, prompt: str, response: str) -> bool:
+    async def cache_llm_response(self, request_hash: str, response: str) -> bool:
         """
-        cache LLM response for a prompt with default TTL
+        cache LLM response under the hash of its request (see LLMService.cache_key) with default TTL
         """
-        key = self.make_key("llm", prompt)
+        key = self.make_key("llm", request_hash)
         return await self.set(key, response, ttl=redis_config.llm_response_ttl)
     
-    async def get_cached_llm_response(self, prompt: str) -> Optional[str]:
+    async def get_cached_llm_response(self, request_hash: str) -> Optional[str]:
         """
-        get cached LLM response for a prompt
+        get cached LLM response by request hash
         """
-        key = self.make_key("llm", prompt)
+        key = self.make_key("llm", request_hash)
         return await self.get(key)
     
     # =======================================
@@ -364,15 +705,18 @@ class RedisCache(BaseCache):
 
     async def close(self):
         """
-        close redis connection
+        release this cache's handle on the shared redis client
+        the pool itself is closed once, at shutdown (config.redis_config.close_async_redis_connection)
         """
         if self._redis_client:
-            await self._redis_client.close()
             self._redis_client = None
-            logger.info("Redis connection closed")
+            logger.info("Redis cache released its connection")
 
-        async def __aexit__(self, exc_type, exc_val, exc_tb):
-            """
-            context manager cleanup
-            """
-            await self.close()
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        context manager cleanup
+        """
+        await self.close()
@@ -0,0 +1,277 @@
+"""
+Semantic answer cache: looks up cached answers by query-embedding similarity
+instead of the exact query string.
+
+Entries live in Redis (shared by all workers). Every worker keeps a small
+in-memory vector index of the entry ids/embeddings, synced from a Redis sorted
+set of the entry ids scored by expiry time (entries may have different ttls),
+so a lookup is one matrix product plus a single GET.
+"""
+
+import base64
+import json
+import time
+import uuid
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .base_cache import BaseCache
+from config.redis_config import hash_tag, redis_config
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(vector.astype(np.float32).tobytes()).decode("ascii")
+
+
+def _decode_vector(encoded: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(encoded), dtype=np.float32)
+
+
+def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if not norm:
+        return None
+    return vector / norm
+
+
+class SemanticCache:
+    """
+    nearest-neighbour answer cache above a cosine similarity threshold
+
+    entries are partitioned (e.g. by generation parameters) so an answer produced
+    with different temperature/max_tokens is never served, and carry invalidation
+    tags (ref_ids / source_urls of the documents the answer used)
+    """
+
+    def __init__(
+        self,
+        cache: BaseCache,
+        namespace: str = "rag_semantic",
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl: Optional[int] = None,
+        refresh_interval: Optional[float] = None,
+    ):
+        self.cache = cache
+        # entries and their index share one cluster slot, so index syncs are a single MGET
+        self.namespace = hash_tag(namespace)
+        self.enabled = redis_config.semantic_cache_enabled
+        self.threshold = threshold if threshold is not None else redis_config.semantic_cache_threshold
+        self.max_entries = max_entries or redis_config.semantic_cache_max_entries
+        self.ttl = ttl or redis_config.semantic_cache_ttl
+        self.refresh_interval = refresh_interval if refresh_interval is not None else redis_config.semantic_cache_refresh_interval
+
+        # local index: entry_id -> {"vector", "partition", "tags", "expires_at"}
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._matrices: Dict[str, Tuple[List[str], np.ndarray]] = {}
+        self._last_sync_at = 0.0
+
+    # ========================================
+    # PUBLIC API
+    # ========================================
+
+    async def lookup(self, embedding: Sequence[float], partition: str = "default") -> Optional[Dict[str, Any]]:
+        """
+        find the most similar cached query in the partition
+
+        returns:
+            - {"value", "similarity", "query", "tags"} or None on miss
+        """
+        if not self.enabled:
+            return None
+        try:
+            vector = _normalize(embedding)
+            if vector is None:
+                return None
+
+            await self._sync()
+
+            ids, matrix = self._matrix_for(partition)
+            if not ids or matrix.shape[1] != vector.shape[0]:
+                return None
+
+            similarities = matrix @ vector
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            if similarity < self.threshold:
+                logger.debug(f"semantic cache miss (best similarity {similarity:.4f})")
+                return None
+
+            entry_id = ids[best]
+            entry = await self.cache.get(self._entry_key(entry_id))
+            if not entry:
+                # expired or invalidated by another worker
+                self._drop(entry_id)
+                return None
+
+            logger.info(f"semantic cache hit (similarity {similarity:.4f}) for cached query: {entry.get('query')}")
+            return {
+                "value": entry.get("value"),
+                "similarity": similarity,
+                "query": entry.get("query"),
+                "tags": entry.get("tags", []),
+            }
+
+        except Exception as e:
+            logger.warning(f"semantic cache lookup failed: {e}")
+            return None
+
+    async def store(
+        self,
+        query: str,
+        embedding: Sequence[float],
+        value: Any,
+        partition: str = "default",
+        tags: Optional[List[str]] = None,
+        ttl: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        cache an answer under its query embedding
+        returns the entry id, None if nothing was stored
+        """
+        if not self.enabled:
+            return None
+        try:
+            vector = _normalize(embedding)
+            if vector is None:
+                return None
+
+            ttl = ttl or self.ttl
+            entry_id = uuid.uuid4().hex
+            tags = sorted(set(tags or []))
+            entry = {
+                "query": query,
+                "partition": partition,
+                "tags": tags,
+                "vector": _encode_vector(vector),
+                "value": value,
+            }
+            if not await self.cache.set_with_tags(self._entry_key(entry_id), entry, ttl=ttl, tags=tags):
+                return None
+
+            expires_at = time.time() + ttl
+            client = await self.cache._get_client()
+            if client:
+                pipe = client.pipeline()
+                pipe.zadd(self._ids_key(), {entry_id: expires_at})
+                # forgetting ids whose entries have expired and bounding the index (soonest to expire first)
+                pipe.zremrangebyscore(self._ids_key(), 0, time.time())
+                pipe.zremrangebyrank(self._ids_key(), 0, -self.max_entries - 1)
+                await pipe.execute()
+
+            self._add_local(entry_id, vector, partition, tags, expires_at)
+            return entry_id
+
+        except Exception as e:
+            logger.warning(f"semantic cache store failed: {e}")
+            return None
+
+    async def invalidate_tags(self, tags: Sequence[str]) -> int:
+        """
+        drop every entry carrying one of the tags
+        the shared entries are evicted through the cache tag sets (other workers
+        notice on their next lookup), the local index is pruned right away
+        returns the number of entries removed
+        """
+        tags = set(tags)
+        if not tags:
+            return 0
+
+        await self._sync(force=True)
+        doomed = [entry_id for entry_id, entry in self._entries.items() if tags & set(entry["tags"])]
+        for entry_id in doomed:
+            await self._remove(entry_id)
+
+        if doomed:
+            logger.info(f"semantic cache: invalidated {len(doomed)} entries for tags {sorted(tags)}")
+        return len(doomed)
+
+    # ========================================
+    # INDEX MAINTENANCE
+    # ========================================
+
+    async def _sync(self, force: bool = False):
+        """
+        pull the live entries other workers added, with the expiry they were stored with
+        """
+        now = time.time()
+        if not force and now - self._last_sync_at < self.refresh_interval:
+            return
+        self._last_sync_at = now
+
+        client = await self.cache._get_client()
+        if not client:
+            return
+
+        # the ids are scored by expiry, so the live ones are all the index holds (at most max_entries)
+        live_ids = await client.zrangebyscore(self._ids_key(), now, "+inf", withscores=True)
+        unknown = [(entry_id, expires_at) for entry_id, expires_at in live_ids if entry_id not in self._entries]
+        if unknown:
+            entries = await self.cache.get_multiple([self._entry_key(entry_id) for entry_id, _ in unknown])
+            gone = []
+            for entry_id, expires_at in unknown:
+                entry = entries.get(self._entry_key(entry_id))
+                if entry:
+                    self._add_local(
+                        entry_id,
+                        _decode_vector(entry["vector"]),
+                        entry.get("partition", "default"),
+                        entry.get("tags", []),
+                        expires_at,
+                    )
+                else:
+                    # invalidated by another worker (entries are written before their id)
+                    gone.append(entry_id)
+            if gone:
+                await client.zrem(self._ids_key(), *gone)
+
+        # pruning expired entries
+        for entry_id in [i for i, e in self._entries.items() if e["expires_at"] < now]:
+            self._drop(entry_id)
+
+    def _add_local(self, entry_id: str, vector: np.ndarray, partition: str, tags: List[str], expires_at: float):
+        self._entries[entry_id] = {
+            "vector": vector,
+            "partition": partition,
+            "tags": tags,
+            "expires_at": expires_at,
+        }
+        self._matrices.pop(partition, None)
+
+        # bounding the local index the same way as the shared one
+        if len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda i: self._entries[i]["expires_at"])
+            self._drop(oldest)
+
+    def _drop(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry:
+            self._matrices.pop(entry["partition"], None)
+
+    async def _remove(self, entry_id: str):
+        self._drop(entry_id)
+        await self.cache.delete(self._entry_key(entry_id))
+        client = await self.cache._get_client()
+        if client:
+            await client.zrem(self._ids_key(), entry_id)
+
+    def _matrix_for(self, partition: str) -> Tuple[List[str], np.ndarray]:
+        """
+        stacked vectors of one partition, rebuilt only after the partition changed
+        """
+        if partition not in self._matrices:
+            ids = [i for i, e in self._entries.items() if e["partition"] == partition]
+            matrix = np.vstack([self._entries[i]["vector"] for i in ids]) if ids else np.empty((0, 0), dtype=np.float32)
+            self._matrices[partition] = (ids, matrix)
+        return self._matrices[partition]
+
+    def _entry_key(self, entry_id: str) -> str:
+        return self.cache.make_key(self.namespace, f"entry:{entry_id}")
+
+    def _ids_key(self) -> str:
+        return self.cache.make_key(self.namespace, "ids")
@@ -0,0 +1,162 @@
+"""
+Request coalescing ("single-flight") for expensive async work.
+
+Concurrent callers asking for the same key share one execution: within a
+process through an in-flight future, across workers through a Redis lock whose
+holder publishes its result to the cache while the others wait for it.
+"""
+
+import asyncio
+import time
+import uuid
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from .base_cache import BaseCache
+from config.redis_config import redis_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# compare-and-delete, so a holder never releases a lock that expired and was re-acquired
+_RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    in-process coalescing: one execution per key, its result (or exception)
+    is fanned out to every concurrent caller
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def inflight(self) -> int:
+        """number of keys currently being computed"""
+        return len(self._inflight)
+
+    def is_inflight(self, key: str) -> bool:
+        return key in self._inflight
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        run fn once for all concurrent callers of key
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            # its own task, so cancelling the caller that started it doesn't fail the others
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            logger.debug(f"single-flight: joining in-flight call for {key}")
+
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            # shield, so a cancelled waiter doesn't cancel the shared call
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # nobody is left waiting for the result: stop the work
+            if self._waiters[key] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+
+    def _finished(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # marking the exception as retrieved when every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+class DistributedSingleFlight:
+    """
+    in-process + Redis lock coalescing
+
+    the lock holder computes (and is expected to write result_key to the cache),
+    workers that lose the race poll result_key until it appears, the lock is
+    released, or lock_wait_timeout passes - then they compute themselves
+    """
+
+    def __init__(
+        self,
+        cache: BaseCache,
+        lock_timeout: Optional[float] = None,
+        wait_timeout: Optional[float] = None,
+        poll_interval: float = 0.05,
+        max_poll_interval: float = 0.5,
+    ):
+        self.cache = cache
+        self.lock_timeout = lock_timeout or redis_config.lock_timeout
+        self.wait_timeout = wait_timeout or redis_config.lock_wait_timeout
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._local = SingleFlight()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]], result_key: Optional[str] = None) -> T:
+        """
+        args:
+            - key: coalescing key (usually the cache key of the result)
+            - fn: the work, expected to store its result under result_key
+            - result_key: cache key waiters poll for the holder's result
+        """
+        return await self._local.do(key, lambda: self._run(key, fn, result_key))
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[T]], result_key: Optional[str]) -> T:
+        # local backends (MemoryCache) have no redis client: in-process coalescing only
+        get_client = getattr(self.cache, "_get_client", None)
+        client = await get_client() if get_client else None
+        if not client:
+            return await fn()
+
+        lock_key = f"lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000))
+        except Exception as e:
+            logger.warning(f"single-flight: could not acquire lock {lock_key}: {e}")
+            return await fn()
+
+        if acquired:
+            try:
+                return await fn()
+            finally:
+                try:
+                    await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    logger.warning(f"single-flight: could not release lock {lock_key}: {e}")
+
+        logger.debug(f"single-flight: {lock_key} held by another worker, waiting for its result")
+        result = await self._wait_for_result(client, lock_key, result_key)
+        if result is not None:
+            return result
+        return await fn()
+
+    async def _wait_for_result(self, client, lock_key: str, result_key: Optional[str]) -> Optional[Any]:
+        deadline = time.monotonic() + self.wait_timeout
+        interval = self.poll_interval
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            interval = min(interval * 2, self.max_poll_interval)
+
+            if result_key:
+                result = await self.cache.get_value(result_key)
+                if result is not None:
+                    return result
+            if not await client.exists(lock_key):
+                # holder finished without publishing (error or uncacheable result)
+                return await self.cache.get_value(result_key) if result_key else None
+
+        logger.warning(f"single-flight: gave up waiting on {lock_key} after {self.wait_timeout}s")
+        return None
@@ -0,0 +1,246 @@
+"""
+Two-tier cache: in-process MemoryCache in front of the shared RedisCache.
+
+Reads go memory -> redis (read-through, redis hits are copied into memory),
+writes go to both tiers (write-through). Every write or delete is published on
+a Redis pub/sub channel, so the other workers drop their local copy of the key;
+local copies also expire after a short ttl in case a message is missed.
+"""
+
+import json
+import uuid
+import asyncio
+import logging
+from typing import Optional, Any, Callable, List, Dict
+
+from .base_cache import BaseCache
+from .memory_cache import MemoryCache
+from .redis.redis_cache import RedisCache
+from config.redis_config import redis_config
+
+logger = logging.getLogger(__name__)
+
+
+class TieredCache(BaseCache):
+    """
+    memory (L1) + redis (L2) cache kept coherent across workers with pub/sub
+    """
+
+    def __init__(
+        self,
+        local: Optional[MemoryCache] = None,
+        remote: Optional[RedisCache] = None,
+        local_ttl: Optional[int] = None,
+        channel: Optional[str] = None,
+    ):
+        """
+        args:
+            - local / remote: the two tiers (new instances by default)
+            - local_ttl: upper bound on how long a memory copy is served
+            - channel: pub/sub channel for invalidation messages
+        """
+        self.local = local or MemoryCache()
+        self.remote = remote or RedisCache()
+        self.local_ttl = local_ttl or redis_config.memory_cache_ttl
+        self.channel = channel or redis_config.invalidation_channel
+
+        # messages published by this instance are ignored by its own listener
+        self._origin = uuid.uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+
+    async def _get_client(self):
+        """
+        redis client of the remote tier (semantic cache / single-flight use it directly)
+        """
+        return await self.remote._get_client()
+
+    async def _acquire_refresh_lock(self, key: str, timeout: float) -> bool:
+        return await self.remote._acquire_refresh_lock(key, timeout)
+
+    async def _release_refresh_lock(self, key: str):
+        await self.remote._release_refresh_lock(key)
+
+    def _local_ttl(self, ttl: Optional[int]) -> int:
+        return min(ttl, self.local_ttl) if ttl else self.local_ttl
+
+    # ========================================
+    # CORE METHODS (MUST IMPLEMENT)
+    # ========================================
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        memory first, then redis (filling memory on a redis hit)
+        """
+        await self.start()
+        value = await self.local.get(key)
+        if value is not None:
+            return value
+
+        value = await self.remote.get(key)
+        if value is not None:
+            await self.local.set(key, value, ttl=self.local_ttl)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
+        if not await self.remote.set(key, value, ttl=ttl):
+            return False
+        await self.local.set(key, value, ttl=self._local_ttl(ttl))
+        await self._publish({"keys": [key]})
+        return True
+
+    async def delete(self, key: str) -> bool:
+        await self.local.delete(key)
+        deleted = await self.remote.delete(key)
+        await self._publish({"keys": [key]})
+        return deleted
+
+    async def exists(self, key: str) -> bool:
+        return await self.local.exists(key) or await self.remote.exists(key)
+
+    async def clear_pattern(
+        self,
+        pattern: str,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[int, int], Any]] = None,
+        max_keys_per_second: Optional[int] = None,
+        use_lua: bool = False,
+    ) -> int:
+        await self.local.clear_pattern(pattern)
+        deleted = await self.remote.clear_pattern(
+            pattern,
+            batch_size=batch_size,
+            progress_callback=progress_callback,
+            max_keys_per_second=max_keys_per_second,
+            use_lua=use_lua,
+        )
+        await self._publish({"pattern": pattern})
+        return deleted
+
+    async def get_multiple(self, keys: List[str]) -> Dict[str, Any]:
+        await self.start()
+        result = await self.local.get_multiple(keys)
+        missing = [key for key in keys if key not in result]
+        if missing:
+            remote_values = await self.remote.get_multiple(missing)
+            for key, value in remote_values.items():
+                await self.local.set(key, value, ttl=self.local_ttl)
+            result.update(remote_values)
+        return result
+
+    # ========================================
+    # TAG BASED INVALIDATION
+    # ========================================
+
+    async def set_with_tags(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        if not await self.remote.set_with_tags(key, value, ttl=ttl, tags=tags):
+            return False
+        await self.local.set_with_tags(key, value, ttl=self._local_ttl(ttl), tags=tags)
+        await self._publish({"keys": [key]})
+        return True
+
+    async def invalidate_tags(self, tags: List[str]) -> int:
+        """
+        the keys behind the tags are published too: other workers may hold
+        read-through copies that never saw the tags
+        """
+        keys = await self.remote.tagged_keys(tags)
+        deleted = await self.remote.invalidate_tags(tags)
+        await self.local.invalidate_tags(tags)
+        for key in keys:
+            await self.local.delete(key)
+        await self._publish({"keys": keys, "tags": list(tags)})
+        return deleted
+
+    # ========================================
+    # PUB/SUB INVALIDATION
+    # ========================================
+
+    async def start(self):
+        """
+        start the invalidation listener (idempotent, called lazily on first read)
+        """
+        if self._listener is not None and not self._listener.done():
+            return
+        if redis_config.is_cluster:
+            # no cluster-wide pub/sub on the async cluster client, local ttl bounds staleness
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _publish(self, message: Dict[str, Any]):
+        if message.get("keys") == []:
+            message.pop("keys")
+        if not message:
+            return
+        try:
+            client = await self.remote._get_client()
+            if client and not redis_config.is_cluster:
+                await client.publish(self.channel, json.dumps({"origin": self._origin, **message}))
+        except Exception as e:
+            logger.warning(f"cache invalidation publish failed: {e}")
+
+    async def _listen(self):
+        """
+        apply invalidation messages from other workers, reconnecting on errors
+        """
+        while True:
+            pubsub = None
+            try:
+                client = await self.remote._get_client()
+                if not client:
+                    await asyncio.sleep(5)
+                    continue
+
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(self.channel)
+                logger.info(f"listening for cache invalidations on {self.channel}")
+
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        await self._apply(message.get("data"))
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"cache invalidation listener error, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                if pubsub is not None:
+                    try:
+                        close = getattr(pubsub, "aclose", None) or pubsub.close
+                        await close()
+                    except Exception:
+                        pass
+
+    async def _apply(self, data: Any):
+        try:
+            message = json.loads(data)
+        except (TypeError, ValueError):
+            return
+        if message.get("origin") == self._origin:
+            return
+
+        for key in message.get("keys", []):
+            await self.local.delete(key)
+        if message.get("tags"):
+            await self.local.invalidate_tags(message["tags"])
+        if message.get("pattern"):
+            await self.local.clear_pattern(message["pattern"])
+
+    # ========================================
+    # STATS
+    # ========================================
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "memory": self.local.stats(),
+            "listening": self._listener is not None and not self._listener.done(),
+        }
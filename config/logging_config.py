@@ -1,7 +1,276 @@
+"""
+Process-wide logging setup, applied when anything is imported from config.
+
+Records are handed to a bounded queue by the calling thread and formatted /
+written by a listener thread, so a log call never blocks the event loop on
+stderr. On the way in, records are
+    - sampled per logger prefix (below WARNING only),
+    - stamped with the current trace / span id,
+    - redacted (tokens, secrets) and truncated to LOG_MAX_FIELD_CHARS.
+
+LOG_FORMAT=json writes one JSON object per line; extra= fields are kept as keys:
+    logger.debug("analyzer response", extra={"response": response, "chunk": i})
+"""
+
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import random
 import logging
+import logging.handlers
+from typing import Any, Dict, Optional
+
+__all__ = ["logging_config", "setup_logging", "shutdown_logging", "truncate", "redact"]
+
+
+class LoggingConfig:
+    """
+    Configuration class for logging
+    """
+
+    def __init__(self):
+        self.level = os.getenv("LOG_LEVEL", "INFO").upper()
+        self.format = os.getenv("LOG_FORMAT", "text").strip().lower()              # text | json
+        self.max_field_chars = int(os.getenv("LOG_MAX_FIELD_CHARS", 2000))         # longer messages / fields are truncated
+        self.queue_size = int(os.getenv("LOG_QUEUE_SIZE", 10000))                  # records dropped when the writer falls behind
+        self.sample_rates = self._parse_rates(os.getenv("LOG_SAMPLE_RATES", ""))   # "agents=0.1,services.embedding_service=0.5"
+        self.redact_keys = [
+            key.strip().lower()
+            for key in os.getenv("LOG_REDACT_KEYS", "authorization,access_token,client_secret,password,api_key").split(",")
+            if key.strip()
+        ]
+
+    @staticmethod
+    def _parse_rates(raw: str) -> Dict[str, float]:
+        rates = {}
+        for pair in raw.split(","):
+            if "=" in pair:
+                name, rate = pair.split("=", 1)
+                try:
+                    rates[name.strip()] = min(1.0, max(0.0, float(rate)))
+                except ValueError:
+                    continue
+        return rates
+
+
+logging_config = LoggingConfig()
+
+# attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_BEARER_PATTERN = re.compile(r"(Bearer\s+)[A-Za-z0-9\-._~+/]+=*", re.IGNORECASE)
+
+
+def truncate(value: Any, limit: Optional[int] = None) -> Any:
+    """
+    shorten long strings (and the repr of large containers) for logging
+    """
+    limit = logging_config.max_field_chars if limit is None else limit
+    if not isinstance(value, (str, int, float, bool, type(None))):
+        value = repr(value)
+    if isinstance(value, str) and len(value) > limit:
+        return f"{value[:limit]}...[truncated {len(value) - limit} chars]"
+    return value
+
+
+def _secret_pattern(keys):
+    if not keys:
+        return None
+    names = "|".join(re.escape(key) for key in keys)
+    # key=value, key: value, "key": "value"
+    return re.compile(rf"""(["']?(?:{names})["']?\s*[:=]\s*["']?(?:Bearer\s+)?)[^\s"',&}}]+""", re.IGNORECASE)
+
+
+_SECRET_PATTERN = _secret_pattern(logging_config.redact_keys)
+
+
+def redact(text: str) -> str:
+    """
+    mask bearer tokens and secret-looking key/value pairs
+    """
+    text = _BEARER_PATTERN.sub(r"\1[REDACTED]", text)
+    if _SECRET_PATTERN is not None:
+        text = _SECRET_PATTERN.sub(r"\1[REDACTED]", text)
+    return text
+
+
+# ========================================
+# FILTERS (run in the calling thread)
+# ========================================
+
+class SamplingFilter(logging.Filter):
+    """
+    keep a fraction of DEBUG/INFO records per logger prefix (longest prefix wins);
+    warnings and errors are always kept
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # longest prefix first
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class TraceContextFilter(logging.Filter):
+    """
+    stamp records with the current trace / span id (the writer thread has no span context)
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        tracing = sys.modules.get("utils.tracing")
+        span = tracing.current_span() if tracing else None
+        record.trace_id = span.trace_id if span else None
+        record.span_id = span.span_id if span else None
+        return True
+
+
+class RedactionFilter(logging.Filter):
+    """
+    render the message now, then redact and truncate it and any extra= fields
+    """
+
+    def __init__(self, max_chars: int):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        try:
+            message = record.getMessage()
+        except Exception:
+            message = str(record.msg)
+        record.msg = truncate(redact(message), self.max_chars)
+        record.args = None
+
+        for key, value in list(vars(record).items()):
+            if key in _RECORD_ATTRIBUTES or key in ("trace_id", "span_id"):
+                continue
+            if key.lower() in logging_config.redact_keys:
+                setattr(record, key, "[REDACTED]")
+            elif isinstance(value, str):
+                setattr(record, key, truncate(redact(value), self.max_chars))
+            elif not isinstance(value, (int, float, bool, type(None))):
+                setattr(record, key, truncate(value, self.max_chars))
+        return True
+
+
+# ========================================
+# FORMATTERS (run in the writer thread)
+# ========================================
+
+class JsonFormatter(logging.Formatter):
+    """
+    one JSON object per record
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "trace_id", None):
+            payload["trace_id"] = record.trace_id
+            payload["span_id"] = record.span_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in payload and key not in ("trace_id", "span_id"):
+                payload[key] = value
+        if record.exc_text:
+            payload["exception"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+# ========================================
+# QUEUE HANDLER
+# ========================================
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    non-blocking queue handler; counts records dropped when the queue is full
+    instead of blocking the caller or printing tracebacks
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # message and args are already rendered by RedactionFilter; keep the traceback as text
+        if record.exc_info:
+            record.exc_text = truncate(
+                logging.Formatter().formatException(record.exc_info), logging_config.max_field_chars * 5
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(config: LoggingConfig = logging_config) -> DroppingQueueHandler:
+    """
+    route the root logger through the queue handler (idempotent)
+    """
+    global _listener
+
+    root = logging.getLogger()
+    for handler in root.handlers:
+        if isinstance(handler, DroppingQueueHandler):
+            return handler
+
+    stream_handler = logging.StreamHandler()  # stderr, stdout stays free for stdio transports (mcp)
+    if config.format == "json":
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(logging.Formatter(TEXT_FORMAT, datefmt="%Y-%m-%d %H:%M:%S"))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=config.queue_size))
+    queue_handler.addFilter(SamplingFilter(config.sample_rates))
+    queue_handler.addFilter(TraceContextFilter())
+    queue_handler.addFilter(RedactionFilter(config.max_field_chars))
+
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return queue_handler
+
+
+def shutdown_logging():
+    """
+    write out queued records and stop the writer thread
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+setup_logging()
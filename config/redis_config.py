@@ -1,14 +1,31 @@
 import os
+import asyncio
+import threading
 import redis
 import redis.asyncio as aioredis
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from . import *
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+
+def _parse_hosts(value: str, default_port: int) -> List[Tuple[str, int]]:
+    """
+    "host1:6379,host2" -> [("host1", 6379), ("host2", default_port)]
+    """
+    hosts = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.rpartition(":") if ":" in item else (item, "", "")
+        hosts.append((host, int(port) if port else default_port))
+    return hosts
+
+
 class RedisConfig:
     """
     Configuration class for Redis settings
@@ -27,105 +44,286 @@ class RedisConfig:
         self.socket_timeout = int(os.getenv("REDIS_SOCKET_TIMEOUT", 5)) # how long to wait for response
         self.socket_connect_timeout = int(os.getenv("REDIS_SOCKET_CONNECT_TIMEOUT", 5)) # connection timeout
 
-        self.retry_on_timeout = True # retry if redis doesn't respond
+        self.retry_on_timeout = os.getenv("REDIS_RETRY_ON_TIMEOUT", "true").lower() in ("1", "true", "yes", "on") # retry if redis doesn't respond
         self.decode_responses = True # convert redis bytes to strings automatically
+        self.health_check_interval = int(os.getenv("REDIS_HEALTH_CHECK_INTERVAL", 30)) # ping idle connections before reuse (0 = off)
+
+        # deployment mode: standalone | cluster | sentinel
+        self.mode = os.getenv("REDIS_MODE", "standalone").lower()
+        self.cluster_nodes = _parse_hosts(os.getenv("REDIS_CLUSTER_NODES", ""), self.port)           # "host1:6379,host2:6379", defaults to host:port
+        self.sentinel_hosts = _parse_hosts(os.getenv("REDIS_SENTINEL_HOSTS", ""), 26379)             # "host1:26379,host2:26379"
+        self.sentinel_master = os.getenv("REDIS_SENTINEL_MASTER", "mymaster")
+        self.sentinel_password = os.getenv("REDIS_SENTINEL_PASSWORD") or None
 
         # cache expiration times
         self.embedding_ttl = int(os.getenv("CACHE_EMBEDDING_TTL", 3600))     # 1 hour
         self.search_ttl = int(os.getenv("CACHE_SEARCH_TTL", 1800))           # 30 minutes
-        self.llm_response_ttl = int(os.getenv("CACHE_LLM_TTL", 7200))        # 2 hours
+        self.llm_response_ttl = int(os.getenv("CACHE_LLM_TTL", 7 * 86400))  # 7 days, temperature-0 answers keyed on model + request
         self.triplets_ttl = int(os.getenv("CACHE_TRIPLETS_TTL", 3600))       # 1 hour
+        self.rag_response_ttl = int(os.getenv("CACHE_RAG_RESPONSE_TTL", 86400)) # 24 hours, evicted early by document invalidation
+        self.rag_response_stale_ttl = int(os.getenv("CACHE_RAG_STALE_TTL", 3600))  # grace window: stale answers served while one refresh runs
+        self.xfetch_beta = float(os.getenv("CACHE_XFETCH_BETA", 1.0))              # >1 refreshes earlier, 0 disables early refresh
+
+        # pattern invalidation (clear_pattern)
+        self.clear_batch_size = int(os.getenv("REDIS_CLEAR_BATCH_SIZE", 500))                   # keys per SCAN page / UNLINK pipeline
+        self.clear_max_keys_per_second = int(os.getenv("REDIS_CLEAR_MAX_KEYS_PER_SECOND", 0))   # 0 = no rate limit
+
+        # in-process memory tier in front of redis (TieredCache)
+        self.memory_cache_enabled = os.getenv("MEMORY_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.memory_cache_max_entries = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", 10000))
+        self.memory_cache_max_bytes = int(os.getenv("MEMORY_CACHE_MAX_BYTES", 64 * 1024 * 1024))  # 64 MB per worker
+        self.memory_cache_ttl = int(os.getenv("MEMORY_CACHE_TTL", 300))                          # local copies expire before redis ones
+        self.invalidation_channel = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache:invalidate")  # pub/sub channel keeping workers coherent
+
+        # request coalescing (single-flight) locks
+        self.lock_timeout = float(os.getenv("REDIS_LOCK_TIMEOUT", 60))           # lock auto-expires if the holder dies
+        self.lock_wait_timeout = float(os.getenv("REDIS_LOCK_WAIT_TIMEOUT", 30))  # how long waiters poll for the holder's result
+
+        # semantic answer cache (lookup by query embedding similarity)
+        self.semantic_cache_enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+        self.semantic_cache_threshold = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.95))   # min cosine similarity for a hit
+        self.semantic_cache_max_entries = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 2000)) # size of the vector index
+        self.semantic_cache_ttl = int(os.getenv("SEMANTIC_CACHE_TTL", 86400))                # 24 hours, evicted early by document invalidation
+        self.semantic_cache_refresh_interval = float(os.getenv("SEMANTIC_CACHE_REFRESH_INTERVAL", 30))  # seconds between index syncs
+
+
+    @property
+    def is_cluster(self) -> bool:
+        return self.mode == "cluster"
+
+    @property
+    def is_sentinel(self) -> bool:
+        return self.mode == "sentinel"
+
+    def connection_kwargs(self) -> Dict[str, Any]:
+        """
+        per-connection settings shared by every mode and by sync/async clients
+        """
+        kwargs = {
+            'socket_timeout': self.socket_timeout,
+            'socket_connect_timeout': self.socket_connect_timeout,
+            'retry_on_timeout': self.retry_on_timeout,
+            'health_check_interval': self.health_check_interval,
+            'decode_responses': self.decode_responses,
+        }
+        # Only add password if it's set
+        if self.password:
+            kwargs['password'] = self.password
+        return kwargs
 
 
 # global instance of the config
 redis_config = RedisConfig()
 
+
+def hash_tag(name: str) -> str:
+    """
+    wrap a key prefix in a cluster hash tag ("{name}") so every key sharing it maps
+    to the same slot - needed for multi-key commands (MGET, scripts) on a namespace
+    no-op outside cluster mode
+    """
+    return f"{{{name}}}" if redis_config.is_cluster else name
+
+
+# shared clients: one pool per process (per mode), created lazily
+_sync_client = None
+_sync_client_lock = threading.Lock()
+_async_client = None
+_async_client_lock = asyncio.Lock()
+
+def _build_sync_client():
+    config = redis_config
+    if config.is_cluster:
+        from redis.cluster import RedisCluster, ClusterNode
+        nodes = config.cluster_nodes or [(config.host, config.port)]
+        # the cluster client retries on its own (redirections, failover), it takes no retry_on_timeout
+        kwargs = config.connection_kwargs()
+        kwargs.pop('retry_on_timeout')
+        return RedisCluster(
+            startup_nodes=[ClusterNode(host, port) for host, port in nodes],
+            max_connections=config.max_connections,
+            **kwargs,
+        )
+
+    if config.is_sentinel:
+        from redis.sentinel import Sentinel
+        sentinel = Sentinel(
+            config.sentinel_hosts,
+            sentinel_kwargs={'password': config.sentinel_password} if config.sentinel_password else None,
+            socket_timeout=config.socket_timeout,
+        )
+        return sentinel.master_for(
+            config.sentinel_master,
+            db=config.db,
+            max_connections=config.max_connections,
+            **config.connection_kwargs(),
+        )
+
+    pool = redis.ConnectionPool(
+        host=config.host,
+        port=config.port,
+        db=config.db,
+        max_connections=config.max_connections,
+        **config.connection_kwargs(),
+    )
+    # creating redis client using the pool
+    return redis.Redis(connection_pool=pool)
+
+
+def _build_async_client():
+    config = redis_config
+    if config.is_cluster:
+        from redis.asyncio.cluster import RedisCluster, ClusterNode
+        nodes = config.cluster_nodes or [(config.host, config.port)]
+        # the cluster client retries on its own (redirections, failover), it takes no retry_on_timeout
+        kwargs = config.connection_kwargs()
+        kwargs.pop('retry_on_timeout')
+        return RedisCluster(
+            startup_nodes=[ClusterNode(host, port) for host, port in nodes],
+            max_connections=config.max_connections,
+            **kwargs,
+        )
+
+    if config.is_sentinel:
+        from redis.asyncio.sentinel import Sentinel
+        sentinel = Sentinel(
+            config.sentinel_hosts,
+            sentinel_kwargs={'password': config.sentinel_password} if config.sentinel_password else None,
+            socket_timeout=config.socket_timeout,
+        )
+        # the sentinel pool re-resolves the master on connection errors (failover)
+        return sentinel.master_for(
+            config.sentinel_master,
+            db=config.db,
+            max_connections=config.max_connections,
+            **config.connection_kwargs(),
+        )
+
+    pool = aioredis.ConnectionPool(
+        host=config.host,
+        port=config.port,
+        db=config.db,
+        max_connections=config.max_connections,
+        **config.connection_kwargs(),
+    )
+    return aioredis.Redis(connection_pool=pool)
+
+
 def get_redis_connection() -> Optional[redis.Redis]:
     """
-    creates a synchronous Redis connection
+    shared synchronous Redis client (one pool per process)
     returns:
         - Redis client or None of connection fails
     """
-    try:
-        logger.info(f"Connecting to Redis at {redis_config.host}:{redis_config.port}, DB: {redis_config.db}")
-        pool_kwargs = {
-            'host': redis_config.host,
-            'port': redis_config.port,
-            'db': redis_config.db,
-            'max_connections': redis_config.max_connections,
-            'socket_timeout': redis_config.socket_timeout,
-            'socket_connect_timeout': redis_config.socket_connect_timeout,
-            'retry_on_timeout': redis_config.retry_on_timeout,
-            'decode_responses': redis_config.decode_responses
-        }
+    global _sync_client
+    if _sync_client is not None:
+        return _sync_client
 
-        # Only add password if it's set
-        if redis_config.password:
-            pool_kwargs['password'] = redis_config.password
-            logger.info("Using Redis password authentication")
-        else:
-            logger.info("Connecting to Redis without password")
-        
-        pool = redis.ConnectionPool(**pool_kwargs)
-        # creating redis client using the pool
-        redis_client = redis.Redis(connection_pool=pool)
+    with _sync_client_lock:
+        if _sync_client is not None:
+            return _sync_client
+        try:
+            logger.info(f"Connecting to Redis ({redis_config.mode}) at {redis_config.host}:{redis_config.port}, DB: {redis_config.db}")
+            client = _build_sync_client()
 
-        # testing the connection
-        redis_client.ping()
-        logger.info("Successfully connected to Redis!")
+            # testing the connection
+            client.ping()
+            logger.info("Successfully connected to Redis!")
 
-        return redis_client
-    
-    except redis.ConnectionError as e:
-        logger.error(f"Failed to connect to Redis: {e}")
-        logger.info("Please ensure that the Redis server is running and accessible.")
-        return None
-    
-    except Exception as e:
-        logger.error(f"Unexpected error connecting to Redis: {e}")
-        return None
+            _sync_client = client
+            return _sync_client
+
+        except redis.ConnectionError as e:
+            logger.error(f"Failed to connect to Redis: {e}")
+            logger.info("Please ensure that the Redis server is running and accessible.")
+            return None
+
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to Redis: {e}")
+            return None
     
 
 async def get_async_redis_connection() -> Optional[aioredis.Redis]:
     """
-    creates an asynchronous Redis connection
+    shared asynchronous Redis client (one pool per process, sized by max_connections)
+    standalone, cluster or sentinel depending on REDIS_MODE
     returns:
         - async redis client or None if connection fails
     """
+    global _async_client
+    if _async_client is not None:
+        return _async_client
 
-    try:
-        logger.info(f"Connecting to Async Redis at {redis_config.host}:{redis_config.port}, DB: {redis_config.db}")
-
-        redis_kwargs = {
-            'host': redis_config.host,
-            'port': redis_config.port,
-            'db': redis_config.db,
-            'socket_timeout': redis_config.socket_timeout,
-            'socket_connect_timeout': redis_config.socket_connect_timeout,
-            'decode_responses': redis_config.decode_responses
-        }
-        
-        # Only add password if it exists
-        if redis_config.password:
-            redis_kwargs['password'] = redis_config.password
-            logger.info("Using async Redis password authentication")
-        else:
-            logger.info("Connecting to async Redis without password")
-        redis_client = aioredis.Redis(**redis_kwargs)
+    async with _async_client_lock:
+        if _async_client is not None:
+            return _async_client
+        try:
+            logger.info(f"Connecting to Async Redis ({redis_config.mode}) at {redis_config.host}:{redis_config.port}, DB: {redis_config.db}")
+            client = _build_async_client()
 
-        # testing connection
-        await redis_client.ping()
-        logger.info("Successfully connected to Async Redis!")
-        return redis_client
-    
-    except aioredis.ConnectionError as e:
-        logger.error(f"Failed to connect to Async Redis: {e}")
-        logger.info("Please ensure that the Redis server is running and accessible.")
-        return None
+            # testing connection
+            await client.ping()
+            logger.info("Successfully connected to Async Redis!")
+
+            _async_client = client
+            return _async_client
+
+        except aioredis.ConnectionError as e:
+            logger.error(f"Failed to connect to Async Redis: {e}")
+            logger.info("Please ensure that the Redis server is running and accessible.")
+            return None
+
+        except Exception as e:
+            logger.error(f"Unexpected error connecting to Async Redis: {e}")
+            return None
 
+
+async def close_async_redis_connection():
+    """
+    close the shared async client and its pool (application shutdown)
+    """
+    global _async_client
+    async with _async_client_lock:
+        if _async_client is not None:
+            close = getattr(_async_client, "aclose", None) or _async_client.close
+            await close()
+            _async_client = None
+            logger.info("Async Redis connection pool closed")
+
+
+def _pool_stats(pool) -> Dict[str, Any]:
+    return {
+        "max_connections": getattr(pool, "max_connections", None),
+        "created_connections": getattr(pool, "_created_connections", None),
+        "available_connections": len(getattr(pool, "_available_connections", []) or []),
+        "in_use_connections": len(getattr(pool, "_in_use_connections", []) or []),
+    }
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    connection usage of the shared async client
+    returns:
+        - {"mode", "connected", "pools": {name: {max/created/available/in_use connections}}}
+    """
+    stats = {"mode": redis_config.mode, "connected": _async_client is not None, "pools": {}}
+    if _async_client is None:
+        return stats
+
+    try:
+        if redis_config.is_cluster:
+            for node in _async_client.get_nodes():
+                stats["pools"][node.name] = {
+                    "max_connections": getattr(node, "max_connections", None),
+                    "created_connections": len(getattr(node, "_connections", []) or []),
+                    "available_connections": len(getattr(node, "_free", []) or []),
+                }
+        else:
+            stats["pools"]["default"] = _pool_stats(_async_client.connection_pool)
     except Exception as e:
-        logger.error(f"Unexpected error connecting to Async Redis: {e}")
-        return None
+        logger.warning(f"Could not collect Redis pool stats: {e}")
+    return stats
+
 
 def test_redis_connection() -> bool:
     """
@@ -181,9 +379,6 @@ async def test_async_redis_connection() -> bool:
         value = await client.get("async_test_key")
         await client.delete("async_test_key")
 
-        # Close the connection
-        await client.close()
-        
         if value == "async_test_value":
             logger.info("Async Redis test successful!")
             return True
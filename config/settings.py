@@ -0,0 +1,253 @@
+import os
+import logging
+from dotenv import load_dotenv
+from . import *
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """
+    read a boolean flag from the environment ("1", "true", "yes", "on" are truthy)
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+class HanaConfig:
+    """
+    Configuration class for SAP HANA settings
+    """
+
+    def __init__(self):
+
+        # schema management
+        self.run_migrations_on_startup = _env_bool("HANA_RUN_MIGRATIONS_ON_STARTUP", True) # apply pending migrations when the app boots
+        self.skip_schema_checks = _env_bool("HANA_SKIP_SCHEMA_CHECKS", False) # insert paths trust the schema completely
+
+
+class RetrievalConfig:
+    """
+    Configuration class for RAG retrieval settings
+    """
+
+    def __init__(self):
+
+        # knowledge graph expansion
+        self.graph_hops = int(os.getenv("GRAPH_EXPANSION_HOPS", 1))                 # entity hops beyond the retrieved chunks
+        self.graph_seed_limit = int(os.getenv("GRAPH_SEED_LIMIT", 200))             # triplets taken from the retrieved chunks
+        self.graph_hop_limit = int(os.getenv("GRAPH_HOP_LIMIT", 50))                # triplets added per hop
+        self.graph_keyword_limit = int(os.getenv("GRAPH_KEYWORD_LIMIT", 50))        # triplets matched by query keywords
+        self.graph_max_triplets = int(os.getenv("GRAPH_MAX_TRIPLETS", 300))         # cap on the combined result
+
+        # keyword (full-text) search
+        self.keyword_candidate_limit = int(os.getenv("KEYWORD_CANDIDATE_LIMIT", 200))  # rows fetched from the full-text index before BM25 re-ranking
+
+        # hybrid retrieval
+        self.hybrid_enabled = _env_bool("HYBRID_RETRIEVAL_ENABLED", True)           # run the lexical leg next to vector search
+        self.hybrid_leg_multiplier = int(os.getenv("HYBRID_LEG_MULTIPLIER", 3))     # each leg fetches top_k * multiplier before fusion
+        self.rrf_k = int(os.getenv("HYBRID_RRF_K", 60))                             # reciprocal rank fusion damping constant
+
+        # prompt context budgeting
+        self.context_max_tokens = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", 3000))    # hard cap on retrieved context per prompt
+        self.context_triplet_share = float(os.getenv("RAG_CONTEXT_TRIPLET_SHARE", 0.25))  # budget slice reserved for graph facts
+
+
+class LLMConfig:
+    """
+    Configuration class for the chat completion model
+    """
+
+    def __init__(self):
+        self.model_name = os.getenv("LLM_MODEL_NAME", "gpt-4o")  # used for context window sizing
+        # response cache for deterministic (temperature 0) calls of the listed callers (usage caller tags)
+        self.cache_enabled = _env_bool("LLM_CACHE_ENABLED", True)
+        self.cache_callers = {
+            caller.strip()
+            for caller in os.getenv(
+                "LLM_CACHE_CALLERS",
+                "analyzer,cleaner,validator,json_repair,triplets,pl_extractor,balance_sheet,cash_flow,"
+                "extract_pl_data,extract_balance_sheet_data,extract_cash_flow_data",
+            ).split(",")
+            if caller.strip()
+        }
+        # answer structured calls under a JSON schema (response_format json_schema); off for
+        # deployments without structured outputs, which then get JSON mode plus the schema in the prompt
+        self.structured_outputs = _env_bool("LLM_STRUCTURED_OUTPUTS", True)
+
+
+class UsageConfig:
+    """
+    Configuration class for token usage / cost accounting
+    """
+
+    # USD per 1M tokens (prompt, completion); longest model prefix wins
+    DEFAULT_PRICES = {
+        "gpt-4o": (2.50, 10.00),
+        "gpt-4o-mini": (0.15, 0.60),
+        "gpt-4.1": (2.00, 8.00),
+        "gpt-4.1-mini": (0.40, 1.60),
+        "text-embedding-3-large": (0.13, 0.0),
+        "text-embedding-3-small": (0.02, 0.0),
+    }
+
+    def __init__(self):
+        self.prices = dict(self.DEFAULT_PRICES)
+        self.prices.update(self._parse_prices(os.getenv("LLM_PRICES", "")))   # "gpt-4o=2.5/10,my-model=1/2"
+        self.job_ttl = int(os.getenv("JOB_STATUS_TTL", 7 * 86400))              # seconds job status / usage is kept
+
+    @staticmethod
+    def _parse_prices(raw: str) -> dict:
+        prices = {}
+        for pair in raw.split(","):
+            if "=" not in pair:
+                continue
+            model, price = pair.split("=", 1)
+            prompt_price, _, completion_price = price.partition("/")
+            try:
+                prices[model.strip().lower()] = (float(prompt_price), float(completion_price or 0))
+            except ValueError:
+                logger.warning(f"Ignoring malformed LLM_PRICES entry: {pair}")
+        return prices
+
+
+class TracingConfig:
+    """
+    Configuration class for distributed tracing
+    """
+
+    def __init__(self):
+        self.enabled = _env_bool("TRACING_ENABLED", False)
+        self.exporter = os.getenv("TRACING_EXPORTER", "json").strip().lower()      # json | otlp
+        self.json_path = os.getenv("TRACING_JSON_PATH", "traces/spans.jsonl")      # json exporter output (JSON lines)
+        self.otlp_endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://localhost:4318")
+        self.otlp_headers = self._parse_headers(os.getenv("OTEL_EXPORTER_OTLP_HEADERS", ""))
+        self.service_name = os.getenv("OTEL_SERVICE_NAME", "ai-service")
+        self.sample_ratio = float(os.getenv("TRACING_SAMPLE_RATIO", 1.0))          # share of new traces recorded
+        self.batch_size = int(os.getenv("TRACING_BATCH_SIZE", 256))                # spans per export
+        self.flush_interval = float(os.getenv("TRACING_FLUSH_INTERVAL", 5.0))      # seconds between exports
+
+    @staticmethod
+    def _parse_headers(raw: str) -> dict:
+        """
+        "key1=value1,key2=value2" (OTEL_EXPORTER_OTLP_HEADERS format)
+        """
+        headers = {}
+        for pair in raw.split(","):
+            if "=" in pair:
+                key, value = pair.split("=", 1)
+                headers[key.strip()] = value.strip()
+        return headers
+
+
+class ResilienceConfig:
+    """
+    Configuration class for client-side rate limiting / retries of AI Core calls
+    """
+
+    def __init__(self):
+        # requests per second per endpoint ("chat=5,embedding=20"); 0 or missing = no rate cap
+        self.rates = self._parse_rates(os.getenv("UPSTREAM_RATE_LIMITS", ""))
+        self.burst_seconds = float(os.getenv("UPSTREAM_BURST_SECONDS", 2.0))         # bucket holds this many seconds of rate
+        self.initial_concurrency = int(os.getenv("UPSTREAM_INITIAL_CONCURRENCY", 8))
+        self.min_concurrency = int(os.getenv("UPSTREAM_MIN_CONCURRENCY", 1))
+        self.max_concurrency = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", 64))
+        self.retry_max_attempts = int(os.getenv("RETRY_MAX_ATTEMPTS", 4))            # attempts per call, first one included
+        self.retry_base_delay = float(os.getenv("RETRY_BASE_DELAY", 0.5))            # seconds, doubled per attempt (full jitter)
+        self.retry_max_delay = float(os.getenv("RETRY_MAX_DELAY", 20.0))
+        self.retry_budget_ratio = float(os.getenv("RETRY_BUDGET_RATIO", 0.2))        # retries allowed per call made
+        self.breaker_failure_threshold = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # consecutive failures to open
+        self.breaker_recovery_timeout = float(os.getenv("CIRCUIT_RECOVERY_TIMEOUT", 30.0))  # seconds before a probe
+
+    def rate_for(self, endpoint: str) -> float:
+        """
+        endpoint rate, falling back to its capability ("chat:<deployment>" -> "chat") and "default"
+        """
+        for key in (endpoint, endpoint.split(":", 1)[0], "default"):
+            if key in self.rates:
+                return self.rates[key]
+        return 0.0
+
+    def burst_for(self, endpoint: str) -> float:
+        return max(1.0, self.rate_for(endpoint) * self.burst_seconds)
+
+    @staticmethod
+    def _parse_rates(raw: str) -> dict:
+        rates = {}
+        for pair in raw.split(","):
+            if "=" not in pair:
+                continue
+            endpoint, rate = pair.split("=", 1)
+            try:
+                rates[endpoint.strip()] = float(rate)
+            except ValueError:
+                logger.warning(f"Ignoring malformed UPSTREAM_RATE_LIMITS entry: {pair}")
+        return rates
+
+
+class RoutingConfig:
+    """
+    Configuration class for AI Core deployments and model routing
+    """
+
+    # "<deployment_id>@<resource_group>=<model>" per deployment, comma separated
+    DEFAULT_DEPLOYMENTS = {
+        "chat": "d5903e0d176ce0e4@demo=gpt-4o",
+        "embedding": "d15fa1e81295297d@genai=text-embedding-3-large",
+    }
+
+    def __init__(self):
+        self.api_url = os.getenv(
+            "AI_API_URL", "https://api.ai.prod.eu-central-1.aws.ml.hana.ondemand.com"
+        ).rstrip("/")
+        self.resource_group = os.getenv("AI_RESOURCE_GROUP", "demo")                  # when a deployment names none
+        self.api_versions = {
+            "chat": os.getenv("CHAT_API_VERSION", "2024-10-21"),                   # >= 2024-08-01-preview for JSON schemas
+            "embedding": os.getenv("EMBEDDING_API_VERSION", "2024-06-01"),
+        }
+        self.deployments = {
+            "chat": self._parse_deployments(os.getenv("LLM_DEPLOYMENTS", self.DEFAULT_DEPLOYMENTS["chat"])),
+            "embedding": self._parse_deployments(os.getenv("EMBEDDING_DEPLOYMENTS", self.DEFAULT_DEPLOYMENTS["embedding"])),
+        }
+        self.ewma_alpha = float(os.getenv("ROUTING_EWMA_ALPHA", 0.2))                 # weight of the latest latency / error sample
+        self.error_penalty = float(os.getenv("ROUTING_ERROR_PENALTY", 10.0))          # score = latency * (1 + penalty * error rate)
+        self.explore_ratio = float(os.getenv("ROUTING_EXPLORE_RATIO", 0.05))          # calls sent to a random deployment to refresh its stats
+        self.latency_window = int(os.getenv("ROUTING_LATENCY_WINDOW", 200))           # samples kept per deployment for p95
+        # capabilities that send a duplicate request when the first is slower than its p95 ("embedding,chat")
+        self.hedge_capabilities = {c.strip() for c in os.getenv("HEDGE_CAPABILITIES", "").split(",") if c.strip()}
+        self.hedge_quantile = float(os.getenv("HEDGE_QUANTILE", 0.95))
+        self.hedge_min_samples = int(os.getenv("HEDGE_MIN_SAMPLES", 20))              # no hedging before the p95 is known
+        self.hedge_min_delay = float(os.getenv("HEDGE_MIN_DELAY", 0.05))              # seconds
+        # shared http client (connection pool) for inference calls
+        self.http_pool_size = int(os.getenv("AI_HTTP_POOL_SIZE", 100))               # open connections per worker
+        self.http_keepalive = float(os.getenv("AI_HTTP_KEEPALIVE", 30.0))             # seconds an idle connection is kept
+        self.http_timeout = float(os.getenv("AI_HTTP_TIMEOUT", 120.0))                # seconds per request, streams included
+        self.http_connect_timeout = float(os.getenv("AI_HTTP_CONNECT_TIMEOUT", 10.0))
+
+    def _parse_deployments(self, raw: str) -> list:
+        deployments = []
+        for entry in raw.split(","):
+            entry = entry.strip()
+            if not entry:
+                continue
+            target, _, model = entry.partition("=")
+            deployment_id, _, resource_group = target.partition("@")
+            deployments.append({
+                "deployment_id": deployment_id.strip(),
+                "resource_group": resource_group.strip() or self.resource_group,
+                "model": model.strip() or None,
+            })
+        return deployments
+
+
+# global instances of the config
+hana_config = HanaConfig()
+retrieval_config = RetrievalConfig()
+llm_config = LLMConfig()
+usage_config = UsageConfig()
+tracing_config = TracingConfig()
+resilience_config = ResilienceConfig()
+routing_config = RoutingConfig()
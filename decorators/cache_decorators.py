@@ -1,11 +1,173 @@
+import time
+import json
+import inspect
 import functools
 import logging
 import hashlib
-from typing import Optional, Callable, Any
-from ..cache.base_cache import BaseCache
+from typing import Optional, Callable, Any, Dict, List, Union
+from cache.base_cache import BaseCache
+from cache.single_flight import DistributedSingleFlight, SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# per-function counters: "module.qualname" -> {"hits", "misses", ...}
+_metrics: Dict[str, Dict[str, int]] = {}
+
+
+def cached(
+    ttl: Optional[int] = None,
+    key_prefix: Optional[str] = None,
+    key_builder: Optional[Callable[..., str]] = None,
+    cache: Optional[Union[BaseCache, Callable[[], BaseCache]]] = None,
+    condition: Optional[Callable[..., bool]] = None,
+    stale_ttl: int = 0,
+    negative_ttl: int = 0,
+    single_flight: bool = True,
+    distributed: bool = False,
+    tags: Optional[Callable[[Any], List[str]]] = None,
+    beta: float = 1.0,
+):
+    """
+    cache the result of an async function or method
+
+    usage:
+        @cached(ttl=3600, key_prefix="embedding", key_builder=lambda text: sha256(text))
+        async def get_embedding(self, text: str):
+            return await expensive_call(text)
+
+    args:
+        ttl: seconds a result is fresh
+        key_prefix: first part of the key; the function's qualified name always follows it,
+            so two functions called with the same arguments never share an entry
+        key_builder: called with the function arguments (without self), returns the
+            identifier part of the key; defaults to a stable hash of the bound arguments
+        cache: cache instance (or zero-arg callable returning one); methods default
+            to self.cache, functions to the shared cache service
+        condition: called with the function arguments, False bypasses the cache
+        stale_ttl: seconds a result may still be served after ttl while it is
+            refreshed in the background (stale-while-revalidate)
+        negative_ttl: seconds a None result is cached (0 = never)
+        single_flight: concurrent misses for the same key share one call
+        distributed: extend single_flight across workers with a redis lock on the key,
+            the workers that lose the race wait for the winner's cached result
+        tags: called with the result, returns invalidation tags (see invalidate_tags)
+        beta: probabilistic early refresh strength (see BaseCache.get_envelope, 0 = off)
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if not inspect.iscoroutinefunction(func):
+            raise TypeError(f"@cached only supports async functions, got {func.__qualname__}")
+
+        signature = inspect.signature(func)
+        is_method = next(iter(signature.parameters), None) in ("self", "cls")
+        name = f"{func.__module__}.{func.__qualname__}"
+        prefix = f"{key_prefix}:{func.__qualname__}" if key_prefix else func.__qualname__
+        flights = SingleFlight()
+        # per cache instance, a DistributedSingleFlight polls the cache it was built with
+        distributed_flights: Dict[BaseCache, DistributedSingleFlight] = {}
+        counters = _metrics.setdefault(
+            name,
+            {"hits": 0, "misses": 0, "stale_hits": 0, "negative_hits": 0, "refreshes": 0, "errors": 0},
+        )
+
+        def _resolve_cache(args: tuple) -> Optional[BaseCache]:
+            if cache is not None:
+                return cache() if callable(cache) and not isinstance(cache, BaseCache) else cache
+            if is_method and args:
+                return getattr(args[0], "cache", None)
+            from services.cache_service import cache_service
+            return cache_service.default
+
+        def _key(args: tuple, kwargs: dict) -> str:
+            call_args = args[1:] if is_method else args
+            if key_builder:
+                return f"{prefix}:{key_builder(*call_args, **kwargs)}"
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            if is_method:
+                arguments.pop(next(iter(signature.parameters)))
+            return make_cache_key(prefix, arguments)
+
+        async def _compute_and_store(store: BaseCache, key: str, args: tuple, kwargs: dict) -> Any:
+            started = time.perf_counter()
+            result = await func(*args, **kwargs)
+            await _store(store, key, result, time.perf_counter() - started)
+            return result
+
+        async def _store(store: BaseCache, key: str, result: Any, delta: float):
+            if result is None:
+                if negative_ttl:
+                    await store.set_envelope(key, None, ttl=negative_ttl)
+                return
+            await store.set_envelope(
+                key, result, ttl=ttl, delta=delta, stale_ttl=stale_ttl if ttl else 0, tags=_safe_tags(result)
+            )
+
+        def _safe_tags(result: Any) -> List[str]:
+            if not tags:
+                return []
+            try:
+                return list(tags(result) or [])
+            except Exception as e:
+                logger.warning(f"tag builder failed for {name}: {e}")
+                return []
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if condition is not None and not condition(*args, **kwargs):
+                logger.debug("condition for caching not met, executing without cache")
+                return await func(*args, **kwargs)
+
+            store = _resolve_cache(args)
+            if store is None:
+                logger.warning(f"no cache found for {name}, executing without cache")
+                return await func(*args, **kwargs)
+
+            try:
+                key = _key(args, kwargs)
+            except Exception as e:
+                counters["errors"] += 1
+                logger.warning(f"could not build cache key for {name}, executing without cache: {e}")
+                return await func(*args, **kwargs)
+
+            entry = await store.get_envelope(key, beta=beta)
+            if entry is not None:
+                if entry["value"] is None:
+                    counters["negative_hits"] += 1
+                    return None
+
+                if entry["refresh"]:
+                    if entry["stale"]:
+                        counters["stale_hits"] += 1
+                    else:
+                        counters["hits"] += 1
+                    # serving the cached value, one background call recomputes it
+                    if not flights.is_inflight(key) and store.refresh_in_background(
+                        key, lambda: flights.do(key, lambda: _compute_and_store(store, key, args, kwargs))
+                    ):
+                        counters["refreshes"] += 1
+                else:
+                    counters["hits"] += 1
+                logger.debug(f"cache hit for key: {key}")
+                return entry["value"]
+
+            counters["misses"] += 1
+            logger.debug(f"cache miss for key: {key}, calling function")
+            compute = lambda: _compute_and_store(store, key, args, kwargs)
+            if single_flight and distributed:
+                if store not in distributed_flights:
+                    distributed_flights[store] = DistributedSingleFlight(store)
+                return await distributed_flights[store].do(key, compute, result_key=key)
+            if single_flight:
+                return await flights.do(key, compute)
+            return await compute()
+
+        wrapper.cache_key = lambda *args, **kwargs: _key(args, kwargs)
+        return wrapper
+    return decorator
+
+
 def cache_result(ttl: Optional[int] = None, key_prefix: str = "cache"):
     """
     simple decorator to cache function results
@@ -14,55 +176,33 @@ def cache_result(ttl: Optional[int] = None, key_prefix: str = "cache"):
         @cache_result(ttl=3600, key_prefix="embedding")
         async def get_embedding(self, text: str):
             return expensive_computation(text)
-    
+
     args:
         ttl: time to live for the cache entry in seconds
         key_prefix: prefix to use for the cache key (e.g., "embedding", "search", "llm")
 
     """
-
-    def decorator(func: Callable) -> Callable:
-        @functools.wraps(func)
-        async def wrapper(self, *args, **kwargs):
-            # get the cache from self (assuming self.cache exists)
-            cache: BaseCache = getattr(self, "cache", None)
-            if not cache:
-                logger.warning(f"no cache found on {self.__class__.__name__}, executing without cache")
-                return await func(self, *args, **kwargs)
-            
-            # generating cache key from function arguments
-            cache_key = _make_cache_key(key_prefix, func.__name__, args, kwargs)
-
-            # trying to get from cache
-            cached_value = await cache.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"cache hit for key: {cache_key}")
-                return cached_value
-
-            # cache miss, calling the actual function
-            logger.debug(f"cache miss for key: {cache_key}, calling function")
-            result = await func(self, *args, **kwargs)
-
-            # storing the result in cache
-            if result is not None:
-                await cache.set(cache_key, result, ttl=ttl)
-            
-            return result
-        return wrapper
-    return decorator
+    return cached(ttl=ttl, key_prefix=key_prefix)
 
 
-def invalidate_cache_pattern(pattern: str):
+def invalidate_cache_pattern(
+    pattern: str,
+    batch_size: Optional[int] = None,
+    progress_callback: Optional[Callable[[int, int], Any]] = None,
+    max_keys_per_second: Optional[int] = None,
+    use_lua: bool = False,
+):
     """
     decorator to invalidate cache after function runs
-    
+
     usage:
         @invalidate_cache_pattern("embedding:*")
         async def update_embedding(self, text: str):
             # after this runs, all embedding keys are deleted
-    
+
     args:
         pattern: cache key pattern to delete (e.g., "embedding:*")
+        batch_size, progress_callback, max_keys_per_second, use_lua: passed to cache.clear_pattern
     """
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
@@ -73,76 +213,82 @@ def invalidate_cache_pattern(pattern: str):
             # then invalidating the cache
             cache: BaseCache = getattr(self, "cache", None)
             if cache:
-                deleted = await cache.clear_pattern(pattern)
+                deleted = await cache.clear_pattern(
+                    pattern,
+                    batch_size=batch_size,
+                    progress_callback=progress_callback,
+                    max_keys_per_second=max_keys_per_second,
+                    use_lua=use_lua,
+                )
                 logger.info(f"invalidated {deleted} cache entries matching pattern: {pattern}")
-            
+
             return result
         return wrapper
     return decorator
 
-def cache_if(condition: Callable[[Any], bool], ttl: Optional[int] = None, key_prefix: str = "cache"):
+def cache_if(condition: Callable[..., bool], ttl: Optional[int] = None, key_prefix: str = "cache"):
     """
     cache result only if condition is met
-    
+
     usage:
         @cache_if(lambda self, text: len(text) > 10, ttl=3600, key_prefix="embedding")
         async def get_embedding(self, text: str):
             # only caches if length of text > 10
             return expensive_computation(text)
-    
+
     args:
         condition: function that takes same args as decorated function and returns bool
         ttl: time to live for the cache entry in seconds
         key_prefix: prefix to use for the cache key (e.g., "embedding", "search", "llm")
 
     """
+    return cached(ttl=ttl, key_prefix=key_prefix, condition=condition)
 
-    def decorator(func: Callable) -> Callable:
-        @functools.wraps(func)
-        async def wrapper(self, *args, **kwargs):
-            # evaluating the condition
-            should_cache = condition(self, *args, **kwargs)
-            if not should_cache:
-                logger.debug("condition for caching not met, executing without cache")
-                return await func(self, *args, **kwargs)
-            
-            # usinf cache
-            cache: BaseCache = getattr(self, "cache", None)
-            if not cache:
-                logger.warning(f"no cache found on {self.__class__.__name__}, executing without cache")
-                return await func(self, *args, **kwargs)
-            
-            cache_key = _make_cache_key(key_prefix, func.__name__, args, kwargs)
-
-            # tring to cache
-            cached_value = await cache.get(cache_key)
-            if cached_value is not None:
-                logger.debug(f"cache hit for key: {cache_key}")
-                return cached_value
-            
-            # execute and cache
-            result = await func(self, *args, **kwargs)
-            if result is not None:
-                await cache.set(cache_key, result, ttl=ttl)
 
-            return result
-        return wrapper
-    return decorator
+def get_cache_metrics() -> Dict[str, Dict[str, Any]]:
+    """
+    hit/miss counters of every decorated function, with hit rates
+    """
+    report = {}
+    for name, counters in _metrics.items():
+        served = counters["hits"] + counters["stale_hits"] + counters["negative_hits"]
+        lookups = served + counters["misses"]
+        report[name] = {**counters, "hit_rate": round(served / lookups, 4) if lookups else 0.0}
+    return report
+
 
-async def _make_cache_key(prefix: str, func_name: str, args: tuple, kwargs: dict) -> str:
+def make_cache_key(prefix: str, arguments: Any) -> str:
     """
-    create a unqiue cache key based on function name and arguments
+    create a unique, process-independent cache key from function arguments
 
     example:
-        prefix: "embedding", func="get_embedding", args=("some text",), kwargs={"model": "text-embedding-ada-002"}
-        returns: "embedding:get_embedding:5e884898da28047151d0e56f8dc6292773603d0d6aabbdd62a11ef721d1542d8"
+        prefix: "embedding:get_embedding", arguments={"text": "some text", "model": "text-embedding-3-large"}
+        returns: "embedding:get_embedding:3b1f0c6a9d2e8f47a1c0b5d6e7f8091a"
     """
+    canonical = json.dumps(_canonical(arguments), sort_keys=True, separators=(",", ":"))
+    args_hash = hashlib.sha256(canonical.encode()).hexdigest()[:32]
+    return f"{prefix}:{args_hash}"
 
-    # converting args and kwargs to a string representation
-    args_str = str(args) + str(sorted(kwargs.items()))
 
-    # hashing it
-    args_hash = hashlib.md5(args_str.encode()).hexdigest()[:16]
-
-    # building the key
-    return f"{prefix}:{func_name}:{args_hash}"
+def _canonical(value: Any) -> Any:
+    """
+    JSON-able form of an argument that is equal for equal values across processes
+    (no memory addresses, no set/dict ordering)
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, bytes):
+        return {"__bytes__": hashlib.sha256(value).hexdigest()}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted((_canonical(v) for v in value), key=lambda v: json.dumps(v, sort_keys=True))
+    if hasattr(value, "model_dump"):
+        return _canonical(value.model_dump())
+    if hasattr(value, "tolist"):
+        return _canonical(value.tolist())
+    if hasattr(value, "__dict__"):
+        return {"__type__": f"{type(value).__module__}.{type(value).__qualname__}", **_canonical(vars(value))}
+    return repr(value)
@@ -1,8 +1,8 @@
 import asyncio
-from fastmcp import FastMCP
+from fastmcp import FastMCP, Context
 from services.embedding_service import embedding_service
-from services.context_service import context_service
-from services.llm_service import llm_service
+from services.context_service import context_service, build_rag_prompt
+from services.llm_service import get_llm_response_async, stream_llm_response_async
 from repositories.hana_repository import search_similiar_documents
 import logging
 
@@ -12,6 +12,9 @@ logger = logging.getLogger(__name__)
 # creating mcp server instance
 mcp = FastMCP("AI-RAG-Service")
 
+# partial answer size sent per streaming notification
+STREAM_FLUSH_CHARS = 80
+
 @mcp.tool()
 async def search_documents(query: str, top_k: int =5) -> str:
     """
@@ -61,19 +64,48 @@ async def rag_chat(query: str, top_k: int = 3, temperature: float = 0.1) -> str:
         return "I couldn't find any relevant documents to answer your question."
     
     # Generate answer using LLM
-    prompt = f"""Based on the following context, answer the question:
-
-Context: 
-{context}
-
-Question: {query}
-
-Answer based only on the context provided:"""
+    prompt = build_rag_prompt(query, context)
     
-    answer = await llm_service.get_llm_response_async(prompt=prompt)
+    answer = await get_llm_response_async(prompt, temperature=temperature, caller="mcp")
     
     return answer
 
+
+@mcp.tool()
+async def rag_chat_stream(query: str, ctx: Context, top_k: int = 3, temperature: float = 0.1) -> str:
+    """
+    Streaming variant of rag_chat - partial answers are sent as log notifications
+    while the answer is generated, the full answer is returned at the end
+    
+    Args:
+        query: User question
+        top_k: Number of documents to retrieve (default: 3)
+        temperature: LLM temperature for response generation (default: 0.1)
+    """
+    context = await context_service.hybrid_search_context(
+        query, top_k=top_k, expand_graph=True
+    )
+
+    if not context:
+        return "I couldn't find any relevant documents to answer your question."
+
+    answer_parts = []
+    pending = ""
+    async for delta in stream_llm_response_async(
+        build_rag_prompt(query, context), temperature=temperature, caller="mcp"
+    ):
+        answer_parts.append(delta)
+        pending += delta
+        # flushing in small batches instead of one notification per token
+        if len(pending) >= STREAM_FLUSH_CHARS or pending.endswith(("\n", ". ")):
+            await ctx.info(pending)
+            pending = ""
+
+    if pending:
+        await ctx.info(pending)
+
+    return "".join(answer_parts)
+
 @mcp.tool()
 async def generate_embedding(text: str) -> str:
     """
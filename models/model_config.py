@@ -3,7 +3,7 @@ import time
 import os
 
 # function for creating model configuration
-def create_configuration(access_token: str, model_name: str) -> str:
+def create_configuration(access_token: str, model_name: str, resource_group: str = "demo") -> str:
     
     ai_api_url = os.getenv("AI_API_URL")
     url = f"{ai_api_url}/v2/lm/configurations"
@@ -21,7 +21,7 @@ def create_configuration(access_token: str, model_name: str) -> str:
     
     headers = {
         "Authorization": f"Bearer {access_token}",
-        "AI-Resource-Group": "demo",
+        "AI-Resource-Group": resource_group,
         "Content-Type": "application/json"
     }
     
@@ -2,7 +2,7 @@ import requests
 import os
 
 # function to create model deployment
-def create_deployment(access_token: str, configuration_id: str) -> str:
+def create_deployment(access_token: str, configuration_id: str, resource_group: str = "demo") -> str:
 
     ai_api_url = os.getenv("AI_API_URL")
 
@@ -12,6 +12,7 @@ def create_deployment(access_token: str, configuration_id: str) -> str:
     Args:
         access_token: OAuth access token
         configuration_id: The configuration ID to deploy
+        resource_group: AI Core resource group of the deployment
         
     Returns:
         str: Deployment ID
@@ -23,7 +24,7 @@ def create_deployment(access_token: str, configuration_id: str) -> str:
     }
     headers = {
         "Authorization": f"Bearer {access_token}",
-        "AI-Resource-Group": "demo",
+        "AI-Resource-Group": resource_group,
         "Content-Type": "application/json"
     }
     response = requests.post(url, json=payload, headers=headers)
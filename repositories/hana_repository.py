@@ -2,13 +2,21 @@ from dotenv import load_dotenv
 from hana_ml import dataframe
 import os
 import json
+import asyncio
 import logging
+from config.settings import hana_config
+from repositories.schema_repository import schema_manager
+from utils.metrics import time_stage
+from utils.tracing import traced, KIND_CLIENT
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
 host = str(os.getenv("HANA_HOST"))
 
+# attributes of every HANA query span
+HANA_SPAN_ATTRIBUTES = {"db.system": "hana"}
+
 
 def get_hana_db():
     connection = dataframe.ConnectionContext(
@@ -23,86 +31,48 @@ def get_hana_db():
 # getting connection object
 conn = get_hana_db()
 
-def ensure_embeddings_table():
+def run_schema_migrations(conn=None) -> bool:
     """
-    create DOCUMENTS_EMBEDDING table
+    apply pending HANA migrations once per process (called at app startup)
+    returns True if the schema is up to date
     """
-    conn = get_hana_db()
+    if schema_manager.is_ready():
+        return True
     try:
-        exists_sql = """
-        SELECT 1 FROM SYS.TABLES
-        WHERE TABLE_NAME = 'DOCUMENTS_EMBEDDING'
-        AND SCHEMA_NAME = CURRENT_SCHEMA
-        """
-        result = conn.sql(exists_sql).collect()
-        if not result.empty:
-            logger.info("DOCUMENTS_EMBEDDING table already exists...")
-            return
-
-        create_table_sql = """
-CREATE COLUMN TABLE DOCUMENTS_EMBEDDING (
-    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-    document_text NVARCHAR(5000),
-    embedding REAL_VECTOR(3072),
-    chunk_metadata NVARCHAR(1000),
-    ref_id NVARCHAR(36) UNIQUE NOT NULL
-)
-"""     
-        conn.execute_sql(create_table_sql)
-        logger.info("DOCUMENTS_EMBEDDING table created successfully...")
-        
+        schema_manager.ensure_schema(conn or get_hana_db())
+        return True
     except Exception as e:
-        logger.error(f"Error ensuring embeddings table: {e}")
+        logger.error(f"Error applying HANA schema migrations: {e}")
+        return False
+
 
-def ensure_triple_store():
+def ensure_embeddings_table(conn=None):
     """
-    create TRIPLE STORE table and indexes if they don't exist
+    make sure DOCUMENTS_EMBEDDING exists
+    cheap no-op once the schema has been migrated in this process
     """
-    conn = get_hana_db()
-    try:
-        exists_sql = """
-        SELECT 1 FROM SYS.TABLES
-        WHERE TABLE_NAME = 'TRIPLE_STORE'
-        AND SCHEMA_NAME = CURRENT_SCHEMA
-        """
-        
-        result = conn.sql(exists_sql).collect()
-        if not result.empty:
-            logger.info("triple store already exists...")
-            return
-        
-        create_sql = """
-        CREATE COLUMN TABLE TRIPLE_STORE (
-        ID BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
-        EMB_REF_ID NVARCHAR(36) NOT NULL,
-        CHUNK_INDEX INTEGER,
-        SUBJECT NVARCHAR(500),
-        PREDICATE NVARCHAR(200),
-        OBJECT NVARCHAR(1000),
-        CREATED_AT TIMESTAMP DEFAULT CURRENT_UTCTIMESTAMP,
-        FOREIGN KEY (EMB_REF_ID) REFERENCES DOCUMENTS_EMBEDDING(ref_id)
-        )
-        """
-        conn.execute_sql(create_sql)
-        conn.execute_sql("CREATE INDEX IDX_TRIPLE_SUBJ ON TRIPLE_STORE (SUBJECT)")
-        conn.execute_sql("CREATE INDEX IDX_TRIPLE_PRED ON TRIPLE_STORE (PREDICATE)")
-        conn.execute_sql("CREATE INDEX IDX_TRIPLE_OBJ ON TRIPLE_STORE (OBJECT)")
-        conn.execute_sql(
-            "CREATE INDEX IDX_TRIPLE_REF ON TRIPLE_STORE (EMB_REF_ID, CHUNK_INDEX)"
-        )
-        logger.info("Successfully created triple store and indexes...")
+    run_schema_migrations(conn)
 
-    except Exception as e:
-        print(f"error ensuring triple store: {e}")
+
+def ensure_triple_store(conn=None):
+    """
+    make sure TRIPLE_STORE table and indexes exist
+    cheap no-op once the schema has been migrated in this process
+    """
+    run_schema_migrations(conn)
 
 
-def insert_triplets(triplets_rows: list):
+@traced("hana.insert_triplets", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+@time_stage("db_insert_triplets")
+def insert_triplets(triplets_rows: list, skip_schema_check: bool = False):
     """
     Insert triplets with their metadata
     triplets_rows: list of (ref_id, chunk_index, subject, predicate, object) tuples
+    skip_schema_check: don't verify the table exists (schema already migrated)
     """
-    ensure_triple_store()
     conn = get_hana_db()
+    if not (skip_schema_check or hana_config.skip_schema_checks):
+        ensure_triple_store(conn)
 
     if not triplets_rows:
         logger.warning("No triplets to insert")
@@ -126,16 +96,19 @@ def insert_triplets(triplets_rows: list):
         return False
     
 # this function will insert embeddings and will return the document ID's
-def batch_insertion_embedding(rows):
-    ensure_embeddings_table()
-    conn_ctx = get_hana_db()
-    
+@traced("hana.insert_embeddings", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+@time_stage("db_insert_embeddings")
+def batch_insertion_embedding(rows, skip_schema_check: bool = False):
     """
     args:
         - rows : list of tuples -> [(document_text: str, embedding_string: str, metadata_json: str, ref_id: str), ...]
+        - skip_schema_check: don't verify the table exists (schema already migrated)
     """
+    conn_ctx = get_hana_db()
+    if not (skip_schema_check or hana_config.skip_schema_checks):
+        ensure_embeddings_table(conn_ctx)
     sql = "INSERT INTO DOCUMENTS_EMBEDDING (document_text, embedding, chunk_metadata, ref_id) VALUES (?, TO_REAL_VECTOR(?), ?, ?)"
-    logger.info(f"Batch inserting embeddings: {rows}")
+    logger.info(f"Batch inserting {len(rows or [])} embeddings")
 
     if not rows:
         logger.warning("No rows to insert")
@@ -152,6 +125,42 @@ def batch_insertion_embedding(rows):
         return False
 
 
+@traced("hana.delete_document", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+@time_stage("db_delete_document")
+def delete_document_by_source(source_url: str) -> list:
+    """
+    delete every chunk of a document (and the triplets extracted from it)
+    args:
+        - source_url: file url the document was ingested from
+    returns:
+        - ref_ids of the deleted chunks ([] if nothing matched)
+    raises:
+        - the database error, so a failed delete isn't reported as done
+    """
+    conn_ctx = get_hana_db()
+    select_sql = """
+        SELECT REF_ID FROM DOCUMENTS_EMBEDDING
+        WHERE JSON_VALUE(CHUNK_METADATA, '$.source_url') = ?
+    """
+    cursor = conn_ctx.connection.cursor()
+    try:
+        cursor.execute(select_sql, (source_url,))
+        ref_ids = [row[0] for row in cursor.fetchall() if row[0]]
+
+        if ref_ids:
+            cursor.executemany("DELETE FROM TRIPLE_STORE WHERE EMB_REF_ID = ?", [(ref_id,) for ref_id in ref_ids])
+            cursor.executemany("DELETE FROM DOCUMENTS_EMBEDDING WHERE REF_ID = ?", [(ref_id,) for ref_id in ref_ids])
+            conn_ctx.connection.commit()
+    except Exception as e:
+        logger.error(f"Failed to delete document {source_url}: {e}")
+        raise
+    finally:
+        cursor.close()
+
+    logger.info(f"Deleted {len(ref_ids)} chunks of document {source_url}")
+    return ref_ids
+
+
 def insert_embedding(document_text, embedding_vector, chunk_metadata=None):
     conn = get_hana_db()
 
@@ -180,8 +189,16 @@ def insert_embedding(document_text, embedding_vector, chunk_metadata=None):
 
 
 # function to find top k similiar documents
-# ...existing code...
 async def search_similiar_documents(query_embedding, top_k=5):
+    """
+    vector search that doesn't block the event loop (the HANA driver is synchronous)
+    """
+    return await asyncio.to_thread(search_similiar_documents_sync, query_embedding, top_k)
+
+
+@traced("hana.vector_search", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+@time_stage("vector_search")
+def search_similiar_documents_sync(query_embedding, top_k=5):
     conn = get_hana_db()
 
     # Escape and format inputs
@@ -193,6 +210,7 @@ async def search_similiar_documents(query_embedding, top_k=5):
     search_sql = f"""
     SELECT DOCUMENT_TEXT,
            CHUNK_METADATA,
+           REF_ID,
            COSINE_SIMILARITY(EMBEDDING, TO_REAL_VECTOR('{vec}')) AS SIMILARITY
     FROM DOCUMENTS_EMBEDDING
     ORDER BY SIMILARITY DESC
@@ -201,10 +219,10 @@ async def search_similiar_documents(query_embedding, top_k=5):
     try:
         df = conn.sql(search_sql)
         results = df.collect()
-        print(results)
+        logger.debug(f"Vector search returned {len(results)} rows")
         return results
     except Exception as e:
-        print(f"error searching similar documents: {e}")
+        logger.error(f"error searching similar documents: {e}")
         return None
 
 
@@ -215,8 +233,8 @@ def get_all_data():
     try:
         df = conn.sql(sql)
         results = df.collect()
-        print(results)
+        logger.debug(f"Fetched {len(results)} rows")
         return results
     except Exception as e:
-        print(f"error fetching all data: {e}")
+        logger.error(f"error fetching all data: {e}")
         return None
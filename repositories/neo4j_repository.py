@@ -1,5 +1,8 @@
 from neo4j import GraphDatabase
 import os
+import logging
+
+logger = logging.getLogger(__name__)
 
 driver = GraphDatabase.driver(
     os.getenv("NEO4J_URI"), auth=("kkunal644@gmail.com", os.getenv("NEO4J_PASSWORD"))
@@ -16,5 +19,5 @@ def ensure_neo4j_constraints():
                 "CREATE CONSTRAINT entity_name_unique IF NOT EXISTS FOR (e:Entity) REQUIRE e.name IS UNIQUE"
             )
     except Exception as e:
-        print(f"Error creating constraints: {e}")
+        logger.error(f"Error creating constraints: {e}")
     
\ No newline at end of file
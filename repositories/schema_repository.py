@@ -0,0 +1,263 @@
+"""
+Versioned schema management for the HANA tables used by the service.
+
+Migrations are applied once (normally at app startup) and the resulting schema
+version is cached per process, so ingestion paths no longer need to open a
+connection and query SYS.TABLES before every insert.
+"""
+
+import threading
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class MigrationStep:
+    """
+    single DDL statement guarded by an existence check on the object it creates
+
+    the guard keeps migrations idempotent on databases that were created before
+    schema versioning existed (tables/indexes already there, no version rows)
+    """
+
+    def __init__(self, sql: str, object_type: str, object_name: str):
+        self.sql = sql
+        self.object_type = object_type  # "table" or "index"
+        self.object_name = object_name
+
+
+class Migration:
+    """
+    numbered, ordered set of DDL steps
+    """
+
+    def __init__(self, version: int, description: str, steps: List[MigrationStep]):
+        self.version = version
+        self.description = description
+        self.steps = steps
+
+
+# ========================================
+# MIGRATIONS (append only, never edit an applied one)
+# ========================================
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        version=1,
+        description="create DOCUMENTS_EMBEDDING table",
+        steps=[
+            MigrationStep(
+                """
+                CREATE COLUMN TABLE DOCUMENTS_EMBEDDING (
+                    id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                    document_text NVARCHAR(5000),
+                    embedding REAL_VECTOR(3072),
+                    chunk_metadata NVARCHAR(1000),
+                    ref_id NVARCHAR(36) UNIQUE NOT NULL
+                )
+                """,
+                "table",
+                "DOCUMENTS_EMBEDDING",
+            ),
+        ],
+    ),
+    Migration(
+        version=2,
+        description="create TRIPLE_STORE table and lookup indexes",
+        steps=[
+            MigrationStep(
+                """
+                CREATE COLUMN TABLE TRIPLE_STORE (
+                    ID BIGINT GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+                    EMB_REF_ID NVARCHAR(36) NOT NULL,
+                    CHUNK_INDEX INTEGER,
+                    SUBJECT NVARCHAR(500),
+                    PREDICATE NVARCHAR(200),
+                    OBJECT NVARCHAR(1000),
+                    CREATED_AT TIMESTAMP DEFAULT CURRENT_UTCTIMESTAMP,
+                    FOREIGN KEY (EMB_REF_ID) REFERENCES DOCUMENTS_EMBEDDING(ref_id)
+                )
+                """,
+                "table",
+                "TRIPLE_STORE",
+            ),
+            MigrationStep("CREATE INDEX IDX_TRIPLE_SUBJ ON TRIPLE_STORE (SUBJECT)", "index", "IDX_TRIPLE_SUBJ"),
+            MigrationStep("CREATE INDEX IDX_TRIPLE_PRED ON TRIPLE_STORE (PREDICATE)", "index", "IDX_TRIPLE_PRED"),
+            MigrationStep("CREATE INDEX IDX_TRIPLE_OBJ ON TRIPLE_STORE (OBJECT)", "index", "IDX_TRIPLE_OBJ"),
+            MigrationStep(
+                "CREATE INDEX IDX_TRIPLE_REF ON TRIPLE_STORE (EMB_REF_ID, CHUNK_INDEX)",
+                "index",
+                "IDX_TRIPLE_REF",
+            ),
+        ],
+    ),
+    Migration(
+        version=3,
+        description="full-text indexes on TRIPLE_STORE SUBJECT/OBJECT for graph expansion",
+        steps=[
+            MigrationStep(
+                "CREATE FULLTEXT INDEX FTI_TRIPLE_SUBJ ON TRIPLE_STORE (SUBJECT) FUZZY SEARCH INDEX ON SYNC",
+                "index",
+                "FTI_TRIPLE_SUBJ",
+            ),
+            MigrationStep(
+                "CREATE FULLTEXT INDEX FTI_TRIPLE_OBJ ON TRIPLE_STORE (OBJECT) FUZZY SEARCH INDEX ON SYNC",
+                "index",
+                "FTI_TRIPLE_OBJ",
+            ),
+        ],
+    ),
+    Migration(
+        version=4,
+        description="full-text index on TRIPLE_STORE PREDICATE for keyword search",
+        steps=[
+            MigrationStep(
+                "CREATE FULLTEXT INDEX FTI_TRIPLE_PRED ON TRIPLE_STORE (PREDICATE) FUZZY SEARCH INDEX ON SYNC",
+                "index",
+                "FTI_TRIPLE_PRED",
+            ),
+        ],
+    ),
+    Migration(
+        version=5,
+        description="full-text index on DOCUMENTS_EMBEDDING document_text for hybrid retrieval",
+        steps=[
+            MigrationStep(
+                "CREATE FULLTEXT INDEX FTI_DOCUMENT_TEXT ON DOCUMENTS_EMBEDDING (DOCUMENT_TEXT) FUZZY SEARCH INDEX ON SYNC",
+                "index",
+                "FTI_DOCUMENT_TEXT",
+            ),
+        ],
+    ),
+]
+
+
+class SchemaManager:
+    """
+    applies pending migrations and caches the schema version for this process
+    """
+
+    VERSION_TABLE = "SCHEMA_MIGRATIONS"
+
+    def __init__(self, migrations: List[Migration] = MIGRATIONS):
+        self.migrations = sorted(migrations, key=lambda m: m.version)
+        self.latest_version = self.migrations[-1].version if self.migrations else 0
+        self._current_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def is_ready(self, required_version: Optional[int] = None) -> bool:
+        """
+        True once this process has seen the schema at (at least) the required version
+        """
+        required = self.latest_version if required_version is None else required_version
+        return self._current_version is not None and self._current_version >= required
+
+    def mark_ready(self):
+        """
+        trust that the schema is up to date without touching the database
+        (used when migrations are managed outside of the service)
+        """
+        self._current_version = self.latest_version
+
+    def reset(self):
+        """
+        forget the cached state, next ensure_schema() call will re-check the database
+        """
+        self._current_version = None
+
+    def ensure_schema(self, conn) -> int:
+        """
+        apply pending migrations once per process
+
+        args:
+            - conn: hana_ml ConnectionContext
+        returns:
+            - schema version after migrating
+        """
+        if self.is_ready():
+            return self._current_version
+
+        with self._lock:
+            # another thread may have migrated while we were waiting
+            if self.is_ready():
+                return self._current_version
+
+            self._ensure_version_table(conn)
+            applied = self._applied_versions(conn)
+
+            for migration in self.migrations:
+                if migration.version in applied:
+                    continue
+                self._apply(conn, migration)
+
+            self._current_version = self.latest_version
+            logger.info(f"HANA schema at version {self._current_version}")
+            return self._current_version
+
+    # ========================================
+    # INTERNALS
+    # ========================================
+
+    def _ensure_version_table(self, conn):
+        if self._table_exists(conn, self.VERSION_TABLE):
+            return
+        conn.execute_sql(
+            f"""
+            CREATE COLUMN TABLE {self.VERSION_TABLE} (
+                VERSION INTEGER PRIMARY KEY,
+                DESCRIPTION NVARCHAR(200),
+                APPLIED_AT TIMESTAMP DEFAULT CURRENT_UTCTIMESTAMP
+            )
+            """
+        )
+        logger.info(f"{self.VERSION_TABLE} table created successfully...")
+
+    def _applied_versions(self, conn) -> set:
+        df = conn.sql(f"SELECT VERSION FROM {self.VERSION_TABLE}").collect()
+        return {int(v) for v in df["VERSION"].tolist()} if not df.empty else set()
+
+    def _apply(self, conn, migration: Migration):
+        logger.info(f"Applying HANA migration {migration.version}: {migration.description}")
+        for step in migration.steps:
+            if self._object_exists(conn, step):
+                logger.info(f"{step.object_type} {step.object_name} already exists, skipping")
+                continue
+            conn.execute_sql(step.sql)
+
+        cur = conn.connection.cursor()
+        try:
+            cur.execute(
+                f"INSERT INTO {self.VERSION_TABLE} (VERSION, DESCRIPTION) VALUES (?, ?)",
+                (migration.version, migration.description),
+            )
+            conn.connection.commit()
+        finally:
+            cur.close()
+
+    def _object_exists(self, conn, step: MigrationStep) -> bool:
+        if step.object_type == "table":
+            return self._table_exists(conn, step.object_name)
+        if step.object_type == "index":
+            return self._index_exists(conn, step.object_name)
+        return False
+
+    def _table_exists(self, conn, table_name: str) -> bool:
+        sql = f"""
+        SELECT 1 FROM SYS.TABLES
+        WHERE TABLE_NAME = '{table_name}'
+        AND SCHEMA_NAME = CURRENT_SCHEMA
+        """
+        return not conn.sql(sql).collect().empty
+
+    def _index_exists(self, conn, index_name: str) -> bool:
+        sql = f"""
+        SELECT 1 FROM SYS.INDEXES
+        WHERE INDEX_NAME = '{index_name}'
+        AND SCHEMA_NAME = CURRENT_SCHEMA
+        """
+        return not conn.sql(sql).collect().empty
+
+
+# singleton instance
+schema_manager = SchemaManager()
@@ -18,4 +18,11 @@ class ProcessDocumentRequest(BaseModel):
 
 class ProcessDocumentResponse(BaseResponse):
     document_id: Optional[str] = None
-    chunks_created: Optional[int] = None
\ No newline at end of file
+    chunks_created: Optional[int] = None
+
+class DocumentDeleteRequest(BaseModel):
+    file_url: str
+
+class DocumentDeleteResponse(BaseResponse):
+    chunks_deleted: int = 0
+    cache_entries_invalidated: int = 0
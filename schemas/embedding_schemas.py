@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import Any, Dict, List, Optional
 from schemas.common_schemas import BaseResponse
 
 class SingleEmbeddingRequest(BaseModel):
@@ -21,4 +21,18 @@ class EmbeddingKGRequest(BaseModel):
     doc_type: str
 
 class EmbeddingKGResponse(BaseResponse):
-    processing_started: bool = True
\ No newline at end of file
+    processing_started: bool = True
+    job_id: Optional[str] = None
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str  # queued | running | completed | failed
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+    details: Dict[str, Any] = {}
+    result: Optional[Dict[str, Any]] = None
+    usage: Optional[Dict[str, Any]] = None  # tokens, cost and calls per caller
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Dict
 
 class LLMRequest(BaseModel):
     prompt: str
@@ -21,4 +21,7 @@ class RAGChatResponse(BaseModel):
     query: str
     answer: str
     context_used: Optional[str] = None
-    from_cache: bool = Field(default=False, description="whether answer came from cache")
\ No newline at end of file
+    from_cache: bool = Field(default=False, description="whether answer came from cache")
+    retrieval_latencies_ms: Optional[Dict[str, float]] = Field(default=None, description="per-leg retrieval latencies")
+    context_tokens_saved: Optional[int] = Field(default=None, description="prompt tokens removed by dedup and budgeting")
+    semantic_similarity: Optional[float] = Field(default=None, description="similarity to the cached query on a semantic cache hit")
\ No newline at end of file
@@ -0,0 +1,56 @@
+from typing import Any, Dict
+from cache.base_cache import BaseCache
+from cache.memory_cache import MemoryCache
+from cache.redis.redis_cache import RedisCache
+from cache.tiered_cache import TieredCache
+from config.redis_config import redis_config
+from utils.metrics import metrics_registry
+import logging
+logger = logging.getLogger(__name__)
+
+memory_tier = metrics_registry.gauge("cache_memory_tier", "Size of the in-process memory tier", ["field"])
+
+
+class CacheService:
+    """
+    process-wide cache instances shared by the services
+
+    - redis: shared across workers
+    - default: memory + redis tiers (plain redis when MEMORY_CACHE_ENABLED is off)
+    """
+
+    def __init__(self):
+        self.redis = RedisCache()
+        self.tiered = TieredCache(MemoryCache(), self.redis) if redis_config.memory_cache_enabled else None
+
+    @property
+    def default(self) -> BaseCache:
+        return self.tiered or self.redis
+
+    async def start(self):
+        """
+        start cross-worker invalidation (application startup)
+        """
+        if self.tiered:
+            await self.tiered.start()
+
+    async def stop(self):
+        if self.tiered:
+            await self.tiered.stop()
+
+    async def collect_metrics(self):
+        """
+        refresh gauges that are sampled rather than counted (redis INFO, pool usage, memory tier size)
+        """
+        await self.redis.collect_server_metrics()
+        if self.tiered:
+            stats = self.tiered.local.stats()
+            memory_tier.set(stats["entries"], field="entries")
+            memory_tier.set(stats["bytes"], field="bytes")
+
+    def stats(self) -> Dict[str, Any]:
+        return self.tiered.stats() if self.tiered else {}
+
+
+# singleton instance
+cache_service = CacheService()
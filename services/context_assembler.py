@@ -0,0 +1,273 @@
+"""
+Builds the RAG prompt context from retrieved chunks and graph triplets.
+
+Overlapping chunk spans and duplicate triplets are removed first, then the most
+relevant material is packed into a token budget derived from the model context
+window and the answer length requested by the caller.
+"""
+
+import math
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# context windows (tokens) of the chat models we deploy
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gpt-4.1": 1047576,
+    "gpt-4.1-mini": 1047576,
+    "gpt-4-turbo": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-35-turbo-16k": 16384,
+    "gpt-35-turbo": 4096,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# instructions + question wrapped around the context
+PROMPT_OVERHEAD_TOKENS = 200
+
+FACTS_HEADER = "Related Facts:\n"
+
+# chunks and facts that would be cut below this size are dropped instead
+MIN_PARTIAL_TOKENS = 64
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    cheap token estimate (~4 characters per token for English text)
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
+
+
+def context_window_for(model: str) -> int:
+    """
+    context window for a model name, longest known prefix wins (e.g. "gpt-4o-2024-08-06")
+    """
+    if not model:
+        return DEFAULT_CONTEXT_WINDOW
+    model = model.lower()
+    for name in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(name):
+            return MODEL_CONTEXT_WINDOWS[name]
+    return DEFAULT_CONTEXT_WINDOW
+
+
+class ContextAssembler:
+    """
+    dedups and packs retrieval results into a token budget
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int = 3000,
+        triplet_share: float = 0.25,
+        min_overlap_chars: int = 50,
+        max_overlap_chars: int = 400,
+    ):
+        """
+        args:
+            - max_context_tokens: hard cap on context size, whatever the model allows
+            - triplet_share: part of the budget reserved for graph facts when there are any
+            - min_overlap_chars / max_overlap_chars: overlap lengths considered when merging chunks
+        """
+        self.max_context_tokens = max_context_tokens
+        self.triplet_share = triplet_share
+        self.min_overlap_chars = min_overlap_chars
+        self.max_overlap_chars = max_overlap_chars
+
+    def budget_for(self, model: str, max_tokens: Optional[int]) -> int:
+        """
+        tokens available for context: what the model window leaves after the answer
+        and the prompt scaffolding, capped by max_context_tokens
+        """
+        available = context_window_for(model) - (max_tokens or 0) - PROMPT_OVERHEAD_TOKENS
+        return max(0, min(self.max_context_tokens, available))
+
+    def assemble(
+        self,
+        chunks: Sequence[Dict[str, Any]],
+        triplets: Sequence[Sequence[str]],
+        model: str,
+        max_tokens: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        args:
+            - chunks: retrieved chunks in relevance order ({"text": ..., "similarity": ...})
+            - triplets: graph facts in relevance order as (subject, predicate, object)
+            - model: chat model the prompt is for
+            - max_tokens: answer tokens requested from the model
+        returns:
+            - {"context", "budget", "tokens_used", "tokens_raw", "tokens_saved",
+               "chunks_used", "chunks_merged", "triplets_used", "triplets_dropped"}
+        """
+        budget = self.budget_for(model, max_tokens)
+        tokens_raw = estimate_tokens(self._raw_context(chunks, triplets))
+
+        spans, merged = self.dedup_chunks(chunks)
+        facts = self.dedup_triplets(triplets)
+
+        # chunks get priority, but graph facts keep a reserved slice of the budget
+        reserved = int(budget * self.triplet_share) if facts else 0
+        chunk_parts, chunk_tokens = self._pack(
+            [self._format_chunk(span) for span in spans], budget - reserved, separator_tokens=1
+        )
+        fact_lines, _ = self._pack(
+            [self._format_triplet(fact) for fact in facts],
+            budget - chunk_tokens - estimate_tokens(FACTS_HEADER) - 1,
+            separator_tokens=1,
+        )
+
+        context_parts = list(chunk_parts)
+        if fact_lines:
+            context_parts.append(FACTS_HEADER + "\n".join(fact_lines))
+        context = "\n\n".join(context_parts)
+        tokens_used = estimate_tokens(context)
+
+        return {
+            "context": context,
+            "budget": budget,
+            "tokens_used": tokens_used,
+            "tokens_raw": tokens_raw,
+            "tokens_saved": max(0, tokens_raw - tokens_used),
+            "chunks_used": len(chunk_parts),
+            "chunks_merged": merged,
+            "triplets_used": len(fact_lines),
+            "triplets_dropped": len(triplets) - len(fact_lines),
+        }
+
+    # ========================================
+    # DEDUPLICATION
+    # ========================================
+
+    def dedup_chunks(self, chunks: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        merge chunks whose text overlaps (the chunker uses a sliding window) and drop
+        chunks fully contained in another; a merged span keeps the position and score
+        of its most relevant member
+        returns:
+            - (spans, number of chunks merged away)
+        """
+        spans: List[Dict[str, Any]] = []
+        merged = 0
+
+        for chunk in chunks:
+            text = (chunk.get("text") or "").strip()
+            if not text:
+                continue
+
+            for span in spans:
+                combined = self._combine(span["text"], text)
+                if combined is not None:
+                    span["text"] = combined
+                    merged += 1
+                    break
+            else:
+                spans.append({**chunk, "text": text})
+
+        return spans, merged
+
+    def dedup_triplets(self, triplets: Sequence[Sequence[str]]) -> List[Tuple[str, str, str]]:
+        """
+        drop triplets that only differ in case or whitespace
+        """
+        seen = set()
+        unique = []
+        for triplet in triplets:
+            if len(triplet) != 3:
+                continue
+            cleaned = tuple(re.sub(r"\s+", " ", str(part or "")).strip() for part in triplet)
+            key = tuple(part.casefold() for part in cleaned)
+            if not all(key) or key in seen:
+                continue
+            seen.add(key)
+            unique.append(cleaned)
+        return unique
+
+    def _combine(self, a: str, b: str) -> Optional[str]:
+        """
+        single span covering a and b if they overlap, None otherwise
+        """
+        if b in a:
+            return a
+        if a in b:
+            return b
+        joined = self._join_overlapping(a, b)
+        if joined is None:
+            joined = self._join_overlapping(b, a)
+        return joined
+
+    def _join_overlapping(self, head: str, tail: str) -> Optional[str]:
+        """
+        head + tail when a suffix of head is a prefix of tail (at least min_overlap_chars long)
+        """
+        probe = tail[: self.min_overlap_chars]
+        if len(probe) < self.min_overlap_chars:
+            return None
+
+        start = max(0, len(head) - self.max_overlap_chars)
+        position = head.find(probe, start)
+        while position != -1:
+            overlap = len(head) - position
+            if tail.startswith(head[position:]):
+                return head + tail[overlap:]
+            position = head.find(probe, position + 1)
+        return None
+
+    # ========================================
+    # PACKING
+    # ========================================
+
+    def _pack(self, parts: List[str], budget: int, separator_tokens: int) -> Tuple[List[str], int]:
+        """
+        take parts in order while they fit, the first part that doesn't fit is cut
+        at a word boundary if a useful amount of it fits
+        """
+        packed = []
+        used = 0
+        for part in parts:
+            cost = estimate_tokens(part) + separator_tokens
+            if used + cost <= budget:
+                packed.append(part)
+                used += cost
+                continue
+
+            remaining = budget - used - separator_tokens
+            if remaining >= MIN_PARTIAL_TOKENS:
+                truncated = self._truncate(part, remaining)
+                packed.append(truncated)
+                used += estimate_tokens(truncated) + separator_tokens
+            break
+        return packed, used
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        limit = max_tokens * 4 - 3
+        cut = text[:limit]
+        if " " in cut:
+            cut = cut[: cut.rfind(" ")]
+        return cut + "..."
+
+    # ========================================
+    # FORMATTING
+    # ========================================
+
+    def _format_chunk(self, span: Dict[str, Any]) -> str:
+        similarity = span.get("similarity")
+        if similarity is not None:
+            return f"Chunk (similiarity: {similarity:.4f}): {span['text']}"
+        return f"Chunk (keyword match): {span['text']}"
+
+    def _format_triplet(self, triplet: Tuple[str, str, str]) -> str:
+        subject, predicate, obj = triplet
+        return f"- {subject} | {predicate.replace('_', ' ')} | {obj}"
+
+    def _raw_context(self, chunks: Sequence[Dict[str, Any]], triplets: Sequence[Sequence[str]]) -> str:
+        """
+        what the context looked like before dedup and budgeting (for reporting savings)
+        """
+        parts = [self._format_chunk(chunk) for chunk in chunks]
+        if triplets:
+            parts.append(f"\nRelated Facts: {list(triplets)}")
+        return "\n\n".join(parts)
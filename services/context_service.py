@@ -1,57 +1,137 @@
-from cache.redis.redis_cache import RedisCache
-from repositories.hana_repository import search_similiar_documents
-from services.embedding_service import embedding_service
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from cache.semantic_cache import SemanticCache
+from cache.single_flight import DistributedSingleFlight
+from config.settings import retrieval_config, llm_config
+from services.cache_service import cache_service
+from services.context_assembler import ContextAssembler
+from utils.metrics import time_stage
+from utils.tracing import traced, tracer
+from services.retrieval_service import hybrid_retriever
 from services.knowledge_graph_service import get_triplets_by_chunks
 import logging
 logger = logging.getLogger(__name__)
 
-_rag_cache = RedisCache()
+# hot answers are served from worker memory, the rest from redis
+_rag_cache = cache_service.default
+
+
+def build_rag_prompt(query: str, context: str) -> str:
+    """
+    prompt used for every RAG answer (HTTP routes and MCP tools)
+    """
+    return f"""
+        Based on the following context, answer the question:
+
+        Context: 
+        {context}
+
+        Question: {query}
+
+        Answer based only on the context provided:
+        """
+
 
 class ContextService:
     """
     context service with cache for RAG Pipeline
     """
-    
+
     def __init__(self):
         self.cache = _rag_cache
-        
-    async def hybrid_search_context(self, query: str, top_k: int = 5, expand_graph: bool = True) -> str:
-        """
-        Hybrid retrieval: vector similarity + graph retrieval
-        returns combined textual context for RAG
+        self.semantic_cache = SemanticCache(_rag_cache)
+        self.single_flight = DistributedSingleFlight(_rag_cache)
+        self.assembler = ContextAssembler(
+            max_context_tokens=retrieval_config.context_max_tokens,
+            triplet_share=retrieval_config.context_triplet_share,
+        )
+
+    @traced("rag.retrieve_context")
+    @time_stage("context")
+    async def retrieve_context(
+        self,
+        query: str,
+        top_k: int = 5,
+        expand_graph: bool = True,
+        query_embedding: Optional[List[float]] = None,
+        max_tokens: Optional[int] = None,
+        model: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """
+        Hybrid retrieval: lexical + vector search fused with RRF, then graph expansion,
+        deduplicated and packed into the model's token budget
 
-        query_embedding = await embedding_service.get_embedding(query)
-        # vector search
-        vector_results = await search_similiar_documents(query_embedding, top_k=top_k)
+        args:
+            - max_tokens: answer tokens requested from the LLM (shrinks the context budget)
+            - model: chat model name, defaults to LLM_MODEL_NAME
+        returns:
+            - {"context": str, "chunks": [...], "triplets": [...], "latencies_ms": {...}, "context_stats": {...}}
+        """
+        retrieval = await hybrid_retriever.retrieve(query, top_k=top_k, query_embedding=query_embedding)
+        chunks = retrieval["chunks"]
+        latencies = retrieval["latencies_ms"]
 
-        if vector_results is None or vector_results.empty:
+        if not chunks:
             logger.info("No similar documents found.")
-            return ""
-        
-        context_parts = []
-        ref_ids = []
-
-        # extracting ref_ids and text from vector results
-        for _, row in vector_results.iterrows():
-            ref_id = row.get("REF_ID") or row.get("ref_id")
-            chunk_text = row.get("DOCUMENT_TEXT", '')
-            similiarity = row.get("SIMILARITY", 0)
-            
-            context_parts.append(f"Chunk (similiarity: {similiarity:.4f}): {chunk_text}")
-            if ref_id:
-                ref_ids.append(ref_id)
-            
+            return {"context": "", "chunks": [], "triplets": [], "latencies_ms": latencies, "context_stats": {}}
+
+        ref_ids = [chunk["ref_id"] for chunk in chunks if chunk["ref_id"]]
 
         # graph expansion
+        triplets = []
         if expand_graph and ref_ids:
-            graph_context = get_triplets_by_chunks(ref_ids, query)
-            if graph_context:
-                context_parts.append(f"\nRelated Facts: {graph_context}")
-            
-        
-        return "\n\n".join(context_parts)
+            started = time.perf_counter()
+            triplets = await asyncio.to_thread(get_triplets_by_chunks, ref_ids, query)
+            latencies["graph"] = round((time.perf_counter() - started) * 1000, 2)
+
+        # dedup + token budgeting
+        with time_stage("prompt_assembly"), tracer.span("rag.prompt_assembly"):
+            assembled = self.assembler.assemble(
+                chunks, triplets, model=model or llm_config.model_name, max_tokens=max_tokens
+            )
+        context = assembled.pop("context")
+        logger.info(
+            f"context assembled: {assembled['tokens_used']}/{assembled['budget']} tokens, "
+            f"{assembled['tokens_saved']} saved, {assembled['chunks_merged']} overlapping chunks merged"
+        )
+
+        return {
+            "context": context,
+            "chunks": chunks,
+            "triplets": triplets,
+            "latencies_ms": latencies,
+            "context_stats": assembled,
+        }
+
+    async def hybrid_search_context(
+        self, query: str, top_k: int = 5, expand_graph: bool = True, max_tokens: Optional[int] = None
+    ) -> str:
+        """
+        Hybrid retrieval: vector similarity + keyword search + graph retrieval
+        returns combined textual context for RAG
+        """
+        result = await self.retrieve_context(query, top_k=top_k, expand_graph=expand_graph, max_tokens=max_tokens)
+        return result["context"]
+
+    async def invalidate_documents(
+        self, source_urls: Optional[List[str]] = None, ref_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        evict every cached answer / search result built from the given documents or chunks
+        (call after a document is re-ingested, updated or deleted)
+        returns the number of cache entries removed
+        """
+        tags = [f"source:{url}" for url in source_urls or []] + [f"ref:{ref_id}" for ref_id in ref_ids or []]
+        if not tags:
+            return 0
+
+        removed = await self.cache.invalidate_tags(tags)
+        # the shared semantic entries are gone already, this prunes the local vector index
+        await self.semantic_cache.invalidate_tags(tags)
+        logger.info(f"invalidated {removed} cached entries for {len(tags)} document tags")
+        return removed
 
 
 # singleton instance
-context_service = ContextService()
\ No newline at end of file
+context_service = ContextService()
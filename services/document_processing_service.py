@@ -12,16 +12,21 @@ import tempfile
 from repositories.hana_repository import batch_insertion_embedding, insert_triplets
 from services.knowledge_graph_service import convert_corpus_to_triplets_async
 from services.embedding_service import embedding_service
+from services.context_service import context_service
+from utils.tracing import traced, current_span
 import logging
 logger = logging.getLogger(__name__)
 
+@traced("job.process_document")
 async def process_and_embed_file_from_url(file_url: str):
     """
     Download file from Supabase, extract text, create embedding and triplets, stores it in database in corresponding tables
     """
+    span = current_span()
+    span.set_attribute("file_url", file_url)
     try:
         text_content = process_file_from_url(file_url)
-        logger.info("Successfully extracted text from the document...", text_content[:100])  # Print first 100 chars for verification
+        logger.info(f"Successfully extracted {len(text_content)} characters from the document")
         chunks = split_text_into_chunks(text_content)
 
         # dictionary to hold metadata
@@ -31,13 +36,14 @@ async def process_and_embed_file_from_url(file_url: str):
         chunk_metadata = [metadata.copy() for _ in chunks]
 
         preprocessed_chunks = preprocess_text_chunks(chunks)
+        span.set_attribute("chunks", len(preprocessed_chunks))
         logger.info(f"Preprocessed {len(preprocessed_chunks)} chunks for embedding and triplet extraction.")
 
         # creating reference ids for triple store table to point to embedding table
         ref_ids = [str(uuid.uuid4()) for _ in preprocessed_chunks]
 
         # batch-embed all preprocessed chunks
-        embeddings = await embedding_service.get_embeddings_batch(preprocessed_chunks, max_workers=5)
+        embeddings = await embedding_service.get_embeddings_batch(preprocessed_chunks)
         logger.info(f"Successfully generated embeddings for {len(embeddings)} chunks.")
         
         # creating triplets for all preprocessed chunks
@@ -93,6 +99,9 @@ async def process_and_embed_file_from_url(file_url: str):
         else:
             logger.warning("No triplets to insert into the database.")
 
+        # answers cached from an earlier version of this document are stale now
+        await context_service.invalidate_documents(source_urls=[file_url])
+
 
         # building combined in memory structure (in case we need it downstream)
         combined = []
@@ -123,7 +132,7 @@ def split_text_into_chunks(text: str, chunk_size: int = 1000, overlap: int = 200
         chunk = text[start:end]
         chunks.append(chunk)
         start = end - overlap
-    print("successfully converted the content into chunks")
+    logger.debug(f"split text into {len(chunks)} chunks")
     return chunks
 
 
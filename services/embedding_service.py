@@ -1,50 +1,81 @@
 from dotenv import load_dotenv
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import asyncio
-import aiohttp
+import hashlib
 import json
+import time
+import logging
 from auth.oauth_token import get_access_token_async
+from decorators.cache_decorators import cached
+from utils.metrics import time_stage
+from utils.tracing import traced, inject_headers, KIND_CLIENT
+from utils.resilience import raise_for_status
+from utils.http_client import get_session
+from config.redis_config import redis_config
+from services.cache_service import cache_service
+from services.usage_service import record_response_usage, current_caller
+from services.model_router import Deployment, embedding_router
 
 load_dotenv()
+logger = logging.getLogger(__name__)
 
 class EmbeddingService:
     """
     embedding service
     """
 
+    def __init__(self):
+        self.cache = cache_service.default
+        # picks / fails over between the embedding deployments (each with its own rate limit and retries)
+        self.router = embedding_router
+
+    @cached(
+        ttl=redis_config.embedding_ttl,
+        key_prefix="embedding",
+        key_builder=lambda text: hashlib.sha256(text.encode()).hexdigest(),
+        distributed=True,
+    )
     async def get_embedding(self, text: str) -> List[float]:
         """
         Get embedding for a single text
+        cached per text, concurrent calls for the same text (in any worker) share one request
         Args:
             text: input text to embed
         """
-        url = "https://api.ai.prod.eu-central-1.aws.ml.hana.ondemand.com/v2/inference/deployments/d15fa1e81295297d/embeddings?api-version=2024-06-01"
-        access_token = await get_access_token_async()
-        
-        payload = {"model": "text-embedding-3-large", "input": text}
-        headers = {
-            "AI-Resource-Group": "genai",
-            "Accept": "application/json",
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-        }
+        return await self._request_embedding(text)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload) as response:
-                response.raise_for_status()
+    @traced("http.embedding", kind=KIND_CLIENT, model="text-embedding-3-large")
+    @time_stage("embedding")
+    async def _request_embedding(self, text: str) -> List[float]:
+        async def attempt(deployment: Deployment):
+            access_token = await get_access_token_async()
+            payload = {"model": deployment.model, "input": text}
+            headers = inject_headers({
+                "AI-Resource-Group": deployment.resource_group,
+                "Accept": "application/json",
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {access_token}",
+            })
+
+            started = time.perf_counter()
+            async with get_session().post(deployment.url, headers=headers, json=payload) as response:
+                await raise_for_status(response)
                 data = await response.json()
+                record_response_usage(
+                    payload["model"], data, time.perf_counter() - started, caller=current_caller() or "embedding"
+                )
                 return data["data"][0]["embedding"]
 
+        return await self.router.call(attempt)
 
-
-
-    async def get_embeddings_batch(self, texts: List[str], max_workers: int = 5) -> List[List[float]]:
+    async def get_embeddings_batch(self, texts: List[str], max_workers: Optional[int] = None) -> List[List[float]]:
         """
         Create embeddings for a list of texts using asyncio concurrency
         
         Args:
             texts: List of input strings to embed
-            max_workers: Maximum concurrent requests (for rate limiting)
+            max_workers: Optional hard cap on concurrent requests; by default each
+                deployment's guard adapts concurrency to its rate limit
             
         Returns:
             List of embedding vectors aligned with the input order
@@ -53,15 +84,17 @@ class EmbeddingService:
             return []
 
         async def run_single(index: int, text: str) -> Tuple[int, List[float]]:
-            print(f"Embedding done: {index}")
             embedding = await self.get_embedding(text)
+            logger.debug(f"Embedding done: {index}")
             return index, embedding
 
-        # Use asyncio Semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(max_workers)
-        
-        # using semaphore to limit concurrent tasks as it might exceed original api rate limiting
+        # requests are throttled per deployment (token bucket + AIMD concurrency);
+        # the semaphore is only an extra cap for callers that want one
+        semaphore = asyncio.Semaphore(max_workers) if max_workers else None
+
         async def bounded_run_single(index: int, text: str) -> Tuple[int, List[float]]:
+            if semaphore is None:
+                return await run_single(index, text)
             async with semaphore:
                 return await run_single(index, text)
 
@@ -77,7 +110,7 @@ class EmbeddingService:
         # Process results and handle exceptions
         for result in results_with_indices:
             if isinstance(result, Exception):
-                print(f"Error in embedding: {result}")
+                logger.error(f"Error in embedding: {result}")
                 continue
             
             index, embedding = result
@@ -90,6 +123,6 @@ class EmbeddingService:
 embedding_service = EmbeddingService()
 
 # Sync version for backward compatibility (if needed)
-def get_embeddings_batch_sync(texts: List[str], max_workers: int = 5) -> List[List[float]]:
+def get_embeddings_batch_sync(texts: List[str], max_workers: Optional[int] = None) -> List[List[float]]:
     """Sync wrapper for the async function"""
     return asyncio.run(embedding_service.get_embeddings_batch(texts, max_workers))
\ No newline at end of file
@@ -0,0 +1,135 @@
+import time
+import uuid
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cache.base_cache import BaseCache
+from config.settings import usage_config
+from services.cache_service import cache_service
+from services.usage_service import usage_scope
+from utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+jobs_total = metrics_registry.counter("jobs_total", "Background jobs by kind and final status", ["kind", "status"])
+job_seconds = metrics_registry.histogram(
+    "job_seconds", "Duration of background jobs", ["kind"], buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+)
+
+# job records kept in this worker when redis is unavailable
+LOCAL_JOB_LIMIT = 1000
+
+
+class JobService:
+    """
+    status and usage of background jobs (document ingestion, ...)
+
+    job records live in redis (not the memory tier: any worker may be asked for
+    the status) with a local copy in the worker running the job
+    """
+
+    def __init__(self, cache: Optional[BaseCache] = None):
+        self.cache = cache or cache_service.redis
+        self._local: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def _key(self, job_id: str) -> str:
+        return f"job:{job_id}"
+
+    async def _save(self, job: Dict[str, Any]):
+        self._local[job["job_id"]] = job
+        self._local.move_to_end(job["job_id"])
+        while len(self._local) > LOCAL_JOB_LIMIT:
+            self._local.popitem(last=False)
+        if not await self.cache.set(self._key(job["job_id"]), job, ttl=usage_config.job_ttl):
+            logger.warning(f"Job {job['job_id']} status not persisted to cache, only this worker can report it")
+
+    async def create(self, kind: str, **details) -> Dict[str, Any]:
+        """
+        register a queued job
+        args:
+            - kind: job type, e.g. "ingest_document"
+            - details: json-serializable parameters shown in the status (file_url, ...)
+        returns:
+            - the job record
+        """
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "kind": kind,
+            "status": "queued",
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "duration_seconds": None,
+            "error": None,
+            "details": details,
+            "result": None,
+            "usage": None,
+        }
+        await self._save(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = await self.cache.get(self._key(job_id))
+        return job or self._local.get(job_id)
+
+    async def update(self, job_id: str, **fields) -> Optional[Dict[str, Any]]:
+        job = self._local.get(job_id) or await self.get(job_id)
+        if job is None:
+            logger.warning(f"Unknown job {job_id}")
+            return None
+        job = {**job, **fields}
+        await self._save(job)
+        return job
+
+    async def run(
+        self,
+        job_id: str,
+        work: Callable[[], Awaitable[Any]],
+        summarize: Optional[Callable[[Any], Dict[str, Any]]] = None,
+    ) -> Any:
+        """
+        run a job, recording status, duration and the token usage of every
+        LLM / embedding call it makes
+        args:
+            - job_id: id from create()
+            - work: coroutine factory doing the job
+            - summarize: turns the result into the json-serializable "result" field
+        returns:
+            - the result of work(), None if it failed
+        """
+        job = await self.update(job_id, status="running", started_at=time.time())
+        kind = job["kind"] if job else "unknown"
+        started = time.perf_counter()
+        result, status, error = None, "completed", None
+
+        with usage_scope(job_id) as usage:
+            try:
+                result = await work()
+            except Exception as e:
+                status, error = "failed", str(e)
+                logger.error(f"Job {job_id} ({kind}) failed: {e}")
+
+        duration = time.perf_counter() - started
+        jobs_total.inc(kind=kind, status=status)
+        job_seconds.observe(duration, kind=kind)
+
+        summary = usage.summary()
+        logger.info(
+            f"Job {job_id} ({kind}) {status} in {duration:.1f}s, {summary['total_tokens']} tokens",
+            extra={"job_id": job_id, "usage": summary},
+        )
+        await self.update(
+            job_id,
+            status=status,
+            error=error,
+            finished_at=time.time(),
+            duration_seconds=round(duration, 3),
+            result=summarize(result) if (summarize and result is not None) else None,
+            usage=summary,
+        )
+        return result
+
+
+# singleton instance
+job_service = JobService()
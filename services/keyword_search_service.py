@@ -0,0 +1,192 @@
+import json
+import asyncio
+import logging
+from typing import List, Tuple, Any, Dict, Optional, Sequence
+
+from repositories.hana_repository import get_hana_db, HANA_SPAN_ATTRIBUTES
+from config.settings import retrieval_config
+from config.redis_config import redis_config
+from decorators.cache_decorators import cached
+from services.cache_service import cache_service
+from utils.metrics import time_stage
+from utils.tracing import traced, KIND_CLIENT
+from utils.text_search import BM25Scorer, tokenize, tokenize_query, build_contains_query
+
+logger = logging.getLogger(__name__)
+
+
+def _source_url(metadata: Any) -> Optional[str]:
+    """
+    source_url of a chunk (CHUNK_METADATA is stored as a JSON string)
+    """
+    if not isinstance(metadata, dict):
+        try:
+            metadata = json.loads(metadata) if metadata else {}
+        except (TypeError, ValueError):
+            return None
+    return metadata.get("source_url") if isinstance(metadata, dict) else None
+
+
+def _document_tags(hits: List[Dict[str, Any]]) -> List[str]:
+    """
+    invalidation tags of a cached document search: the chunks it returned and their
+    documents (a re-ingested document gets new ref_ids, only its source_url stays)
+    """
+    tags = [f"ref:{hit['ref_id']}" for hit in hits if hit.get("ref_id")]
+    tags += [f"source:{url}" for url in (_source_url(hit.get("metadata")) for hit in hits) if url]
+    return list(dict.fromkeys(tags))
+
+
+def _triplet_tags(hits: List[Tuple[str, str, str, float, List[str], List[str]]]) -> List[str]:
+    """
+    invalidation tags of a cached triplet search: the chunks the triplets were extracted from
+    and their documents
+    """
+    tags = [f"ref:{ref_id}" for *_triplet, ref_ids, _sources in hits for ref_id in ref_ids if ref_id]
+    tags += [f"source:{url}" for *_triplet, sources in hits for url in sources if url]
+    return list(dict.fromkeys(tags))
+
+
+class KeywordSearchService:
+    """
+    keyword retrieval over the HANA full-text indexes
+
+    the full-text index narrows the table down to candidates mentioning any query
+    term, the candidates are then re-ranked with BM25 and capped
+    """
+
+    def __init__(self):
+        self.cache = cache_service.default
+        self.scorer = BM25Scorer()
+
+    # ========================================
+    # TRIPLE STORE
+    # ========================================
+
+    @traced("hana.keyword_triplets", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+    @time_stage("keyword_triplets")
+    def search_triplets(self, query: str, limit: int = None) -> List[Tuple[str, str, str, float, List[str], List[str]]]:
+        """
+        ranked keyword search over TRIPLE_STORE
+
+        args:
+            - query: natural-language query
+            - limit: max results, defaults to GRAPH_KEYWORD_LIMIT
+        returns:
+            - list of (subject, predicate, object, score, ref_ids, source_urls) sorted by score desc,
+              ref_ids / source_urls being the chunks and documents the triplet was extracted from
+        raises:
+            - the database error, so a failed search is never cached as "no results"
+        """
+        terms = tokenize_query(query)
+        if not terms:
+            return []
+
+        limit = limit or retrieval_config.graph_keyword_limit
+        sql = f"""
+        SELECT SUBJECT, PREDICATE, OBJECT, EMB_REF_ID,
+               (SELECT JSON_VALUE(D.CHUNK_METADATA, '$.source_url')
+                FROM DOCUMENTS_EMBEDDING D
+                WHERE D.REF_ID = TRIPLE_STORE.EMB_REF_ID) AS SOURCE_URL
+        FROM TRIPLE_STORE
+        WHERE CONTAINS((SUBJECT, PREDICATE, OBJECT), ?, FUZZY(0.8))
+        ORDER BY SCORE() DESC
+        LIMIT {retrieval_config.keyword_candidate_limit}
+        """
+        rows = self._fetch(sql, [build_contains_query(terms)])
+
+        # the same fact is often extracted from several overlapping chunks
+        refs_by_triplet: Dict[Tuple[str, str, str], List[str]] = {}
+        sources_by_triplet: Dict[Tuple[str, str, str], List[str]] = {}
+        for subject, predicate, obj, ref_id, source_url in rows:
+            refs_by_triplet.setdefault((subject, predicate, obj), []).append(ref_id)
+            sources = sources_by_triplet.setdefault((subject, predicate, obj), [])
+            if source_url and source_url not in sources:
+                sources.append(source_url)
+        ranked = self._rank(terms, list(refs_by_triplet), lambda row: " ".join(str(v) for v in row if v))
+        return [
+            (s, p, o, score, refs_by_triplet[(s, p, o)], sources_by_triplet[(s, p, o)])
+            for (s, p, o), score in ranked[:limit]
+        ]
+
+    @cached(ttl=redis_config.search_ttl, key_prefix="search:triplets", tags=_triplet_tags)
+    async def search_triplets_async(self, query: str, limit: int = None) -> List[Tuple[str, str, str, float, List[str], List[str]]]:
+        """
+        non-blocking, cached variant for use inside the event loop
+        (evicted with the chunks / documents its triplets came from, see ContextService.invalidate_documents)
+        """
+        return await asyncio.to_thread(self.search_triplets, query, limit)
+
+    # ========================================
+    # DOCUMENT CHUNKS
+    # ========================================
+
+    @traced("hana.lexical_search", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+    @time_stage("lexical_search")
+    def search_documents(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        ranked keyword search over DOCUMENTS_EMBEDDING.document_text
+        (lexical leg of hybrid retrieval, catches exact terms like tickers or invoice numbers)
+
+        returns:
+            - list of {"ref_id", "text", "metadata", "bm25_score"} sorted by score desc
+        raises:
+            - the database error, so a failed search is never cached as "no results"
+        """
+        terms = tokenize_query(query)
+        if not terms:
+            return []
+
+        sql = f"""
+        SELECT REF_ID, DOCUMENT_TEXT, CHUNK_METADATA
+        FROM DOCUMENTS_EMBEDDING
+        WHERE CONTAINS(DOCUMENT_TEXT, ?, FUZZY(0.8))
+        ORDER BY SCORE() DESC
+        LIMIT {retrieval_config.keyword_candidate_limit}
+        """
+        rows = self._fetch(sql, [build_contains_query(terms)])
+        ranked = self._rank(terms, rows, lambda row: row[1] or "")
+
+        return [
+            {"ref_id": ref_id, "text": text, "metadata": metadata, "bm25_score": score}
+            for (ref_id, text, metadata), score in ranked[:top_k]
+        ]
+
+    @cached(ttl=redis_config.search_ttl, key_prefix="search:documents", tags=_document_tags)
+    async def search_documents_async(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        non-blocking, cached variant for use inside the event loop
+        (evicted with the documents it returned, see ContextService.invalidate_documents)
+        """
+        return await asyncio.to_thread(self.search_documents, query, top_k)
+
+    # ========================================
+    # INTERNALS
+    # ========================================
+
+    def _rank(self, terms: Sequence[str], rows: Sequence[Any], text_of) -> List[Tuple[Any, float]]:
+        """
+        BM25 re-rank of candidate rows
+
+        the sort is stable, so fuzzy-only matches (BM25 score 0) keep the order the
+        full-text index gave them, behind every exact term match
+        """
+        documents = [tokenize(text_of(row)) for row in rows]
+        scores = self.scorer.score(terms, documents)
+        ranked = list(zip(rows, scores))
+        ranked.sort(key=lambda item: item[1], reverse=True)
+        return ranked
+
+    def _fetch(self, sql: str, params: list) -> list:
+        # errors propagate: an empty result of a failed query would be cached for search_ttl
+        conn = get_hana_db()
+        cur = conn.connection.cursor()
+        try:
+            cur.execute(sql, params)
+            return cur.fetchall()
+        finally:
+            cur.close()
+
+
+# singleton instance
+keyword_search_service = KeywordSearchService()
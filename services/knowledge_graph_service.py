@@ -3,11 +3,21 @@ import json
 from agents.orchestrator import TripletOrchestrator
 from services.llm_service import get_llm_response_async
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Tuple
-from repositories.hana_repository import get_hana_db
+from typing import List, Tuple, Optional
+from repositories.hana_repository import get_hana_db, HANA_SPAN_ATTRIBUTES
+from config.settings import retrieval_config
+from services.keyword_search_service import keyword_search_service
+from utils.text_search import tokenize_query, build_contains_query
+from utils.metrics import time_stage
+from utils.tracing import traced, KIND_CLIENT
+from services.usage_service import usage_caller
 import asyncio
+import logging
 
+logger = logging.getLogger(__name__)
 
+
+@usage_caller("triplets")
 async def generate_triplets(text_chunk: str):
     """
     Uses an LLM via the Generative AI Hub SDK to extract RDF triplets
@@ -37,18 +47,18 @@ async def generate_triplets(text_chunk: str):
 
     try:
 
-        response_content = await get_llm_response_async(prompt=prompt_for_triplets)
+        response_content = await get_llm_response_async(prompt_for_triplets, temperature=0.0, json_mode=True)
         response_json = json.loads(response_content)
         triplets = response_json.get("triplets", [])
-        print(triplets)
+        logger.debug(f"extracted {len(triplets)} triplets", extra={"triplets": triplets})
         # converting the inner lists to tuples for consistency
         return [tuple(triplet) for triplet in triplets]
 
     except json.JSONDecodeError:
-        print("Failed to parse JSON response from LLM.")
+        logger.warning("Failed to parse JSON response from LLM.")
         return []
     except Exception as e:
-        print(f"An error occurred: {e}")
+        logger.error(f"An error occurred: {e}")
         return []
 
 
@@ -67,7 +77,7 @@ async def convert_corpus_to_triplets_async(
         if use_orchestrator:
             orchestrator = TripletOrchestrator()
             results = await orchestrator.process_corpus(corpus)
-            print("results from orchestrator:", results)
+            logger.debug(f"orchestrator extracted triplets for {len(results)} chunks", extra={"results": results})
             return results
         
         else:
@@ -80,7 +90,7 @@ async def convert_corpus_to_triplets_async(
             processed_results = []
             for i, result in enumerate(results):
                 if isinstance(result, Exception):
-                    print(f"Error processing chunk {i}: {result}")
+                    logger.error(f"Error processing chunk {i}: {result}")
                     processed_results.append([])
                 else:
                     processed_results.append(result)
@@ -88,7 +98,7 @@ async def convert_corpus_to_triplets_async(
             return processed_results
 
     except Exception as e:
-        print(f"Error in convert_corpus_to_triplets_async: {e}")
+        logger.error(f"Error in convert_corpus_to_triplets_async: {e}")
         return [[]] * len(corpus)
 
 
@@ -98,84 +108,170 @@ def convert_corpus_to_triplets(corpus: list) -> List[List[Tuple[str, str, str]]]
     return asyncio.run(convert_corpus_to_triplets_async(corpus))
 
 
-def get_triplets_by_chunks(ref_ids: list, query: str):
+def _build_graph_expansion_sql(
+    ref_count: int,
+    hops: int,
+    with_keyword: bool,
+    seed_limit: int,
+    hop_limit: int,
+    keyword_limit: int,
+    max_triplets: int,
+) -> str:
     """
-    getting triplets from specifc chunks + optional query expansion
+    build one query that returns chunk triplets, their n-hop entity neighbourhood
+    and keyword matches, deduplicated on (SUBJECT, PREDICATE, OBJECT)
+
+    HANA has no recursive CTEs, so every hop is unrolled into its own CTE:
+    ENTn collects the entities reached so far, HOPn the triplets touching them
+    """
+    ref_placeholders = ", ".join("?" for _ in range(ref_count))
+
+    ctes = [
+        f"""SEED AS (
+        SELECT ID, SUBJECT, PREDICATE, OBJECT, 0 AS HOP
+        FROM TRIPLE_STORE
+        WHERE EMB_REF_ID IN ({ref_placeholders})
+        ORDER BY CHUNK_INDEX, ID
+        LIMIT {seed_limit}
+    )"""
+    ]
+    branches = ["SELECT ID, SUBJECT, PREDICATE, OBJECT, HOP FROM SEED"]
+
+    previous = "SEED"
+    for hop in range(1, hops + 1):
+        ctes.append(
+            f"""ENT{hop} AS (
+        SELECT SUBJECT AS ENTITY FROM {previous}
+        UNION
+        SELECT OBJECT FROM {previous}
+    )"""
+        )
+        ctes.append(
+            f"""HOP{hop} AS (
+        SELECT T.ID, T.SUBJECT, T.PREDICATE, T.OBJECT, {hop} AS HOP
+        FROM TRIPLE_STORE T
+        WHERE T.SUBJECT IN (SELECT ENTITY FROM ENT{hop})
+        OR T.OBJECT IN (SELECT ENTITY FROM ENT{hop})
+        ORDER BY T.ID
+        LIMIT {hop_limit}
+    )"""
+        )
+        branches.append(f"SELECT ID, SUBJECT, PREDICATE, OBJECT, HOP FROM HOP{hop}")
+        previous = f"HOP{hop}"
+
+    if with_keyword:
+        # served by the FTI_TRIPLE_* full-text indexes
+        ctes.append(
+            f"""KEYWORD AS (
+        SELECT ID, SUBJECT, PREDICATE, OBJECT, 1 AS HOP
+        FROM TRIPLE_STORE
+        WHERE CONTAINS((SUBJECT, PREDICATE, OBJECT), ?, FUZZY(0.8))
+        ORDER BY SCORE() DESC
+        LIMIT {keyword_limit}
+    )"""
+        )
+        branches.append("SELECT ID, SUBJECT, PREDICATE, OBJECT, HOP FROM KEYWORD")
+
+    union_sql = "\n        UNION ALL\n        ".join(branches)
+    return f"""
+    WITH {", ".join(ctes)}
+    SELECT SUBJECT, PREDICATE, OBJECT, MIN(HOP) AS MIN_HOP, MIN(ID) AS FIRST_ID
+    FROM (
+        {union_sql}
+    ) AS EXPANDED
+    GROUP BY SUBJECT, PREDICATE, OBJECT
+    ORDER BY MIN_HOP, FIRST_ID
+    LIMIT {max_triplets}
     """
-    conn = get_hana_db()
 
-    # Build IN clause for ref_ids
-    ref_placeholders = ",".join(f"'{ref}'" for ref in ref_ids)
 
-    base_sql = f"""
-    SELECT SUBJECT, PREDICATE, OBJECT
-    FROM TRIPLE_STORE
-    WHERE EMB_REF_ID IN ({ref_placeholders})
-    ORDER BY CHUNK_INDEX, ID
-    LIMIT 200
+@traced("hana.graph_expansion", kind=KIND_CLIENT, **HANA_SPAN_ATTRIBUTES)
+@time_stage("graph_expansion")
+def get_triplets_by_chunks(ref_ids: list, query: str, hops: Optional[int] = None):
     """
+    getting triplets from specifc chunks + optional query expansion
+
+    chunk triplets, multi-hop entity expansion and keyword matches are fetched
+    in a single round trip
+    args:
+        - ref_ids: embedding ref_ids of the retrieved chunks
+        - query: user query used for keyword matching (optional)
+        - hops: entity expansion depth, defaults to GRAPH_EXPANSION_HOPS
+    """
+    if not ref_ids:
+        return []
+
+    hops = retrieval_config.graph_hops if hops is None else max(0, int(hops))
+    terms = tokenize_query(query) if query else []
+    keyword = build_contains_query(terms) if terms else ""
+
+    sql = _build_graph_expansion_sql(
+        ref_count=len(ref_ids),
+        hops=hops,
+        with_keyword=bool(keyword),
+        seed_limit=retrieval_config.graph_seed_limit,
+        hop_limit=retrieval_config.graph_hop_limit,
+        keyword_limit=retrieval_config.graph_keyword_limit,
+        max_triplets=retrieval_config.graph_max_triplets,
+    )
+    params = list(ref_ids) + ([keyword] if keyword else [])
 
+    conn = get_hana_db()
     triplets = []
     try:
-        df = conn.sql(base_sql).collect()
-        for _, row in df.iterrows():
-            triplets.append((row["SUBJECT"], row["PREDICATE"], row["OBJECT"]))
+        cur = conn.connection.cursor()
+        try:
+            cur.execute(sql, params)
+            for subject, predicate, obj, _hop, _first_id in cur.fetchall():
+                triplets.append((subject, predicate, obj))
+        finally:
+            cur.close()
     except Exception as e:
-        print(f"An error occurred: {e}")
-
-    # optional: expanding with query-related triplets
-    if query and triplets:
-        expanded = search_related_triplets(
-            query, existing_entities=[t[0] for t in triplets[:10]]
-        )
-        triplets.extend(expanded)
+        logger.error(f"error in graph expansion query: {e}")
 
     return triplets
 
 
 def search_related_triplets(query: str, existing_entities: list, limit: int = 50):
     """
-    searching triplets by keyword + entity expansion
-    """
-    conn = get_hana_db()
-    triplets = []
-
-    # keyword search in triplets
-    query_clean = query.replace("'", "''")
-    keyword_sql = f"""
-    SELECT SUBJECT, PREDICATE, OBJECT
-    FROM TRIPLE_STORE
-    WHERE SUBJECT LIKE '%{query_clean}%'
-    OR OBJECT LIKE '%{query_clean}%'
-    OR PREDICATE LIKE '%{query_clean}%'
-    LIMIT {limit}
+    searching triplets by ranked keyword search + entity expansion
     """
-
     try:
-        df = conn.sql(keyword_sql).collect()
-        for _, row in df.iterrows():
-            triplets.append((row["SUBJECT"], row["PREDICATE"], row["OBJECT"]))
+        triplets = [
+            (subject, predicate, obj)
+            for subject, predicate, obj, _score, _ref_ids, _sources in keyword_search_service.search_triplets(query, limit=limit)
+        ]
     except Exception as e:
-        print(f"error in keyword triplet search: {e}")
+        logger.error(f"error in keyword triplet search: {e}")
+        triplets = []
 
-    # entity expansion (finding triplets mentioning discovered entities)
-    if existing_entities:
-        entities_clean = [e.replace("'", "''") for e in existing_entities[:5]]
-        entities_placeholders = "','".join(entities_clean)
+    entities = [e for e in (existing_entities or [])[:5] if e]
+    if not entities:
+        return triplets
 
-        expansion_sql = f"""
+    placeholders = ", ".join("?" for _ in entities)
+    expansion_sql = f"""
     SELECT SUBJECT, PREDICATE, OBJECT
-    FROM TRIPLE_STORE 
-    WHERE SUBJECT IN ('{entities_placeholders}')
-    OR OBJECT IN ('{entities_placeholders}')
+    FROM TRIPLE_STORE
+    WHERE SUBJECT IN ({placeholders})
+    OR OBJECT IN ({placeholders})
     LIMIT {limit}
-"""
+    """
 
+    conn = get_hana_db()
     try:
-        df = conn.sql(expansion_sql).collect()
-        for _, row in df.iterrows():
-            triplets.append((row["SUBJECT"], row["PREDICATE"], row["OBJECT"]))
+        cur = conn.connection.cursor()
+        try:
+            cur.execute(expansion_sql, entities + entities)
+            seen = set(triplets)
+            for row in cur.fetchall():
+                triplet = tuple(row)
+                if triplet not in seen:
+                    seen.add(triplet)
+                    triplets.append(triplet)
+        finally:
+            cur.close()
     except Exception as e:
-        print(f"error in entity expansion triplet search: {e}")
+        logger.error(f"error in entity expansion triplet search: {e}")
 
     return triplets
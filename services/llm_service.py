@@ -1,59 +1,597 @@
-from gen_ai_hub.proxy.native.openai import chat
-from dotenv import load_dotenv
-from auth.oauth_token import get_access_token_async
-import requests
+"""
+Async client for chat completions on AI Core.
+
+Every LLM call of the service goes through here (agents, tools, RAG routes,
+MCP server), so connection pooling, response caching, request coalescing,
+deployment routing, throttling and usage accounting are handled in one place.
+
+Temperature-0 completions of the callers in LLM_CACHE_CALLERS (or with
+cache=True) are cached under a hash of model + request, so re-running
+extraction over an unchanged document makes no LLM calls.
+
+usage:
+    from services.llm_service import get_llm_response_async
+
+    answer = await get_llm_response_async(prompt, system_prompt="...", temperature=0.0, json_mode=True)
+
+    async for delta in stream_llm_response_async(prompt, max_tokens=500):
+        ...
+
+    answers = await get_llm_responses_batch(prompts, concurrency=4)
+
+    # structured output: the answer is constrained to (and validated against) a pydantic model
+    result = await get_structured_response_async(prompt, schema=AnalyzerResponse, temperature=0.0)
+
+    # function calling
+    message = await get_tool_calls_async(prompt, tools=[...])   # {"content", "tool_calls": [{"id", "name", "args"}]}
+
+    async for partial in stream_json_async(prompt, schema=AnalyzerResponse):
+        ...   # the document parsed so far
+"""
+
 import json
-load_dotenv()
-
-
-# function to get llm response
-# def get_llm_response(prompt: str, model_name: str):
-#     """
-#     args: prompt
-#     returns: LLM response augemented using prompt
-#     """
-#     # response = chat.completions.create(
-#     #     model_name=model_name,
-#     #     messages=[
-#     #         {"role": "system", "content": "You are a helpful assistant."},
-#     #         {"role": "user", "content": prompt},
-#     #     ],
-#     #     temperature=0.0,
-#     #     max_tokens=500,
-#     # )
-
-#     return "response.choices[0].message.content"
-
-import aiohttp
+import time
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
 from auth.oauth_token import get_access_token_async
+from cache.single_flight import DistributedSingleFlight, SingleFlight
+from config.settings import llm_config
+from config.redis_config import redis_config
+from services.cache_service import cache_service
+from services.context_assembler import estimate_tokens
+from services.model_router import Deployment, chat_router
+from services.usage_service import current_caller, record_usage, record_response_usage
+from utils.http_client import get_session
+from utils.json_parser import parse_json, parse_partial_json
+from utils.metrics import metrics_registry
+from utils.resilience import raise_for_status
+from utils.tracing import tracer, inject_headers, KIND_CLIENT
+
+logger = logging.getLogger(__name__)
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+# stream deltas that may complete a value of a streamed JSON document
+_JSON_VALUE_ENDS = set(',]}"')
+
+cache_requests_total = metrics_registry.counter(
+    "llm_cache_requests_total", "LLM response cache lookups by caller and result", ["caller", "result"]
+)
+
+
+def _headers(access_token: str, resource_group: str, accept: str = "application/json") -> dict:
+    return inject_headers({
+        "AI-Resource-Group": resource_group,
+        "Accept": accept,
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {access_token}",
+    })
+
+
+def build_messages(
+    prompt: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+    messages: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    chat messages from a system prompt, earlier messages and the user prompt
+    """
+    built = [{"role": "system", "content": system_prompt}] if system_prompt else []
+    built.extend(messages or [])
+    if prompt is not None:
+        built.append({"role": "user", "content": prompt})
+    if not built:
+        raise ValueError("A prompt or messages are required")
+    return built
+
+
+def build_payload(
+    prompt: Optional[str] = None,
+    system_prompt: Optional[str] = None,
+    messages: Optional[List[Dict[str, Any]]] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+    json_mode: bool = False,
+    stop: Optional[Union[str, List[str]]] = None,
+    response_format: Optional[Dict[str, Any]] = None,
+    tools: Optional[List[Dict[str, Any]]] = None,
+    tool_choice: Optional[Union[str, Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    chat-completions request body; unset options are left to the deployment's defaults
+    """
+    payload: Dict[str, Any] = {"messages": build_messages(prompt, system_prompt, messages)}
+    if temperature is not None:
+        payload["temperature"] = temperature
+    if max_tokens is not None:
+        payload["max_tokens"] = max_tokens
+    if response_format:
+        payload["response_format"] = response_format
+    elif json_mode:
+        # the model must also be told to answer in JSON, which the prompts already do
+        payload["response_format"] = {"type": "json_object"}
+    if stop:
+        payload["stop"] = stop
+    if tools:
+        payload["tools"] = tools
+        if tool_choice:
+            payload["tool_choice"] = tool_choice
+    return payload
+
+
+def _strict_schema(node: Any) -> Any:
+    # strict mode: every object closed and every property required, no defaults
+    if isinstance(node, list):
+        return [_strict_schema(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    strict = {}
+    for key, value in node.items():
+        if key == "default":
+            continue
+        if key in ("properties", "$defs"):
+            strict[key] = {name: _strict_schema(subschema) for name, subschema in value.items()}
+        else:
+            strict[key] = _strict_schema(value)
+    if strict.get("type") == "object":
+        strict["additionalProperties"] = False
+        strict["required"] = list(strict.get("properties", {}))
+    return strict
+
+
+def json_schema_format(schema: Type[BaseModel], strict: bool = True) -> Dict[str, Any]:
+    """
+    response_format constraining the answer to a pydantic model's JSON schema (structured outputs)
+    """
+    json_schema = schema.model_json_schema()
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema.__name__,
+            "schema": _strict_schema(json_schema) if strict else json_schema,
+            "strict": strict,
+        },
+    }
+
+
+def tool_spec(schema: Type[BaseModel], name: Optional[str] = None, description: Optional[str] = None) -> Dict[str, Any]:
+    """
+    function-calling tool whose arguments are a pydantic model
+    """
+    return {
+        "type": "function",
+        "function": {
+            "name": name or schema.__name__,
+            "description": description or (schema.__doc__ or "").strip(),
+            "parameters": schema.model_json_schema(),
+        },
+    }
+
+
+def _structured_options(schema: Type[BaseModel], system_prompt: Optional[str]) -> Dict[str, Any]:
+    if llm_config.structured_outputs:
+        return {"system_prompt": system_prompt, "response_format": json_schema_format(schema)}
+    # JSON mode only guarantees valid JSON; the schema goes into the prompt
+    instructions = (
+        "Answer with a single JSON object that conforms to this JSON schema:\n"
+        f"{json.dumps(schema.model_json_schema())}"
+    )
+    return {"system_prompt": "\n\n".join(filter(None, [system_prompt, instructions])), "json_mode": True}
+
+
+def _parse_structured(schema: Type[SchemaT], content: Optional[str]) -> SchemaT:
+    data = parse_json(content)
+    if data is None:
+        raise ValueError(f"No JSON in the {schema.__name__} answer: {(content or '')[:200]}")
+    return schema.model_validate(data)
+
+
+def _parse_tool_calls(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    tool_calls = []
+    for tool_call in message.get("tool_calls") or []:
+        function = tool_call.get("function") or {}
+        args = parse_json(function.get("arguments") or "{}")
+        if not isinstance(args, dict):
+            logger.warning(f"Invalid arguments for tool call {function.get('name')}: {function.get('arguments')}")
+            args = {}
+        tool_calls.append({"id": tool_call.get("id"), "name": function.get("name"), "args": args})
+    return tool_calls
+
 
 class LLMService:
     """
     LLM service
     """
 
-    async def get_llm_response_async(prompt: str):
-        url = "https://api.ai.prod.eu-central-1.aws.ml.hana.ondemand.com/v2/inference/deployments/d5903e0d176ce0e4/chat/completions?api-version=2023-05-15"
-        access_token = await get_access_token_async()
+    def __init__(self):
+        self.cache = cache_service.default
+        # cacheable requests coalesce across workers (the others wait for the cached answer),
+        # the rest only within this one
+        self._single_flight = SingleFlight()
+        self._distributed_flight = DistributedSingleFlight(self.cache)
+        # picks / fails over between the chat deployments (each with its own rate limit and retries)
+        self.router = chat_router
+
+    def cache_key(self, payload: Dict[str, Any]) -> str:
+        """
+        hash of the request and of the models it may be routed to (a model change must miss)
+        """
+        models = sorted({deployment.model for deployment in self.router.deployments})
+        request = json.dumps({"models": models, **payload}, sort_keys=True)
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def _use_cache(self, payload: Dict[str, Any], caller: Optional[str], cache: Optional[bool]) -> bool:
+        # only deterministic calls; sampled answers are meant to differ
+        if not llm_config.cache_enabled or payload.get("temperature") != 0:
+            return False
+        if cache is not None:
+            return cache
+        return (caller or current_caller()) in llm_config.cache_callers
+
+    async def complete(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        system_prompt: Optional[str] = None,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        stop: Optional[Union[str, List[str]]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        caller: Optional[str] = None,
+        cache: Optional[bool] = None,
+    ) -> str:
+        """
+        get a chat completion
+        concurrent calls with the same request share one upstream call
+
+        args:
+            - prompt: user message (appended after `messages`)
+            - system_prompt: system message
+            - messages: earlier chat messages ({"role", "content"})
+            - temperature, max_tokens, stop: sampling options, deployment defaults when None
+            - json_mode: ask for a JSON object answer (response_format json_object)
+            - response_format: explicit response_format (e.g. json_schema_format()), wins over json_mode
+            - caller: usage tag, defaults to the caller of the current context
+            - cache: use the response cache; by default on for temperature 0 calls of
+              LLM_CACHE_CALLERS (never for other temperatures)
+        returns:
+            - the assistant message content
+        """
+        payload = build_payload(
+            prompt, system_prompt, messages, temperature, max_tokens, json_mode, stop, response_format
+        )
+        message = await self._complete_message(payload, caller, cache)
+        return message.get("content")
+
+    async def complete_structured(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        schema: Type[SchemaT],
+        system_prompt: Optional[str] = None,
+        **options,
+    ) -> SchemaT:
+        """
+        get a completion constrained to a pydantic model's JSON schema (structured outputs)
+
+        args:
+            - prompt, system_prompt: as in complete()
+            - schema: pydantic model of the answer
+            - options: other keyword options of complete()
+        returns:
+            - the validated answer
+        raises:
+            - ValueError: the answer is not a valid instance of `schema` (a refusal or a
+              truncated answer); pydantic's ValidationError is a ValueError
+        """
+        options.update(_structured_options(schema, system_prompt))
+        caller = options.pop("caller", None)
+        cache = options.pop("cache", None)
+
+        # validated before it is cached: a rejected answer must not be replayed to the retries
+        return await self._complete_message(
+            build_payload(prompt, **options),
+            caller,
+            cache,
+            parse=lambda message: _parse_structured(schema, message.get("content")),
+        )
+
+    async def complete_with_tools(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        tools: List[Dict[str, Any]],
+        tool_choice: Union[str, Dict[str, Any]] = "auto",
+        system_prompt: Optional[str] = None,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        caller: Optional[str] = None,
+        cache: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        get a completion that may call functions (function calling)
+
+        args:
+            - tools: OpenAI tool specs ({"type": "function", "function": {...}}, see tool_spec())
+            - tool_choice: "auto", "required", "none" or a specific function
+            - other args as in complete()
+        returns:
+            - {"content": text or None, "tool_calls": [{"id", "name", "args": dict}]}
+        """
+        payload = build_payload(
+            prompt, system_prompt, messages, temperature, max_tokens, tools=tools, tool_choice=tool_choice
+        )
+        return await self._complete_message(
+            payload,
+            caller,
+            cache,
+            parse=lambda message: {"content": message.get("content"), "tool_calls": _parse_tool_calls(message)},
+        )
+
+    async def _complete_message(
+        self,
+        payload: Dict[str, Any],
+        caller: Optional[str],
+        cache: Optional[bool],
+        parse: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    ) -> Any:
+        """
+        assistant message of the request: cached, or shared with identical calls in flight
+
+        args:
+            - parse: turns the message into the caller's result; raising (ValueError)
+              rejects the answer, which is then not cached
+        returns:
+            - parse(message), the message ({"content", "tool_calls"}) without parse
+        """
+        parse = parse or (lambda message: message)
+        request_hash = self.cache_key(payload)
+
+        use_cache = self._use_cache(payload, caller, cache)
+        if use_cache:
+            cache_key = self.cache.make_key("llm", request_hash)
+            cached = await self.cache.get(cache_key)
+            result = "miss"
+            if cached is not None:
+                try:
+                    # entries cached before tool calls were supported hold the content only
+                    parsed = parse({"content": cached} if isinstance(cached, str) else cached)
+                    result = "hit"
+                except ValueError as e:
+                    logger.warning(f"Evicting cached LLM response the caller rejects: {e}")
+                    await self.cache.delete(cache_key)
+            cache_requests_total.inc(caller=caller or current_caller() or "unknown", result=result)
+            if result == "hit":
+                return parsed
+
+        async def fetch() -> Dict[str, Any]:
+            response_data = await self._request_completion(payload, caller)
+            choice = response_data["choices"][0]
+            message = {"content": choice["message"].get("content")}
+            if choice["message"].get("tool_calls"):
+                message["tool_calls"] = choice["message"]["tool_calls"]
 
+            # filtered and truncated answers are not what the same request yields next time
+            answered = message["content"] or message.get("tool_calls")
+            if use_cache and answered and choice.get("finish_reason") not in ("content_filter", "length"):
+                try:
+                    parse(message)
+                except ValueError:
+                    return message
+                # stored before the lock is released, workers waiting on it read it from here
+                await self.cache.set(cache_key, message, ttl=redis_config.llm_response_ttl)
+            return message
+
+        flight_key = f"llm:{request_hash}"
+        if use_cache:
+            message = await self._distributed_flight.do(flight_key, fetch, result_key=cache_key)
+        else:
+            message = await self._single_flight.do(flight_key, fetch)
+        return parse(message)
+
+    async def _request_completion(self, payload: Dict[str, Any], caller: Optional[str] = None) -> Dict[str, Any]:
+        async with tracer.span(
+            "http.llm.chat_completion",
+            kind=KIND_CLIENT,
+            prompt_chars=sum(len(message.get("content") or "") for message in payload["messages"]),
+        ) as span:
+            async def attempt(deployment: Deployment):
+                access_token = await get_access_token_async()
+                started = time.perf_counter()
+                async with get_session().post(
+                    deployment.url, headers=_headers(access_token, deployment.resource_group), json=payload
+                ) as response:
+                    span.set_attributes(**{"http.status_code": response.status, "llm.deployment": deployment.deployment_id})
+                    await raise_for_status(response)
+                    response_data = await response.json()
+                    record_response_usage(deployment.model, response_data, time.perf_counter() - started, caller=caller)
+                    return response_data
+
+            response_data = await self.router.call(attempt)
+            span.set_attributes(**{
+                "llm.prompt_tokens": (response_data.get("usage") or {}).get("prompt_tokens"),
+                "llm.completion_tokens": (response_data.get("usage") or {}).get("completion_tokens"),
+            })
+            return response_data
+
+    async def stream(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        system_prompt: Optional[str] = None,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        json_mode: bool = False,
+        stop: Optional[Union[str, List[str]]] = None,
+        response_format: Optional[Dict[str, Any]] = None,
+        caller: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """
+        stream a chat completion, yielding content deltas as they arrive
+        (chat-completions "stream" mode, server-sent events); options as in complete()
+
+        the stream carries no usage block, so tokens are recorded as estimates
+        under `caller` (an async generator can't rely on the caller tag of its context)
+        """
         payload = {
-            "messages": [
-                {"role": "user", "content": prompt}
-            ]
+            **build_payload(prompt, system_prompt, messages, temperature, max_tokens, json_mode, stop, response_format),
+            "stream": True,
         }
+        prompt_text = "".join(message.get("content") or "" for message in payload["messages"])
 
-        headers = {
-            "AI-Resource-Group": "demo",
-            "Accept": "application/json",
-            "Content-Type": "application/json", 
-            "Authorization": f"Bearer {access_token}",
-        }
+        # not made the current span: an async generator's context is the consumer's
+        span = tracer.start_span("http.llm.chat_completion.stream", kind=KIND_CLIENT, attributes={"prompt_chars": len(prompt_text)})
+        completion = []
+        model = llm_config.model_name   # replaced by the deployment that serves the stream
+        started = time.perf_counter()
+        try:
+            access_token = await get_access_token_async()
+
+            async def open_stream(deployment: Deployment):
+                nonlocal model
+                headers = {
+                    **_headers(access_token, deployment.resource_group, accept="text/event-stream"),
+                    "traceparent": span.traceparent,
+                }
+                response = await get_session().post(deployment.url, headers=headers, json=payload)
+                try:
+                    await raise_for_status(response)
+                except Exception:
+                    response.release()
+                    raise
+                model = deployment.model
+                span.set_attribute("llm.deployment", deployment.deployment_id)
+                return response
+
+            # only opening the stream is retried / failed over (never hedged): once
+            # deltas are yielded a second request would repeat them to the consumer
+            response = await self.router.call(open_stream, hedge=False)
+            try:
+                # one "data: {...}" line per event, terminated by "data: [DONE]"
+                async for raw_line in response.content:
+                    line = raw_line.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+
+                    event = json.loads(data)
+                    choices = event.get("choices") or []
+                    if not choices:
+                        continue  # e.g. the initial content-filter event on Azure OpenAI
+                    delta = (choices[0].get("delta") or {}).get("content")
+                    if delta:
+                        completion.append(delta)
+                        yield delta
+            finally:
+                response.release()
+        except Exception as e:
+            span.record_exception(e)
+            raise
+        finally:
+            span.set_attribute("chunks", len(completion))
+            tracer.end_span(span)
+            record_usage(
+                model=model,
+                prompt_tokens=estimate_tokens(prompt_text),
+                completion_tokens=estimate_tokens("".join(completion)),
+                latency_seconds=time.perf_counter() - started,
+                caller=caller,
+                estimated=True,
+            )
+
+    async def stream_json(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        schema: Optional[Type[BaseModel]] = None,
+        system_prompt: Optional[str] = None,
+        **options,
+    ) -> AsyncIterator[Any]:
+        """
+        stream a JSON answer, yielding the document parsed so far whenever a value completes
+        (the last one yielded is the full answer); not validated against `schema`
+
+        args:
+            - schema: pydantic model constraining the answer, plain JSON mode when None
+            - options: other keyword options of stream()
+        """
+        if schema is not None:
+            options.update(_structured_options(schema, system_prompt))
+        else:
+            options.update(system_prompt=system_prompt, json_mode=True)
+
+        buffer = ""
+        last = None
+        async for delta in self.stream(prompt, **options):
+            buffer += delta
+            # re-parsing the prefix is linear, so only when a value may have completed
+            if not _JSON_VALUE_ENDS.intersection(delta):
+                continue
+            partial = parse_partial_json(buffer)
+            if partial is not None and partial != last:
+                last = partial
+                yield partial
+
+        final = parse_json(buffer, partial=True)
+        if final is not None and final != last:
+            yield final
+
+    async def complete_batch(
+        self,
+        prompts: List[str],
+        concurrency: Optional[int] = None,
+        **options,
+    ) -> List[Optional[str]]:
+        """
+        complete several prompts concurrently (same options for all)
+
+        args:
+            - prompts: user prompts
+            - concurrency: optional cap on calls in flight; the chat deployments'
+              guards throttle to the quota either way
+            - options: keyword options of complete()
+        returns:
+            - completions aligned with the prompts, None where a call failed
+        """
+        semaphore = asyncio.Semaphore(concurrency) if concurrency else None
+
+        async def run_single(prompt: str) -> str:
+            if semaphore is None:
+                return await self.complete(prompt, **options)
+            async with semaphore:
+                return await self.complete(prompt, **options)
+
+        results = await asyncio.gather(*(run_single(prompt) for prompt in prompts), return_exceptions=True)
+
+        completions: List[Optional[str]] = []
+        for index, result in enumerate(results):
+            if isinstance(result, Exception):
+                logger.error(f"Batch completion {index} failed: {result}")
+                completions.append(None)
+            else:
+                completions.append(result)
+        return completions
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(url, headers=headers, json=payload) as response:
-                response_data = await response.json()
-                return response_data["choices"][0]["message"]["content"]
-        
 
 # singleton instance
-llm_service = LLMService()
\ No newline at end of file
+llm_service = LLMService()
+
+# module-level API
+get_llm_response_async = llm_service.complete
+stream_llm_response_async = llm_service.stream
+get_llm_responses_batch = llm_service.complete_batch
+get_structured_response_async = llm_service.complete_structured
+get_tool_calls_async = llm_service.complete_with_tools
+stream_json_async = llm_service.stream_json
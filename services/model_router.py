@@ -0,0 +1,280 @@
+"""
+Routing of chat / embedding requests over several AI Core deployments.
+
+Deployments come from config (LLM_DEPLOYMENTS / EMBEDDING_DEPLOYMENTS). Each
+has its own resilience guard and latency / error statistics. A request goes to
+the deployment with the best score (EWMA latency weighted by error rate) and
+fails over to the next one when it errors. When hedging is enabled for a
+capability and the first request outlives that deployment's p95, a duplicate
+is sent to the runner-up and the first answer wins.
+
+usage:
+    data = await chat_router.call(lambda deployment: post(deployment.url, ...))
+"""
+
+import time
+import random
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from auth.oauth_token import get_access_token_async
+from config.settings import routing_config, llm_config
+from models.model_config import create_configuration
+from models.model_deployment import create_deployment
+from utils.metrics import metrics_registry
+from utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    EndpointGuard,
+    UpstreamError,
+    get_endpoint_guard,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+route_requests_total = metrics_registry.counter(
+    "model_route_requests_total", "Requests per deployment and outcome", ["capability", "deployment", "outcome"]
+)
+route_failovers_total = metrics_registry.counter(
+    "model_route_failovers_total", "Requests moved to another deployment after an error", ["capability"]
+)
+route_hedges_total = metrics_registry.counter(
+    "model_route_hedges_total", "Hedged requests by winner (primary/hedge)", ["capability", "winner"]
+)
+
+# inference paths per capability (appended to <api_url>/v2/inference/deployments/<id>)
+INFERENCE_PATHS = {
+    "chat": "/chat/completions",
+    "embedding": "/embeddings",
+}
+
+DEFAULT_MODELS = {
+    "chat": llm_config.model_name,
+    "embedding": "text-embedding-3-large",
+}
+
+class _HedgeFailed(Exception):
+    """both requests of a hedge failed: the backup deployment is used up too"""
+
+    def __init__(self, error: BaseException):
+        super().__init__(str(error))
+        self.error = error
+
+
+# request errors every deployment would reject the same way
+_NO_FAILOVER_STATUSES = {400, 413, 422}
+
+
+class Deployment:
+    """
+    one AI Core deployment of a capability and its routing statistics
+    """
+
+    def __init__(self, capability: str, deployment_id: str, resource_group: str, model: Optional[str] = None):
+        self.capability = capability
+        self.deployment_id = deployment_id
+        self.resource_group = resource_group
+        self.model = model or DEFAULT_MODELS.get(capability)
+        self.url = (
+            f"{routing_config.api_url}/v2/inference/deployments/{deployment_id}"
+            f"{INFERENCE_PATHS[capability]}?api-version={routing_config.api_versions[capability]}"
+        )
+        self.guard: EndpointGuard = get_endpoint_guard(f"{capability}:{deployment_id}")
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+        self.latencies: deque = deque(maxlen=routing_config.latency_window)
+
+    @property
+    def available(self) -> bool:
+        breaker = self.guard.breaker
+        return breaker.state != CircuitBreaker.OPEN or breaker.retry_in == 0
+
+    def score(self) -> float:
+        """
+        lower is better (~seconds); unmeasured deployments go first so they get
+        measured, unless all they did so far is fail
+        """
+        if not self.available:
+            return float("inf")
+        if self.latency_ewma is None:
+            return routing_config.error_penalty * self.error_rate
+        return self.latency_ewma * (1 + routing_config.error_penalty * self.error_rate)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if len(self.latencies) < routing_config.hedge_min_samples:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def record(self, latency: Optional[float], ok: bool):
+        alpha = routing_config.ewma_alpha
+        self.error_rate = (1 - alpha) * self.error_rate + alpha * (0.0 if ok else 1.0)
+        if ok and latency is not None:
+            self.latencies.append(latency)
+            self.latency_ewma = latency if self.latency_ewma is None else (1 - alpha) * self.latency_ewma + alpha * latency
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "deployment_id": self.deployment_id,
+            "resource_group": self.resource_group,
+            "model": self.model,
+            "latency_ewma": round(self.latency_ewma, 4) if self.latency_ewma is not None else None,
+            "latency_p95": self.quantile(0.95),
+            "error_rate": round(self.error_rate, 4),
+            **self.guard.stats(),
+        }
+
+
+class ModelRouter:
+    """
+    picks, fails over and hedges between the deployments of one capability
+    """
+
+    def __init__(self, capability: str, deployments: List[Deployment]):
+        self.capability = capability
+        self.deployments = deployments
+        self.hedging = capability in routing_config.hedge_capabilities
+
+    def add_deployment(self, deployment_id: str, resource_group: str, model: Optional[str] = None) -> Deployment:
+        deployment = Deployment(self.capability, deployment_id, resource_group, model)
+        self.deployments.append(deployment)
+        return deployment
+
+    def ranked(self) -> List[Deployment]:
+        """
+        deployments by score; now and then a random one goes first to refresh its stats
+        """
+        ranked = sorted(self.deployments, key=lambda d: d.score())
+        if len(ranked) > 1 and random.random() < routing_config.explore_ratio:
+            pick = random.choice([d for d in ranked[1:] if d.available] or ranked[:1])
+            ranked.remove(pick)
+            ranked.insert(0, pick)
+        return ranked
+
+    async def _attempt(self, deployment: Deployment, fn: Callable[[Deployment], Awaitable[T]], last: bool) -> T:
+        # with a fallback left, don't burn time retrying here: the next deployment has its own quota
+        started = time.perf_counter()
+        try:
+            result = await deployment.guard.call(lambda: fn(deployment), max_attempts=None if last else 1)
+        except asyncio.CancelledError:
+            raise
+        except CircuitOpenError:
+            route_requests_total.inc(capability=self.capability, deployment=deployment.deployment_id, outcome="circuit_open")
+            raise
+        except Exception:
+            deployment.record(None, ok=False)
+            route_requests_total.inc(capability=self.capability, deployment=deployment.deployment_id, outcome="error")
+            raise
+        deployment.record(time.perf_counter() - started, ok=True)
+        route_requests_total.inc(capability=self.capability, deployment=deployment.deployment_id, outcome="ok")
+        return result
+
+    async def _hedged(self, primary: Deployment, backup: Deployment, fn: Callable[[Deployment], Awaitable[T]]) -> T:
+        delay = max(routing_config.hedge_min_delay, primary.quantile(routing_config.hedge_quantile))
+        first = asyncio.ensure_future(self._attempt(primary, fn, last=False))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                # a fast error is an ordinary failure, the caller fails over to the backup
+                return first.result()
+
+            # primary slower than its p95: race it against the runner-up
+            pending.add(asyncio.ensure_future(self._attempt(backup, fn, last=False)))
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                errors = [task.exception() for task in done if task.exception() is not None]
+                winners = [task for task in done if task.exception() is None]
+                if winners:
+                    route_hedges_total.inc(capability=self.capability, winner="primary" if winners[0] is first else "hedge")
+                    return winners[0].result()
+                error = errors[0]
+            raise _HedgeFailed(error)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(self, fn: Callable[[Deployment], Awaitable[T]], hedge: bool = True) -> T:
+        """
+        run one request against the best deployment, failing over on errors
+
+        args:
+            - fn: coroutine factory doing one HTTP attempt against the given deployment
+              (raises the typed errors of utils.resilience.raise_for_status)
+            - hedge: allow a duplicate request (off for streams and other non-idempotent calls)
+        returns:
+            - fn's result from the first deployment that succeeds
+        """
+        ranked = self.ranked()
+        if not ranked:
+            raise UpstreamError(f"No {self.capability} deployment configured")
+
+        last_error: Optional[Exception] = None
+        index = 0
+        while index < len(ranked):
+            deployment = ranked[index]
+            is_last = index == len(ranked) - 1
+            backup = ranked[index + 1] if not is_last else None
+            try:
+                if (
+                    hedge and self.hedging and backup is not None and backup.available
+                    and deployment.quantile(routing_config.hedge_quantile) is not None
+                ):
+                    try:
+                        return await self._hedged(deployment, backup, fn)
+                    except _HedgeFailed as e:
+                        index += 1   # the backup was used by the hedge
+                        raise e.error from None
+                return await self._attempt(deployment, fn, last=is_last)
+            except UpstreamError as e:
+                if not isinstance(e, CircuitOpenError) and e.status in _NO_FAILOVER_STATUSES:
+                    raise
+                last_error = e
+            except Exception as e:
+                last_error = e
+            index += 1
+            if index < len(ranked):
+                route_failovers_total.inc(capability=self.capability)
+                logger.warning(f"{self.capability}: {deployment.deployment_id} failed ({last_error}), failing over")
+        raise last_error
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [deployment.stats() for deployment in self.deployments]
+
+
+def _build_router(capability: str) -> ModelRouter:
+    return ModelRouter(
+        capability,
+        [Deployment(capability, **deployment) for deployment in routing_config.deployments[capability]],
+    )
+
+
+async def provision_deployment(capability: str, model_name: str, resource_group: Optional[str] = None) -> Deployment:
+    """
+    create an AI Core configuration + deployment for a model and add it to the router
+    (it fails over to the others until AI Core reports it running)
+
+    args:
+        - capability: "chat" or "embedding"
+        - model_name: foundation model, e.g. "gpt-4o-mini"
+        - resource_group: defaults to AI_RESOURCE_GROUP
+    returns:
+        - the routed deployment
+    """
+    resource_group = resource_group or routing_config.resource_group
+    access_token = await get_access_token_async()
+    configuration_id = await asyncio.to_thread(create_configuration, access_token, model_name, resource_group)
+    deployment_id = await asyncio.to_thread(create_deployment, access_token, configuration_id, resource_group)
+    logger.info(f"Provisioned {capability} deployment {deployment_id} for {model_name}")
+    return routers[capability].add_deployment(deployment_id, resource_group, model_name)
+
+
+# singleton instances
+chat_router = _build_router("chat")
+embedding_router = _build_router("embedding")
+routers = {"chat": chat_router, "embedding": embedding_router}
@@ -0,0 +1,174 @@
+import asyncio
+import json
+import time
+import logging
+from typing import Any, Dict, List, Optional
+
+from config.settings import retrieval_config
+from repositories.hana_repository import search_similiar_documents
+from services.embedding_service import embedding_service
+from services.keyword_search_service import keyword_search_service
+from utils.text_search import reciprocal_rank_fusion
+from utils.metrics import time_stage
+from utils.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_metadata(raw: Any) -> Dict[str, Any]:
+    """
+    CHUNK_METADATA is stored as a JSON string
+    """
+    if isinstance(raw, dict):
+        return raw
+    try:
+        return json.loads(raw) if raw else {}
+    except (TypeError, ValueError):
+        return {}
+
+
+class HybridRetriever:
+    """
+    hybrid lexical + vector retrieval
+
+    both legs run concurrently (latency is the slower leg, not the sum) and are
+    fused with reciprocal rank fusion keyed on the chunk ref_id
+    """
+
+    @traced("rag.hybrid_retrieval")
+    @time_stage("retrieval")
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int = 5,
+        query_embedding: Optional[List[float]] = None,
+    ) -> Dict[str, Any]:
+        """
+        args:
+            - query: user query
+            - top_k: number of fused chunks to return
+            - query_embedding: precomputed query embedding (skips the embedding call)
+        returns:
+            - {"chunks": [...], "latencies_ms": {...}}
+              each chunk: ref_id, text, metadata, similarity, bm25_score, rrf_score, ranks
+        """
+        started = time.perf_counter()
+        latencies: Dict[str, float] = {}
+        leg_size = max(top_k, top_k * retrieval_config.hybrid_leg_multiplier)
+
+        legs = [self._timed("vector", self._vector_leg(query, leg_size, query_embedding, latencies), latencies)]
+        if retrieval_config.hybrid_enabled:
+            legs.append(self._timed("lexical", keyword_search_service.search_documents_async(query, leg_size), latencies))
+
+        results = await asyncio.gather(*legs, return_exceptions=True)
+
+        vector_hits = self._leg_result("vector", results[0])
+        lexical_hits = self._leg_result("lexical", results[1]) if len(results) > 1 else []
+
+        chunks = self._fuse(vector_hits, lexical_hits, top_k)
+        latencies["total"] = round((time.perf_counter() - started) * 1000, 2)
+
+        logger.info(
+            f"hybrid retrieval: {len(vector_hits)} vector + {len(lexical_hits)} lexical hits "
+            f"-> {len(chunks)} chunks, latencies_ms={latencies}"
+        )
+        return {"chunks": chunks, "latencies_ms": latencies}
+
+    # ========================================
+    # LEGS
+    # ========================================
+
+    async def _vector_leg(
+        self,
+        query: str,
+        limit: int,
+        query_embedding: Optional[List[float]],
+        latencies: Dict[str, float],
+    ) -> List[Dict[str, Any]]:
+        if query_embedding is None:
+            embedding_started = time.perf_counter()
+            query_embedding = await embedding_service.get_embedding(query)
+            latencies["embedding"] = round((time.perf_counter() - embedding_started) * 1000, 2)
+
+        df = await search_similiar_documents(query_embedding, top_k=limit)
+        if df is None or df.empty:
+            return []
+
+        hits = []
+        for _, row in df.iterrows():
+            hits.append(
+                {
+                    "ref_id": row.get("REF_ID"),
+                    "text": row.get("DOCUMENT_TEXT", ""),
+                    "metadata": _parse_metadata(row.get("CHUNK_METADATA")),
+                    "similarity": float(row.get("SIMILARITY", 0) or 0),
+                }
+            )
+        return hits
+
+    async def _timed(self, name: str, coro, latencies: Dict[str, float]):
+        """
+        run a leg and record its wall-clock latency in ms
+        """
+        started = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            latencies[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def _leg_result(self, name: str, result: Any) -> List[Dict[str, Any]]:
+        """
+        a failing leg degrades retrieval instead of failing the request
+        """
+        if isinstance(result, Exception):
+            logger.error(f"{name} retrieval leg failed: {result}")
+            return []
+        return result or []
+
+    # ========================================
+    # FUSION
+    # ========================================
+
+    def _fuse(
+        self,
+        vector_hits: List[Dict[str, Any]],
+        lexical_hits: List[Dict[str, Any]],
+        top_k: int,
+    ) -> List[Dict[str, Any]]:
+        chunks: Dict[Any, Dict[str, Any]] = {}
+
+        for hit in vector_hits:
+            key = hit["ref_id"] or hit["text"]
+            chunks.setdefault(key, {"similarity": None, "bm25_score": None}).update(hit)
+
+        for hit in lexical_hits:
+            key = hit["ref_id"] or hit["text"]
+            chunk = chunks.setdefault(key, {"similarity": None, "bm25_score": None})
+            chunk.update(
+                {
+                    "ref_id": hit["ref_id"],
+                    "text": chunk.get("text") or hit["text"],
+                    "metadata": chunk.get("metadata") or _parse_metadata(hit["metadata"]),
+                    "bm25_score": hit["bm25_score"],
+                }
+            )
+
+        fused = reciprocal_rank_fusion(
+            {
+                "vector": [hit["ref_id"] or hit["text"] for hit in vector_hits],
+                "lexical": [hit["ref_id"] or hit["text"] for hit in lexical_hits],
+            },
+            k=retrieval_config.rrf_k,
+        )
+
+        results = []
+        for key, score, ranks in fused[:top_k]:
+            chunk = chunks[key]
+            chunk["rrf_score"] = score
+            chunk["ranks"] = ranks
+            results.append(chunk)
+        return results
+
+
+# singleton instance
+hybrid_retriever = HybridRetriever()
@@ -0,0 +1,238 @@
+"""
+Token usage and cost accounting for LLM and embedding calls.
+
+Every call is recorded with model, prompt / completion tokens, latency and the
+caller tag of the current context (analyzer, cleaner, validator, oracle,
+pl_extractor, rag, ...). Records feed the /metrics counters and every open
+usage scope, so totals can be read per HTTP request or per ingestion job.
+
+usage:
+    @usage_caller("analyzer")
+    async def process(self, state): ...
+
+    with usage_scope() as usage:
+        await run_pipeline()
+    usage.summary()
+"""
+
+import time
+import logging
+import inspect
+import functools
+import contextvars
+from typing import Any, Dict, List, Optional
+
+from config.settings import usage_config
+from utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_caller: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("usage_caller", default=None)
+_scopes: contextvars.ContextVar[tuple] = contextvars.ContextVar("usage_scopes", default=())
+
+# seconds; embedding calls (~100ms) up to long completions
+_CALL_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+tokens_total = metrics_registry.counter(
+    "llm_tokens_total", "Tokens billed by caller, model and type (prompt/completion)", ["caller", "model", "type"]
+)
+calls_total = metrics_registry.counter(
+    "llm_calls_total", "LLM and embedding calls by caller, model and status", ["caller", "model", "status"]
+)
+call_seconds = metrics_registry.histogram(
+    "llm_call_seconds", "Latency of LLM and embedding calls", ["caller", "model"], buckets=_CALL_BUCKETS
+)
+cost_total = metrics_registry.counter(
+    "llm_cost_usd_total", "Estimated spend in USD by caller and model", ["caller", "model"]
+)
+
+
+def current_caller() -> Optional[str]:
+    return _caller.get()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    USD cost from the per-million-token price table (longest model prefix wins)
+    """
+    model = (model or "").lower()
+    for prefix in sorted(usage_config.prices, key=len, reverse=True):
+        if model.startswith(prefix):
+            prompt_price, completion_price = usage_config.prices[prefix]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return 0.0
+
+
+class UsageScope:
+    """
+    running totals of the calls made while the scope is open, per caller and model
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.calls: List[Dict[str, Any]] = []
+        self._token = None
+
+    def add(self, call: Dict[str, Any]):
+        self.calls.append(call)
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(call["prompt_tokens"] + call["completion_tokens"] for call in self.calls)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        totals plus a breakdown by caller (json-serializable)
+        """
+        by_caller: Dict[str, Dict[str, Any]] = {}
+        for call in self.calls:
+            stats = by_caller.setdefault(
+                call["caller"],
+                {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_seconds": 0.0, "cost_usd": 0.0, "models": []},
+            )
+            stats["calls"] += 1
+            stats["prompt_tokens"] += call["prompt_tokens"]
+            stats["completion_tokens"] += call["completion_tokens"]
+            stats["latency_seconds"] = round(stats["latency_seconds"] + call["latency_seconds"], 4)
+            stats["cost_usd"] = round(stats["cost_usd"] + call["cost_usd"], 6)
+            if call["model"] not in stats["models"]:
+                stats["models"].append(call["model"])
+
+        return {
+            "calls": len(self.calls),
+            "prompt_tokens": sum(stats["prompt_tokens"] for stats in by_caller.values()),
+            "completion_tokens": sum(stats["completion_tokens"] for stats in by_caller.values()),
+            "total_tokens": self.total_tokens,
+            "cost_usd": round(sum(call["cost_usd"] for call in self.calls), 6),
+            "estimated": any(call["estimated"] for call in self.calls),
+            "by_caller": by_caller,
+        }
+
+    def __enter__(self) -> "UsageScope":
+        self._token = _scopes.set(_scopes.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _scopes.reset(self._token)
+        return False
+
+
+def usage_scope(name: str = "") -> UsageScope:
+    """
+    collect the usage of every call made inside the block (nested scopes all see it)
+    """
+    return UsageScope(name)
+
+
+class usage_caller:
+    """
+    tag calls made inside the block / decorated function with a caller name
+
+    usage:
+        with usage_caller("rag"):
+            ...
+
+        @usage_caller("validator")
+        async def process(...):   # sync functions work too
+            ...
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tokens: List[contextvars.Token] = []
+
+    def __enter__(self):
+        self._tokens.append(_caller.set(self.name))
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _caller.reset(self._tokens.pop())
+        return False
+
+    def __call__(self, func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token = _caller.set(self.name)
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _caller.reset(token)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            token = _caller.set(self.name)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _caller.reset(token)
+        return wrapper
+
+
+def record_usage(
+    model: str,
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+    latency_seconds: float = 0.0,
+    caller: Optional[str] = None,
+    status: str = "ok",
+    estimated: bool = False,
+) -> Dict[str, Any]:
+    """
+    record one call in the metrics and in every open usage scope
+
+    args:
+        - model: deployment / model name the call was billed for
+        - prompt_tokens, completion_tokens: from the response "usage" block
+        - latency_seconds: wall time of the call
+        - caller: overrides the caller tag of the current context
+        - status: "ok" or "error"
+        - estimated: token counts are estimates (e.g. streamed responses)
+    returns:
+        - the recorded call
+    """
+    caller = caller or _caller.get() or "unknown"
+    model = model or "unknown"
+    prompt_tokens = int(prompt_tokens or 0)
+    completion_tokens = int(completion_tokens or 0)
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+
+    call = {
+        "caller": caller,
+        "model": model,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_seconds": round(latency_seconds, 4),
+        "cost_usd": cost,
+        "status": status,
+        "estimated": estimated,
+        "timestamp": time.time(),
+    }
+
+    calls_total.inc(caller=caller, model=model, status=status)
+    call_seconds.observe(latency_seconds, caller=caller, model=model)
+    if prompt_tokens:
+        tokens_total.inc(prompt_tokens, caller=caller, model=model, type="prompt")
+    if completion_tokens:
+        tokens_total.inc(completion_tokens, caller=caller, model=model, type="completion")
+    if cost:
+        cost_total.inc(cost, caller=caller, model=model)
+
+    for scope in _scopes.get():
+        scope.add(call)
+    return call
+
+
+def record_response_usage(model: str, response_data: Dict[str, Any], latency_seconds: float, caller: Optional[str] = None):
+    """
+    record a chat-completions / embeddings response body ("usage" block, "model" field)
+    """
+    usage = (response_data or {}).get("usage") or {}
+    return record_usage(
+        model=(response_data or {}).get("model") or model,
+        prompt_tokens=usage.get("prompt_tokens", 0),
+        completion_tokens=usage.get("completion_tokens", 0),
+        latency_seconds=latency_seconds,
+        caller=caller,
+    )
@@ -0,0 +1,37 @@
+import pytest
+
+from utils.json_parser import parse_json, parse_partial_json
+
+
+def test_parses_fenced_and_wrapped_answers():
+    assert parse_json('{"a": 1}') == {"a": 1}
+    assert parse_json('```json\n{"triplets": [["a", "b", "c"]]}\n```') == {"triplets": [["a", "b", "c"]]}
+    assert parse_json('Here you go: {"a": [1, 2]} Hope this helps.') == {"a": [1, 2]}
+    assert parse_json("no json here") is None
+    # truncated answers only with partial=True
+    assert parse_json('{"a": 1, "b": [1, 2') is None
+    assert parse_json('{"a": 1, "b": [1, 2', partial=True) == {"a": 1, "b": [1, 2]}
+
+
+@pytest.mark.parametrize("prefix, expected", [
+    ('{"triplets": [["a", "b"', {"triplets": [["a", "b"]]}),
+    ('{"feedback": "partial answ', {"feedback": "partial answ"}),
+    ('{"a": 1, "b": tr', {"a": 1}),
+    ('{"a": 1, "b"', {"a": 1}),
+    ('{"a": 1,', {"a": 1}),
+    ('{"a": "x, y", "b": ', {"a": "x, y"}),
+    ('{"a": "say \\"hi', {"a": 'say "hi'}),
+    ('[{"a": 1}, {"b"', [{"a": 1}, {}]),
+    ('{"a": {"b": 1}} trailing text', {"a": {"b": 1}}),
+    ('not started', None),
+])
+def test_parses_prefixes_of_a_stream(prefix, expected):
+    assert parse_partial_json(prefix) == expected
+
+
+def test_streamed_prefixes_grow_monotonically():
+    document = '{"triplets": [["Paris", "capital_of", "France"], ["Rhine", "flows_through", "Basel"]], "quality_score": 0.9}'
+    parsed = [parse_partial_json(document[:end]) for end in range(1, len(document) + 1)]
+    assert parsed[-1] == parse_json(document)
+    triplet_counts = [len(value.get("triplets", [])) for value in parsed if value]
+    assert triplet_counts == sorted(triplet_counts)
@@ -18,6 +18,11 @@ async def test_extraction():
     Total Assets: $50,000,000
     Total Liabilities: $30,000,000
     Shareholders' Equity: $20,000,000
+
+    Cash Flow Statement:
+    Net Cash from Operating Activities: $5,000,000
+    Net Cash used in Investing Activities: $(2,000,000)
+    Net Cash used in Financing Activities: $(1,000,000)
     """
 
     result = await financial_orchestrator.extract(sample_text)
@@ -0,0 +1,65 @@
+import json
+import queue
+import logging
+
+from config.logging_config import (
+    DroppingQueueHandler,
+    JsonFormatter,
+    RedactionFilter,
+    SamplingFilter,
+    redact,
+    truncate,
+)
+
+
+def _record(name="services.test", level=logging.INFO, msg="hello", args=(), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_redaction_and_truncation():
+    assert redact("Authorization: Bearer abc.def") == "Authorization: Bearer [REDACTED]"
+    assert redact('{"client_secret": "s3cr3t", "user": "kunal"}') == '{"client_secret": "[REDACTED]", "user": "kunal"}'
+    assert truncate("x" * 20, limit=5) == "xxxxx...[truncated 15 chars]"
+    assert truncate(42, limit=1) == 42
+
+
+def test_redaction_filter_renders_message_and_extra_fields():
+    record = _record(msg="access_token=%s context=%s", args=("abc", "y" * 50), context="z" * 50, access_token="abc", chunk=3)
+    assert RedactionFilter(max_chars=30).filter(record)
+
+    assert record.args is None
+    assert record.msg.startswith("access_token=[REDACTED]") and "truncated" in record.msg
+    assert record.context == "z" * 30 + "...[truncated 20 chars]"
+    assert record.access_token == "[REDACTED]"
+    assert record.chunk == 3
+
+
+def test_sampling_keeps_warnings_and_uses_longest_prefix():
+    sampler = SamplingFilter({"agents": 0.0, "agents.nodes.aggregator_node": 1.0})
+
+    assert not sampler.filter(_record(name="agents.nodes.analyzer_node"))
+    assert sampler.filter(_record(name="agents.nodes.aggregator_node"))
+    assert sampler.filter(_record(name="agents.nodes.analyzer_node", level=logging.WARNING))
+    assert sampler.filter(_record(name="services.embedding_service"))
+
+
+def test_json_formatter_and_non_blocking_queue():
+    line = JsonFormatter().format(_record(msg="retrieved", chunks=5, trace_id="t" * 32, span_id="s" * 16))
+    payload = json.loads(line)
+    assert payload["message"] == "retrieved" and payload["chunks"] == 5
+    assert payload["trace_id"] == "t" * 32 and payload["logger"] == "services.test"
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(_record())
+    handler.handle(_record())
+    assert handler.dropped == 1
+
+
+if __name__ == "__main__":
+    test_redaction_and_truncation()
+    test_redaction_filter_renders_message_and_extra_fields()
+    test_sampling_keeps_warnings_and_uses_longest_prefix()
+    test_json_formatter_and_non_blocking_queue()
@@ -0,0 +1,64 @@
+import asyncio
+from utils.metrics import MetricsRegistry
+
+
+def test_counter_and_histogram_render_prometheus_text():
+    registry = MetricsRegistry()
+    requests = registry.counter("cache_requests_total", "Cache lookups", ["namespace", "result"])
+    rtt = registry.histogram("cache_redis_rtt_seconds", "Redis RTT", ["command"], buckets=(0.001, 0.01))
+
+    requests.inc(namespace="embedding", result="hit")
+    requests.inc(2, namespace="embedding", result="hit")
+    requests.inc(namespace="embedding", result="miss")
+    rtt.observe(0.0005, command="get")
+    rtt.observe(0.005, command="get")
+    rtt.observe(1.0, command="get")
+
+    text = registry.render()
+    assert "# TYPE cache_requests_total counter" in text
+    assert 'cache_requests_total{namespace="embedding",result="hit"} 3' in text
+    assert 'cache_redis_rtt_seconds_bucket{command="get",le="0.001"} 1' in text
+    assert 'cache_redis_rtt_seconds_bucket{command="get",le="0.01"} 2' in text
+    assert 'cache_redis_rtt_seconds_bucket{command="get",le="+Inf"} 3' in text
+    assert 'cache_redis_rtt_seconds_count{command="get"} 3' in text
+
+
+def test_registry_returns_existing_metric_and_rejects_conflicts():
+    registry = MetricsRegistry()
+    first = registry.counter("jobs_total", "Jobs", ["status"])
+    assert registry.counter("jobs_total", "Jobs", ["status"]) is first
+
+    try:
+        registry.gauge("jobs_total", "Jobs", ["status"])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("expected a conflict error")
+
+
+
+def test_time_stage_records_context_manager_and_decorated_calls():
+    from utils.metrics import stage_seconds, time_stage
+
+    @time_stage("test_sync_stage")
+    def work():
+        return 1
+
+    @time_stage("test_async_stage")
+    async def async_work():
+        return 2
+
+    with time_stage("test_block_stage"):
+        pass
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+
+    text = "\n".join(stage_seconds.render())
+    for stage in ("test_block_stage", "test_sync_stage", "test_async_stage"):
+        assert f'pipeline_stage_seconds_count{{stage="{stage}"}} 1' in text
+
+
+if __name__ == "__main__":
+    test_counter_and_histogram_render_prometheus_text()
+    test_registry_returns_existing_metric_and_rejects_conflicts()
+    test_time_stage_records_context_manager_and_decorated_calls()
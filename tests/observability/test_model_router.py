@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from config.settings import routing_config
+from services.model_router import Deployment, ModelRouter
+from utils.resilience import RateLimitedError, RetryableError, UpstreamError
+
+
+def _router(*deployment_ids, hedging=False):
+    router = ModelRouter("embedding", [Deployment("embedding", d, "test") for d in deployment_ids])
+    router.hedging = hedging
+    return router
+
+
+def test_fails_over_and_prefers_the_healthy_deployment(monkeypatch):
+    monkeypatch.setattr(routing_config, "explore_ratio", 0.0)
+    router = _router("route-a", "route-b")
+    calls = []
+
+    async def request(deployment):
+        calls.append(deployment.deployment_id)
+        if deployment.deployment_id == "route-a":
+            raise RateLimitedError("429", 429)
+        return deployment.deployment_id
+
+    assert asyncio.run(router.call(request)) == "route-b"
+    assert calls == ["route-a", "route-b"]   # no retry on route-a while route-b is left
+
+    assert asyncio.run(router.call(request)) == "route-b"
+    assert calls[-1] == "route-b" and len(calls) == 3
+
+    async def bad_request(deployment):
+        raise UpstreamError("400", 400)
+
+    # every deployment would reject it
+    with pytest.raises(UpstreamError):
+        asyncio.run(router.call(bad_request))
+    assert len(router.deployments[1].latencies) == 2
+
+
+def test_hedges_after_p95(monkeypatch):
+    monkeypatch.setattr(routing_config, "explore_ratio", 0.0)
+    monkeypatch.setattr(routing_config, "hedge_min_samples", 3)
+    router = _router("hedge-a", "hedge-b", hedging=True)
+    primary, backup = router.deployments
+    for _ in range(3):
+        primary.record(0.01, ok=True)
+        backup.record(0.02, ok=True)
+
+    async def request(deployment):
+        # the primary is stuck this time
+        await asyncio.sleep(5 if deployment is primary else 0.01)
+        return deployment.deployment_id
+
+    assert asyncio.run(asyncio.wait_for(router.call(request), timeout=1)) == "hedge-b"
+    assert primary.guard.limiter.in_flight == 0   # the losing request was cancelled and released
+
+
+def test_fast_primary_error_fails_over_when_hedging(monkeypatch):
+    monkeypatch.setattr(routing_config, "explore_ratio", 0.0)
+    monkeypatch.setattr(routing_config, "hedge_min_samples", 3)
+    router = _router("fast-a", "fast-b", hedging=True)
+    primary, backup = router.deployments
+    for _ in range(3):
+        primary.record(0.5, ok=True)
+        backup.record(0.6, ok=True)
+    calls = []
+
+    async def request(deployment):
+        calls.append(deployment.deployment_id)
+        if deployment is primary:
+            raise RetryableError("503", 503)
+        return deployment.deployment_id
+
+    # the primary fails before the hedge delay, so no hedge was sent: plain failover
+    assert asyncio.run(router.call(request)) == "fast-b"
+    assert calls == ["fast-a", "fast-b"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from config.settings import ResilienceConfig
+from utils.resilience import (
+    AIMDLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    EndpointGuard,
+    RateLimitedError,
+    RetryBudget,
+    RetryableError,
+    UpstreamError,
+    parse_retry_after,
+)
+
+
+def _config(**overrides):
+    config = ResilienceConfig()
+    config.rates = {}
+    config.retry_base_delay = 0.0
+    config.retry_max_attempts = 4
+    config.breaker_failure_threshold = 2
+    config.breaker_recovery_timeout = 60.0
+    for key, value in overrides.items():
+        setattr(config, key, value)
+    return config
+
+
+def test_aimd_halves_once_per_interval_and_grows_additively():
+    limiter = AIMDLimiter(initial=8, min_limit=1, max_limit=10, decrease_interval=60)
+    limiter.on_throttle()
+    limiter.on_throttle()   # same burst of 429s: only one decrease
+    assert limiter.limit == 4
+
+    for _ in range(4):
+        limiter.on_success()
+    assert 4.9 < limiter.limit < 5.1
+
+
+def test_breaker_and_retry_budget():
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=0.0)
+    breaker.on_failure()
+    assert breaker.allow()
+    breaker.on_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    # recovery timeout elapsed: a single probe goes through
+    assert breaker.allow() and not breaker.allow()
+    breaker.on_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    budget = RetryBudget(ratio=0.5, initial=1)
+    assert budget.withdraw() and not budget.withdraw()
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+
+    assert parse_retry_after("2") == 2.0 and parse_retry_after(None) is None
+
+
+def test_guard_retries_throttling_and_opens_circuit():
+    guard = EndpointGuard("test", _config())
+    attempts = []
+
+    async def throttled_once():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimitedError("429", 429, retry_after=0.01)
+        return "ok"
+
+    assert asyncio.run(guard.call(throttled_once)) == "ok"
+    assert len(attempts) == 2
+    assert guard.limiter.limit == 4.25   # halved by the 429, +1/limit for the success
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+    async def bad_request():
+        raise UpstreamError("400", 400)
+
+    # non-retryable errors are raised at once
+    with pytest.raises(UpstreamError):
+        asyncio.run(guard.call(bad_request))
+
+    async def down():
+        raise RetryableError("503", 503)
+
+    # the second failure opens the circuit, which stops the retries
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guard.call(down))
+    assert guard.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(guard.call(down))
+
+
+def test_probe_cancelled_while_waiting_is_released():
+    guard = EndpointGuard("test-probe", _config(breaker_recovery_timeout=0.0, max_concurrency=1, initial_concurrency=1))
+    guard.breaker.on_failure()
+    guard.breaker.on_failure()
+    assert guard.breaker.state == CircuitBreaker.OPEN
+
+    async def scenario():
+        # the only concurrency slot is taken, so the probe waits in the limiter
+        await guard.limiter.acquire()
+        probe = asyncio.create_task(guard.call(lambda: asyncio.sleep(0, "ok")))
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == CircuitBreaker.HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+        await guard.limiter.release()
+
+        # the next call may probe, and closes the circuit
+        return await guard.call(lambda: asyncio.sleep(0, "ok"))
+
+    assert asyncio.run(scenario()) == "ok"
+    assert guard.breaker.state == CircuitBreaker.CLOSED
+
+
+if __name__ == "__main__":
+    test_aimd_halves_once_per_interval_and_grows_additively()
+    test_breaker_and_retry_budget()
+    test_guard_retries_throttling_and_opens_circuit()
+    test_probe_cancelled_while_waiting_is_released()
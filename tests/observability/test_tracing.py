@@ -0,0 +1,101 @@
+import json
+import asyncio
+
+from utils.tracing import (
+    BatchSpanProcessor,
+    JsonFileExporter,
+    OTLPHttpExporter,
+    Tracer,
+    extract_context,
+    traced,
+)
+
+
+class _Config:
+    enabled = False
+    exporter = "json"
+    sample_ratio = 1.0
+
+
+def _recording_tracer(tmp_path):
+    test_tracer = Tracer(_Config())
+    test_tracer.enabled = True
+    test_tracer.processor = BatchSpanProcessor(JsonFileExporter(str(tmp_path / "spans.jsonl")), flush_interval=60)
+    return test_tracer
+
+
+def _read_spans(tmp_path):
+    with open(tmp_path / "spans.jsonl", encoding="utf-8") as handle:
+        return {span["name"]: span for span in map(json.loads, handle)}
+
+
+def test_spans_nest_across_tasks_and_threads(tmp_path):
+    test_tracer = _recording_tracer(tmp_path)
+
+    def db_query():
+        with test_tracer.span("hana.query"):
+            pass
+
+    async def agent(name):
+        async with test_tracer.span(f"agent.{name}"):
+            await asyncio.to_thread(db_query)
+
+    async def pipeline():
+        with test_tracer.span("pipeline", chunks=2) as root:
+            await asyncio.gather(agent("analyzer"), agent("cleaner"))
+            return root
+
+    root = asyncio.run(pipeline())
+    assert test_tracer.force_flush(timeout=5)
+    spans = _read_spans(tmp_path)
+
+    assert spans["pipeline"]["parent_id"] is None
+    assert spans["pipeline"]["attributes"] == {"chunks": 2}
+    assert spans["agent.analyzer"]["parent_id"] == root.span_id
+    assert spans["agent.cleaner"]["parent_id"] == root.span_id
+    assert spans["hana.query"]["parent_id"] in {spans["agent.analyzer"]["span_id"], spans["agent.cleaner"]["span_id"]}
+    assert {span["trace_id"] for span in spans.values()} == {root.trace_id}
+    test_tracer.shutdown()
+
+
+def test_exceptions_mark_the_span_failed(tmp_path):
+    test_tracer = _recording_tracer(tmp_path)
+    try:
+        with test_tracer.span("tool.extract_pl_data"):
+            raise ValueError("bad table")
+    except ValueError:
+        pass
+
+    assert test_tracer.force_flush(timeout=5)
+    span = _read_spans(tmp_path)["tool.extract_pl_data"]
+    assert span["status"] == 2 and span["status_message"] == "bad table"
+    assert span["events"][0]["name"] == "exception"
+    test_tracer.shutdown()
+
+
+def test_traceparent_round_trip_and_otlp_encoding():
+    parent = extract_context("00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01")
+    assert parent.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736" and parent.sampled
+    assert extract_context("garbage") is None
+    assert extract_context("00-00000000000000000000000000000000-00f067aa0ba902b7-01") is None
+
+    test_tracer = Tracer(_Config())
+    test_tracer.enabled = True
+    span = test_tracer.start_span("GET /health", parent=parent, attributes={"http.status_code": 200})
+    test_tracer.end_span(span)
+    assert span.traceparent.startswith("00-4bf92f3577b34da6a3ce929d0e0e4736-")
+
+    payload = OTLPHttpExporter("http://collector:4318", "ai-service").encode([span])
+    otlp_span = payload["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert otlp_span["parentSpanId"] == "00f067aa0ba902b7"
+    assert otlp_span["attributes"] == [{"key": "http.status_code", "value": {"intValue": "200"}}]
+
+
+def test_disabled_tracer_records_nothing():
+    assert not Tracer(_Config()).start_span("agent.noop").sampled
+
+    @traced("agent.noop")
+    async def run(value):
+        return value * 2
+
+    assert asyncio.run(run(21)) == 42
@@ -0,0 +1,57 @@
+import asyncio
+
+from services.usage_service import (
+    estimate_cost,
+    record_response_usage,
+    record_usage,
+    tokens_total,
+    usage_caller,
+    usage_scope,
+)
+
+
+def test_cost_uses_longest_model_prefix():
+    # gpt-4o-mini must not be billed at gpt-4o prices
+    assert estimate_cost("gpt-4o-mini-2024-07-18", 1_000_000, 0) == 0.15
+    assert estimate_cost("gpt-4o-2024-08-06", 0, 1_000_000) == 10.0
+    assert estimate_cost("unknown-model", 1000, 1000) == 0.0
+
+
+def test_scopes_aggregate_calls_by_caller():
+    @usage_caller("analyzer")
+    async def analyzer():
+        await asyncio.sleep(0)
+        record_response_usage(
+            "gpt-4o", {"model": "gpt-4o-2024-08-06", "usage": {"prompt_tokens": 900, "completion_tokens": 100}}, 0.8
+        )
+
+    @usage_caller("validator")
+    async def validator():
+        record_usage("gpt-4o", prompt_tokens=3000, completion_tokens=200, latency_seconds=1.5)
+
+    async def job():
+        with usage_scope("request") as request_usage:
+            with usage_scope("job") as job_usage:
+                await asyncio.gather(analyzer(), validator(), validator())
+            record_usage("text-embedding-3-large", prompt_tokens=50, caller="embedding")
+        return request_usage, job_usage
+
+    request_usage, job_usage = asyncio.run(job())
+
+    summary = job_usage.summary()
+    assert summary["calls"] == 3
+    assert summary["prompt_tokens"] == 6900 and summary["completion_tokens"] == 500
+    assert summary["by_caller"]["validator"]["calls"] == 2
+    assert summary["by_caller"]["analyzer"]["models"] == ["gpt-4o-2024-08-06"]
+    assert request_usage.summary()["calls"] == 4
+
+    assert tokens_total.value(caller="validator", model="gpt-4o", type="prompt") >= 6000
+
+    # outside any scope and caller tag
+    call = record_usage("gpt-4o", prompt_tokens=1)
+    assert call["caller"] == "unknown"
+
+
+if __name__ == "__main__":
+    test_cost_uses_longest_model_prefix()
+    test_scopes_aggregate_calls_by_caller()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from cache.memory_cache import MemoryCache
+from decorators.cache_decorators import cached, cache_result, get_cache_metrics, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+
+class FakeService:
+    def __init__(self):
+        self.cache = MemoryCache(max_entries=100, max_bytes=100000)
+        self.calls = 0
+
+    @cached(ttl=60, key_prefix="fake")
+    async def lookup(self, text: str, top_k: int = 5):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"text": text, "top_k": top_k}
+
+    @cache_result(ttl=60)
+    async def upper(self, text: str):
+        return text.upper()
+
+    @cache_result(ttl=60)
+    async def lower(self, text: str):
+        return text.lower()
+
+    @cached(ttl=60, key_prefix="fake_missing", negative_ttl=60)
+    async def missing(self, text: str):
+        self.calls += 1
+        return None
+
+    @cached(ttl=0.05, stale_ttl=60, key_prefix="fake_stale")
+    async def stale(self, text: str):
+        self.calls += 1
+        return self.calls
+
+
+async def test_stable_keys_and_single_flight():
+    # keyword/positional/default spellings of the same call share one key
+    assert make_cache_key("p", {"text": "a", "top_k": 5}) == make_cache_key("p", {"top_k": 5, "text": "a"})
+
+    service = FakeService()
+    other = FakeService()
+    assert FakeService.lookup.cache_key(service, "a") == FakeService.lookup.cache_key(other, text="a", top_k=5)
+
+    results = await asyncio.gather(*[service.lookup("a") for _ in range(5)])
+    assert all(result == {"text": "a", "top_k": 5} for result in results)
+    assert service.calls == 1
+
+    await service.lookup(text="a", top_k=5)
+    assert service.calls == 1
+
+    # same prefix and arguments, different functions: separate entries
+    assert await service.upper("Ab") == "AB"
+    assert await service.lower("Ab") == "ab"
+
+
+async def test_negative_and_stale_while_revalidate():
+    service = FakeService()
+
+    assert await service.missing("x") is None
+    assert await service.missing("x") is None
+    assert service.calls == 1
+
+    assert await service.stale("y") == 2
+    await asyncio.sleep(0.1)
+    # stale value served immediately, refreshed in the background
+    assert await service.stale("y") == 2
+    await asyncio.sleep(0.05)
+    assert await service.stale("y") == 3
+
+    metrics = get_cache_metrics()
+    logger.info(f"Decorator metrics: {metrics}")
+    assert metrics[f"{__name__}.FakeService.stale"]["stale_hits"] >= 1
+
+
+class FakeLockClient:
+    """
+    the redis commands DistributedSingleFlight uses, in memory
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+    async def exists(self, key):
+        return int(key in self.data)
+
+
+class SharedCache(MemoryCache):
+    """
+    stands in for the redis cache every worker shares
+    """
+
+    def __init__(self):
+        super().__init__(max_entries=100, max_bytes=100000)
+        self.client = FakeLockClient()
+
+    async def _get_client(self):
+        return self.client
+
+
+def _worker(cache, calls):
+    """
+    the same decorated function as loaded by another worker process
+    """
+    @cached(ttl=60, key_prefix="fake_embedding", cache=cache, distributed=True)
+    async def embed(text: str):
+        calls.append(text)
+        await asyncio.sleep(0.05)
+        return [float(len(text))]
+    return embed
+
+
+async def test_distributed_single_flight_across_workers():
+    """
+    a miss in two workers at once calls upstream once, the other worker gets the cached result
+    """
+    cache = SharedCache()
+    calls = []
+    first_worker, second_worker = _worker(cache, calls), _worker(cache, calls)
+
+    results = await asyncio.gather(first_worker("text"), second_worker("text"), second_worker("text"))
+    assert results == [[4.0]] * 3
+    assert calls == ["text"]
+    assert not cache.client.data   # lock released
+
+
+if __name__ == "__main__":
+    asyncio.run(test_stable_keys_and_single_flight())
+    asyncio.run(test_negative_and_stale_while_revalidate())
+    asyncio.run(test_distributed_single_flight_across_workers())
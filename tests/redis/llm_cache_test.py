@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from agents.schemas.agent_schemas import ValidatorResponse
+from cache.memory_cache import MemoryCache
+from cache.single_flight import DistributedSingleFlight
+from services.llm_service import LLMService
+from services.usage_service import usage_caller
+
+logger = logging.getLogger(__name__)
+
+
+def _service():
+    """
+    LLMService on a memory cache, counting upstream calls instead of sending them
+    """
+    service = LLMService()
+    service.cache = MemoryCache(max_entries=100, max_bytes=100000)
+    service._distributed_flight = DistributedSingleFlight(service.cache)
+    service.calls = []
+
+    async def fake_request(payload, caller=None):
+        service.calls.append(payload)
+        return {"choices": [{"message": {"content": f"answer {len(service.calls)}"}, "finish_reason": "stop"}]}
+
+    service._request_completion = fake_request
+    return service
+
+
+async def test_llm_cache_for_deterministic_calls_of_opted_in_callers():
+    """
+    a re-run of the same temperature-0 extraction is served from the cache
+    """
+    service = _service()
+
+    with usage_caller("analyzer"):
+        first = await service.complete("extract triplets", temperature=0.0)
+        second = await service.complete("extract triplets", temperature=0.0)
+        # another parameter is another request
+        await service.complete("extract triplets", temperature=0.0, max_tokens=50)
+    assert first == second == "answer 1"
+    assert len(service.calls) == 2
+
+    # sampled calls and callers that didn't opt in always go upstream
+    with usage_caller("analyzer"):
+        await service.complete("extract triplets", temperature=0.7)
+    with usage_caller("rag"):
+        await service.complete("extract triplets", temperature=0.0)
+        # ... unless they opt in per call
+        await service.complete("summarize", temperature=0.0, cache=True)
+        await service.complete("summarize", temperature=0.0, cache=True)
+    assert len(service.calls) == 5
+
+
+async def test_rejected_structured_answers_are_not_cached():
+    """
+    an answer that fails schema validation goes upstream again on retry; a valid one is cached
+    """
+    service = _service()
+
+    with usage_caller("validator"):
+        for _ in range(3):
+            try:
+                await service.complete_structured("validate", schema=ValidatorResponse, temperature=0.0)
+                raise AssertionError("non-JSON answer was accepted")
+            except ValueError:
+                pass
+    assert len(service.calls) == 3
+
+    async def valid_request(payload, caller=None):
+        service.calls.append(payload)
+        content = '{"validated_triplets": [["a", "b", "c"]], "validation_issues": [], "quality_score": 0.9, "feedback": "ok"}'
+        return {"choices": [{"message": {"content": content}, "finish_reason": "stop"}]}
+
+    service._request_completion = valid_request
+    with usage_caller("validator"):
+        first = await service.complete_structured("validate", schema=ValidatorResponse, temperature=0.0)
+        second = await service.complete_structured("validate", schema=ValidatorResponse, temperature=0.0)
+    assert first == second
+    assert len(service.calls) == 4
+
+
+if __name__ == "__main__":
+    asyncio.run(test_llm_cache_for_deterministic_calls_of_opted_in_callers())
+    asyncio.run(test_rejected_structured_answers_are_not_cached())
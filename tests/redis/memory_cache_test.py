@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from cache.memory_cache import MemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+async def test_memory_cache_lru_and_bytes():
+    """
+    entries beyond max_entries / max_bytes evict the least recently used ones
+    """
+    cache = MemoryCache(max_entries=2, max_bytes=1000)
+
+    await cache.set("a", "x" * 10)
+    await cache.set("b", "y" * 10)
+    await cache.get("a")                # "b" is now least recently used
+    await cache.set("c", "z" * 10)
+
+    assert await cache.get("a") == "x" * 10
+    assert await cache.get("b") is None
+    assert cache.stats()["bytes"] == 20
+
+    # a value larger than max_bytes is never cached
+    assert not await cache.set("huge", "h" * 2000)
+    assert await cache.get("huge") is None
+
+
+async def test_memory_cache_ttl_copies_and_tags():
+    cache = MemoryCache(max_entries=10, max_bytes=10000)
+
+    await cache.set("ttl", "value", ttl=0.05)
+    await asyncio.sleep(0.1)
+    assert await cache.get("ttl") is None
+
+    # callers mutating a hit don't alter the cached value
+    await cache.set("doc", {"answer": "42"})
+    hit = await cache.get("doc")
+    hit["from_cache"] = True
+    assert await cache.get("doc") == {"answer": "42"}
+
+    await cache.set_with_tags("rag:1", "first", tags=["source:a.pdf"])
+    await cache.set_with_tags("rag:2", "second", tags=["source:b.pdf"])
+    assert await cache.invalidate_tags(["source:a.pdf"]) == 1
+    assert await cache.get("rag:1") is None
+    assert await cache.get("rag:2") == "second"
+
+    assert await cache.clear_pattern("rag:*") == 1
+    logger.info(f"Memory cache stats: {cache.stats()}")
+
+
+async def test_envelopes_stale_and_early_refresh():
+    """
+    set_envelope entries go stale after ttl but are served through the grace window
+    """
+    cache = MemoryCache(max_entries=10, max_bytes=10000)
+
+    await cache.set_envelope("answer", {"answer": "42"}, ttl=0.05, delta=0.0, stale_ttl=60)
+    entry = await cache.get_envelope("answer")
+    assert entry["value"] == {"answer": "42"} and not entry["stale"] and not entry["refresh"]
+
+    await asyncio.sleep(0.1)
+    entry = await cache.get_envelope("answer")
+    assert entry["stale"] and entry["refresh"]
+    assert await cache.get_value("answer") == {"answer": "42"}
+
+    # an expensive entry close to expiry is refreshed early
+    await cache.set_envelope("slow", "value", ttl=1, delta=1e6)
+    assert (await cache.get_envelope("slow"))["refresh"]
+
+
+if __name__ == "__main__":
+    asyncio.run(test_memory_cache_lru_and_bytes())
+    asyncio.run(test_memory_cache_ttl_copies_and_tags())
+    asyncio.run(test_envelopes_stale_and_early_refresh())
@@ -0,0 +1,85 @@
+import asyncio
+import fnmatch
+import logging
+from cache.redis.redis_cache import RedisCache
+from config.redis_config import redis_config
+
+logger = logging.getLogger(__name__)
+
+
+class FakeClusterPipeline:
+    """
+    mimics redis.asyncio.cluster.ClusterPipeline: plain commands are queued,
+    multi-key deletes are coroutines that refuse more than one key
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    def smembers(self, key):
+        self.queued.append(lambda: set(self.client.data.get(key, set())))
+        return self
+
+    async def unlink(self, *keys):
+        if len(keys) > 1:
+            raise RuntimeError("unlinking multiple keys is not implemented in pipeline command")
+        self.queued.append(lambda: self.client._unlink(*keys))
+        return self
+
+    async def execute(self):
+        return [command() for command in self.queued]
+
+
+class FakeClusterClient:
+    """
+    in-memory stand-in for redis.asyncio.cluster.RedisCluster
+    """
+
+    def __init__(self, data):
+        self.data = dict(data)
+
+    def pipeline(self, transaction=None):
+        return FakeClusterPipeline(self)
+
+    async def scan_iter(self, match=None, count=None):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    def _unlink(self, *keys):
+        return sum(1 for key in keys if self.data.pop(key, None) is not None)
+
+    async def unlink(self, *keys):
+        # the cluster client splits a multi-key UNLINK by slot
+        return self._unlink(*keys)
+
+
+async def test_cluster_clear_pattern_and_invalidate_tags():
+    """
+    in cluster mode the keys are really deleted, not queued on the pipeline and dropped
+    """
+    cache = RedisCache()
+    tag_key = cache._tag_key("source:doc.pdf")
+    client = FakeClusterClient({
+        **{f"rag:{i}": "answer" for i in range(7)},
+        "search:1": "hits",
+        "search:2": "hits",
+        "embedding:1": "vector",
+        tag_key: {"search:1", "search:2"},
+    })
+    cache._redis_client = client
+
+    mode = redis_config.mode
+    redis_config.mode = "cluster"
+    try:
+        assert await cache.clear_pattern("rag:*", batch_size=3, max_keys_per_second=0) == 7
+        assert await cache.invalidate_tags(["source:doc.pdf"]) == 2
+    finally:
+        redis_config.mode = mode
+
+    assert set(client.data) == {"embedding:1"}
+
+
+if __name__ == "__main__":
+    asyncio.run(test_cluster_clear_pattern_and_invalidate_tags())
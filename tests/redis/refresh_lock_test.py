@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from cache.redis.redis_cache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+
+class FakeLockClient:
+    """
+    SET NX and the compare-and-delete script, in memory
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+async def test_refresh_lock_is_released_by_its_owner_only():
+    """
+    a refresh that outlived its lock doesn't release the lock another worker took since
+    """
+    client = FakeLockClient()
+    slow_worker, other_worker = RedisCache(), RedisCache()
+    slow_worker._redis_client = other_worker._redis_client = client
+
+    assert await slow_worker._acquire_refresh_lock("answer", timeout=1)
+    assert not await other_worker._acquire_refresh_lock("answer", timeout=1)
+
+    # the lock expires while the slow refresh is still running, the other worker takes it
+    del client.data["refresh:answer"]
+    assert await other_worker._acquire_refresh_lock("answer", timeout=1)
+
+    await slow_worker._release_refresh_lock("answer")
+    assert "refresh:answer" in client.data
+
+    await other_worker._release_refresh_lock("answer")
+    assert not client.data
+
+
+if __name__ == "__main__":
+    asyncio.run(test_refresh_lock_is_released_by_its_owner_only())
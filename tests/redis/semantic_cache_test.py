@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from cache.memory_cache import MemoryCache
+from cache.semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+class FakeIndexClient:
+    """
+    the sorted set commands SemanticCache uses, in memory
+    """
+
+    def __init__(self):
+        self.zsets = {}
+
+    def pipeline(self):
+        return FakeIndexPipeline(self)
+
+    async def zrangebyscore(self, key, low, high, withscores=False):
+        high = float("inf") if high == "+inf" else high
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        return [(member, score) for member, score in members if low <= score <= high]
+
+    async def zrem(self, key, *members):
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+
+class FakeIndexPipeline:
+    def __init__(self, client):
+        self.client = client
+        self.queued = []
+
+    def zadd(self, key, mapping):
+        self.queued.append(lambda: self.client.zsets.setdefault(key, {}).update(mapping))
+
+    def zremrangebyscore(self, key, low, high):
+        def run():
+            zset = self.client.zsets.get(key, {})
+            for member in [m for m, score in zset.items() if low <= score <= high]:
+                del zset[member]
+        self.queued.append(run)
+
+    def zremrangebyrank(self, key, start, end):
+        def run():
+            zset = self.client.zsets.get(key, {})
+            ranked = sorted(zset, key=zset.get)
+            for member in ranked[start:len(ranked) + end + 1]:
+                del zset[member]
+        self.queued.append(run)
+
+    async def execute(self):
+        return [command() for command in self.queued]
+
+
+class SharedCache(MemoryCache):
+    """
+    stands in for the redis cache every worker shares
+    """
+
+    def __init__(self):
+        super().__init__(max_entries=100, max_bytes=1000000)
+        self.client = FakeIndexClient()
+
+    async def _get_client(self):
+        return self.client
+
+
+async def test_other_workers_keep_the_ttl_an_entry_was_stored_with():
+    """
+    an answer stored with a ttl other than semantic_cache_ttl expires at the same
+    time in every worker, and doesn't push out longer-lived entries of the index
+    """
+    cache = SharedCache()
+    writer = SemanticCache(cache, ttl=60, refresh_interval=0)
+    reader = SemanticCache(cache, ttl=60, refresh_interval=0)
+    writer.enabled = reader.enabled = True
+
+    await writer.store("long lived", [1.0, 0.0], "long", ttl=3600)
+    await writer.store("short lived", [0.0, 1.0], "short", ttl=5)
+
+    assert (await reader.lookup([1.0, 0.0]))["value"] == "long"
+    assert (await reader.lookup([0.0, 1.0]))["value"] == "short"
+    expiries = sorted(entry["expires_at"] - time.time() for entry in reader._entries.values())
+    assert 0 < expiries[0] <= 5 and 3590 < expiries[1] <= 3600
+
+    # a later store with a short ttl only prunes the entries that really expired
+    await writer.store("other", [0.6, 0.8], "other", ttl=1)
+    assert len(cache.client.zsets[writer._ids_key()]) == 3
+
+
+if __name__ == "__main__":
+    asyncio.run(test_other_workers_keep_the_ttl_an_entry_was_stored_with())
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from cache.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+async def test_cancelled_leader_does_not_fail_followers():
+    """
+    the caller that started the shared call goes away (client disconnect, hedge
+    loser, timeout); the others still get the result from the single execution
+    """
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    leader = asyncio.create_task(flights.do("key", work))
+    await asyncio.sleep(0)
+    followers = [asyncio.create_task(flights.do("key", work)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    assert await asyncio.gather(*followers) == ["result"] * 3
+    assert leader.cancelled()
+    assert len(calls) == 1
+    assert flights.inflight() == 0
+
+
+async def test_work_is_cancelled_when_every_caller_is():
+    flights = SingleFlight()
+    finished = []
+
+    async def work():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+
+    callers = [asyncio.create_task(flights.do("key", work)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+    await asyncio.sleep(0.1)
+
+    assert not finished
+    assert flights.inflight() == 0
+
+
+if __name__ == "__main__":
+    asyncio.run(test_cancelled_leader_does_not_fail_followers())
+    asyncio.run(test_work_is_cancelled_when_every_caller_is())
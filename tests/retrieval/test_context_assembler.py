@@ -0,0 +1,62 @@
+from services.context_assembler import ContextAssembler, estimate_tokens
+
+
+def _sliding_chunks(text: str, chunk_size: int = 1000, overlap: int = 200):
+    """
+    same windowing as document_processing_service.split_text_into_chunks
+    """
+    chunks = []
+    start = 0
+    while start < len(text):
+        chunks.append(text[start:start + chunk_size])
+        start += chunk_size - overlap
+    return chunks
+
+
+def test_overlapping_chunks_are_merged():
+    text = " ".join(f"sentence number {i} of the annual report." for i in range(60))
+    first, second = _sliding_chunks(text)[:2]
+
+    spans, merged = ContextAssembler().dedup_chunks(
+        [{"text": second, "similarity": 0.9}, {"text": first, "similarity": 0.8}]
+    )
+
+    assert merged == 1
+    assert len(spans) == 1
+    assert spans[0]["text"] == text[:1800].strip()
+    assert spans[0]["similarity"] == 0.9
+
+
+def test_duplicate_triplets_are_dropped():
+    facts = ContextAssembler().dedup_triplets(
+        [("XYZ Corp", "has_revenue", "$10M"), ("xyz  corp", "HAS_REVENUE", "$10m"), ("XYZ Corp", "located_in", "Berlin")]
+    )
+    assert facts == [("XYZ Corp", "has_revenue", "$10M"), ("XYZ Corp", "located_in", "Berlin")]
+
+
+def test_context_respects_budget():
+    assembler = ContextAssembler(max_context_tokens=300)
+    chunks = [{"text": f"chunk {i} " + "word " * 200, "similarity": 1.0 - i / 10} for i in range(5)]
+    triplets = [(f"entity {i}", "relates_to", f"entity {i + 1}") for i in range(100)]
+
+    result = assembler.assemble(chunks, triplets, model="gpt-4o", max_tokens=500)
+
+    assert result["budget"] == 300
+    assert result["tokens_used"] <= 300
+    assert result["tokens_saved"] > 0
+    assert result["triplets_used"] > 0
+    assert result["context"].startswith("Chunk (similiarity: 1.0000): chunk 0")
+    assert estimate_tokens(result["context"]) == result["tokens_used"]
+
+
+def test_budget_shrinks_with_small_context_window():
+    assembler = ContextAssembler(max_context_tokens=10000)
+    assert assembler.budget_for("gpt-35-turbo", 1000) == 4096 - 1000 - 200
+
+
+if __name__ == "__main__":
+    test_overlapping_chunks_are_merged()
+    test_duplicate_triplets_are_dropped()
+    test_context_respects_budget()
+    test_budget_shrinks_with_small_context_window()
+    print("context assembler tests passed")
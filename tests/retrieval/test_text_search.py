@@ -0,0 +1,57 @@
+from utils.text_search import (
+    BM25Scorer,
+    tokenize,
+    tokenize_query,
+    build_contains_query,
+    reciprocal_rank_fusion,
+)
+
+
+def test_tokenize_query_drops_stop_words():
+    """
+    stop words and duplicates are removed, identifiers stay in one piece
+    """
+    terms = tokenize_query("What was the revenue of XYZ in 2023 and the revenue for INV-2023-001?")
+    assert terms == ["revenue", "xyz", "2023", "inv-2023-001"]
+
+
+def test_build_contains_query_quotes_terms():
+    assert build_contains_query(["revenue", "inv-2023-001"]) == '"revenue" OR "inv-2023-001"'
+
+
+def test_bm25_prefers_rarer_terms():
+    """
+    a document matching the rare term ranks above one matching only the common term
+    """
+    documents = [
+        tokenize("xyz corporation revenue"),
+        tokenize("abc corporation revenue"),
+        tokenize("abc corporation net income"),
+    ]
+    scores = BM25Scorer().score(["xyz", "revenue"], documents)
+
+    assert scores[0] > scores[1] > scores[2]
+    assert scores[2] == 0.0
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    """
+    a document found by both retrievers beats the top hit of a single retriever
+    """
+    fused = reciprocal_rank_fusion(
+        {"vector": ["a", "b", "c"], "lexical": ["d", "b"]},
+        k=60,
+    )
+    ids = [doc_id for doc_id, _score, _ranks in fused]
+
+    assert ids[0] == "b"
+    assert fused[0][2] == {"vector": 2, "lexical": 2}
+    assert set(ids) == {"a", "b", "c", "d"}
+
+
+if __name__ == "__main__":
+    test_tokenize_query_drops_stop_words()
+    test_build_contains_query_quotes_terms()
+    test_bm25_prefers_rarer_terms()
+    test_reciprocal_rank_fusion_rewards_agreement()
+    print("text search tests passed")
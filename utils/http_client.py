@@ -0,0 +1,49 @@
+"""
+Shared aiohttp session for AI Core calls.
+
+One connection pool per worker instead of a ClientSession (and a TCP + TLS
+handshake) per request. The session is bound to the event loop that created
+it; a call from another loop (e.g. asyncio.run in a sync wrapper) gets its own.
+"""
+
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import aiohttp
+
+from config.settings import routing_config
+
+logger = logging.getLogger(__name__)
+
+_sessions: Dict[int, aiohttp.ClientSession] = {}
+
+
+def get_session() -> aiohttp.ClientSession:
+    """
+    pooled session of the running event loop (created on first use)
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(id(loop))
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=routing_config.http_pool_size,
+                keepalive_timeout=routing_config.http_keepalive,
+            ),
+            timeout=aiohttp.ClientTimeout(
+                total=routing_config.http_timeout, sock_connect=routing_config.http_connect_timeout
+            ),
+        )
+        _sessions[id(loop)] = session
+    return session
+
+
+async def close_session():
+    """
+    close the session of the running loop (app shutdown)
+    """
+    session: Optional[aiohttp.ClientSession] = _sessions.pop(id(asyncio.get_running_loop()), None)
+    if session is not None and not session.closed:
+        await session.close()
+        logger.info("Closed shared HTTP session")
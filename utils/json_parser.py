@@ -0,0 +1,131 @@
+"""
+Tolerant JSON parsing of LLM output.
+
+parse_json reads a complete answer that may be wrapped in markdown fences or
+prose. parse_partial_json reads a prefix of a JSON document (a stream still
+being generated) by closing what is open, or cutting back to the last
+complete value.
+
+usage:
+    parse_json('```json\\n{"a": 1}\\n```')          # {"a": 1}
+    parse_partial_json('{"triplets": [["a", "b"')   # {"triplets": [["a", "b"]]}
+"""
+
+import re
+import json
+from typing import Any, List, Optional, Tuple
+
+_FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+
+# complete values to cut back to when closing the prefix as-is doesn't parse
+_MAX_CUT_ATTEMPTS = 3
+
+
+def _strip_fences(text: str) -> str:
+    match = _FENCE_RE.search(text)
+    return match.group(1).strip() if match else text.strip()
+
+
+def _json_start(text: str) -> int:
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    return min(starts) if starts else -1
+
+
+def parse_partial_json(text: Optional[str]) -> Optional[Any]:
+    """
+    parse a possibly truncated JSON document
+
+    open strings, arrays and objects are closed; a dangling key, comma or
+    unfinished literal is cut back to the last complete value
+    returns:
+        - the parsed value, None when no JSON object / array has started
+    """
+    if not text:
+        return None
+    text = _strip_fences(text)
+    start = _json_start(text)
+    if start == -1:
+        return None
+    text = text[start:]
+
+    stack: List[str] = []
+    # (prefix length, closers needed) after each complete value
+    safe_points: List[Tuple[int, str]] = []
+    in_string = escaped = False
+    end = len(text)
+
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            safe_points.append((index + 1, "".join(reversed(stack))))
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                end = index + 1
+                break
+            safe_points.append((index + 1, "".join(reversed(stack))))
+        elif char == ",":
+            safe_points.append((index, "".join(reversed(stack))))
+
+    if not stack:
+        candidates = [text[:end]]
+    else:
+        # keep a partially generated string value, close everything that is open
+        candidates = [text + ('"' if in_string and not escaped else "") + "".join(reversed(stack))]
+        candidates += [text[:cut] + closers for cut, closers in reversed(safe_points[-_MAX_CUT_ATTEMPTS:])]
+
+    for candidate in candidates:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_json(text: Optional[str], partial: bool = False) -> Optional[Any]:
+    """
+    parse the JSON in an LLM answer (bare, fenced or surrounded by prose)
+
+    args:
+        - text: the answer
+        - partial: fall back to parse_partial_json for truncated answers
+    returns:
+        - the parsed value, None if there is no valid JSON
+    """
+    if not text:
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    text = _strip_fences(text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    # prose around the document: take the outermost object / array
+    start = _json_start(text)
+    if start != -1:
+        closer = "}" if text[start] == "{" else "]"
+        end = text.rfind(closer)
+        if end > start:
+            try:
+                return json.loads(text[start:end + 1])
+            except ValueError:
+                pass
+
+    return parse_partial_json(text) if partial else None
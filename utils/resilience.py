@@ -0,0 +1,439 @@
+"""
+Client-side rate limiting, retries and circuit breaking for upstream endpoints
+(AI Core chat / embedding deployments).
+
+One EndpointGuard per deployment combines
+    - a token bucket (requests per second, with burst),
+    - an AIMD concurrency limit: +1 per window of successes, x0.5 on a 429
+      (at most once per decrease interval) and a pause for Retry-After,
+    - jittered exponential retries, bounded per call and by a retry budget
+      (retries may add at most RETRY_BUDGET_RATIO extra load),
+    - a circuit breaker that fails fast while the endpoint keeps erroring.
+
+usage:
+    guard = get_endpoint_guard("chat")
+    data = await guard.call(lambda: post_completion(payload))
+
+    # inside the attempt, turn HTTP errors into typed exceptions
+    await raise_for_status(response)
+"""
+
+import time
+import random
+import asyncio
+import logging
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import aiohttp
+
+from config.settings import resilience_config
+from utils.metrics import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+calls_total = metrics_registry.counter(
+    "upstream_calls_total", "Upstream attempts by endpoint and outcome", ["endpoint", "outcome"]
+)
+retries_total = metrics_registry.counter(
+    "upstream_retries_total", "Upstream retries by endpoint and reason", ["endpoint", "reason"]
+)
+concurrency_limit = metrics_registry.gauge(
+    "upstream_concurrency_limit", "Current AIMD concurrency limit per endpoint", ["endpoint"]
+)
+circuit_state = metrics_registry.gauge(
+    "upstream_circuit_state", "Circuit breaker state per endpoint (0 closed, 1 half-open, 2 open)", ["endpoint"]
+)
+
+
+# ========================================
+# ERRORS
+# ========================================
+
+class UpstreamError(Exception):
+    """
+    upstream answered with an error that retrying won't fix (4xx other than 408/429)
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class RetryableError(UpstreamError):
+    """
+    transient upstream failure (5xx, 408, connection reset)
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message, status)
+        self.retry_after = retry_after
+
+
+class RateLimitedError(RetryableError):
+    """
+    429 from the upstream quota
+    """
+
+
+class CircuitOpenError(UpstreamError):
+    """
+    call rejected without being sent, the endpoint's circuit is open
+    """
+
+
+RETRYABLE_STATUSES = {408, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-After header in seconds (delta-seconds or HTTP date)
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def raise_for_status(response: aiohttp.ClientResponse):
+    """
+    raise a typed error for a non-2xx aiohttp response (body included, truncated)
+    """
+    if response.status < 400:
+        return
+    try:
+        body = (await response.text())[:500]
+    except Exception:
+        body = ""
+    message = f"HTTP {response.status} from {response.url.host}: {body}"
+    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+
+    if response.status == 429:
+        raise RateLimitedError(message, response.status, retry_after)
+    if response.status in RETRYABLE_STATUSES:
+        raise RetryableError(message, response.status, retry_after)
+    raise UpstreamError(message, response.status)
+
+
+# ========================================
+# BUILDING BLOCKS
+# ========================================
+
+class TokenBucket:
+    """
+    requests-per-second limit with burst; rate <= 0 disables it
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+
+
+class AIMDLimiter:
+    """
+    adaptive concurrency limit: additive increase on success, multiplicative
+    decrease on throttling, and a shared pause while Retry-After runs
+    """
+
+    def __init__(
+        self,
+        initial: float,
+        min_limit: float = 1.0,
+        max_limit: float = 64.0,
+        decrease_factor: float = 0.5,
+        decrease_interval: float = 1.0,
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._resume_at = 0.0
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        while True:
+            pause = self._resume_at - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+            async with self._cond:
+                if self._resume_at > time.monotonic():
+                    continue
+                if self.in_flight < max(1, int(self.limit)):
+                    self.in_flight += 1
+                    return
+                await self._cond.wait()
+
+    async def release(self):
+        async with self._cond:
+            self.in_flight -= 1
+            free = max(1, int(self.limit)) - self.in_flight
+            if free > 0:
+                self._cond.notify(free)
+
+    def on_success(self):
+        # +1 after roughly `limit` successes, i.e. one step per round of requests
+        self.limit = min(self.max_limit, self.limit + 1.0 / max(1.0, self.limit))
+
+    def on_throttle(self, retry_after: Optional[float] = None):
+        now = time.monotonic()
+        # requests already in flight when the quota was hit shouldn't each halve the limit
+        if now - self._last_decrease >= self.decrease_interval:
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+            self._last_decrease = now
+        if retry_after:
+            self._resume_at = max(self._resume_at, now + retry_after)
+
+
+class RetryBudget:
+    """
+    caps retries to a share of the traffic: every call deposits `ratio` tokens,
+    every retry withdraws one (starts with `initial` tokens for cold starts)
+    """
+
+    def __init__(self, ratio: float = 0.2, initial: float = 10.0, max_tokens: float = 100.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = initial
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures; after
+    `recovery_timeout` one probe is let through (half-open) and its outcome
+    closes or re-opens the circuit
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+        return self.state != self.OPEN
+
+    def on_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self):
+        """
+        give the half-open probe slot back without an outcome (the probe never ran)
+        """
+        self._probe_in_flight = False
+
+    def on_failure(self):
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"Circuit opened after {self.failures} consecutive failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+    @property
+    def retry_in(self) -> float:
+        return max(0.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+
+# ========================================
+# ENDPOINT GUARD
+# ========================================
+
+# transport failures worth retrying
+_TRANSIENT_ERRORS = (asyncio.TimeoutError, aiohttp.ClientConnectionError, aiohttp.ClientPayloadError)
+
+
+class _Attempt:
+    """
+    one guarded attempt: waits for rate / concurrency, classifies the outcome
+    """
+
+    def __init__(self, guard: "EndpointGuard"):
+        self.guard = guard
+
+    async def __aenter__(self):
+        guard = self.guard
+        if not guard.breaker.allow():
+            calls_total.inc(endpoint=guard.name, outcome="circuit_open")
+            circuit_state.set(guard.breaker.state, endpoint=guard.name)
+            raise CircuitOpenError(
+                f"{guard.name}: circuit open, retry in {guard.breaker.retry_in:.0f}s"
+            )
+        is_probe = guard.breaker.state == CircuitBreaker.HALF_OPEN
+        try:
+            await guard.bucket.acquire()
+            await guard.limiter.acquire()
+        except BaseException:
+            # cancelled while waiting: __aexit__ won't run, and a probe slot kept
+            # claimed would keep the circuit from ever closing
+            if is_probe:
+                guard.breaker.release_probe()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        guard = self.guard
+        try:
+            if exc is None:
+                outcome = "ok"
+                guard.limiter.on_success()
+                guard.breaker.on_success()
+            elif isinstance(exc, RateLimitedError):
+                # the endpoint is up, only our quota is exhausted
+                outcome = "throttled"
+                guard.limiter.on_throttle(exc.retry_after)
+                guard.breaker.on_success()
+            elif isinstance(exc, (RetryableError,) + _TRANSIENT_ERRORS):
+                outcome = "error"
+                guard.breaker.on_failure()
+            elif isinstance(exc, UpstreamError):
+                outcome = "rejected"
+                guard.breaker.on_success()
+            else:
+                # bug or cancellation on our side, says nothing about the endpoint
+                outcome = "client_error"
+                if guard.breaker.state == CircuitBreaker.HALF_OPEN:
+                    guard.breaker.on_failure()
+        finally:
+            await guard.limiter.release()
+
+        calls_total.inc(endpoint=guard.name, outcome=outcome)
+        concurrency_limit.set(round(guard.limiter.limit, 2), endpoint=guard.name)
+        circuit_state.set(guard.breaker.state, endpoint=guard.name)
+        return False
+
+
+class EndpointGuard:
+    """
+    rate limiter, adaptive concurrency, retries and circuit breaker of one deployment
+    """
+
+    def __init__(self, name: str, config=resilience_config):
+        self.name = name
+        self.config = config
+        self.bucket = TokenBucket(config.rate_for(name), config.burst_for(name))
+        self.limiter = AIMDLimiter(
+            initial=config.initial_concurrency,
+            min_limit=config.min_concurrency,
+            max_limit=config.max_concurrency,
+        )
+        self.budget = RetryBudget(ratio=config.retry_budget_ratio)
+        self.breaker = CircuitBreaker(config.breaker_failure_threshold, config.breaker_recovery_timeout)
+
+    def attempt(self) -> _Attempt:
+        """
+        async context manager for a single, non-retried attempt (e.g. opening a stream)
+        """
+        return _Attempt(self)
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # full jitter, never sooner than the server asked
+        delay = random.uniform(0, min(self.config.retry_max_delay, self.config.retry_base_delay * (2 ** attempt)))
+        return max(delay, retry_after or 0.0)
+
+    async def call(self, fn: Callable[[], Awaitable[T]], max_attempts: Optional[int] = None) -> T:
+        """
+        run fn (one HTTP request) with throttling and retries
+
+        args:
+            - fn: coroutine factory for one attempt; raises RetryableError /
+              RateLimitedError / UpstreamError (see raise_for_status)
+            - max_attempts: overrides RETRY_MAX_ATTEMPTS
+        returns:
+            - fn's result; the last error is raised once attempts or budget run out
+        """
+        max_attempts = max_attempts or self.config.retry_max_attempts
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            try:
+                async with self.attempt():
+                    return await fn()
+            except CircuitOpenError:
+                raise
+            except (RetryableError,) + _TRANSIENT_ERRORS as e:
+                attempt += 1
+                reason = "throttled" if isinstance(e, RateLimitedError) else "error"
+                if attempt >= max_attempts:
+                    raise
+                if not self.budget.withdraw():
+                    logger.warning(f"{self.name}: retry budget exhausted, not retrying: {e}")
+                    raise
+                delay = self._backoff(attempt - 1, getattr(e, "retry_after", None))
+                retries_total.inc(endpoint=self.name, reason=reason)
+                logger.info(f"{self.name}: attempt {attempt} failed ({e}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "in_flight": self.limiter.in_flight,
+            "circuit_state": ["closed", "half_open", "open"][self.breaker.state],
+            "retry_budget": round(self.budget.tokens, 2),
+        }
+
+
+_guards: Dict[str, EndpointGuard] = {}
+
+
+def get_endpoint_guard(name: str) -> EndpointGuard:
+    """
+    shared guard of an endpoint / deployment (created on first use)
+    """
+    guard = _guards.get(name)
+    if guard is None:
+        guard = _guards[name] = EndpointGuard(name)
+    return guard
@@ -0,0 +1,140 @@
+"""
+Lightweight lexical search helpers: query tokenization, stop-word removal,
+BM25 scoring over a candidate set returned by the database full-text index and
+reciprocal rank fusion for combining it with vector search.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Hashable, List, Sequence
+
+# keeps identifiers such as "inv-2023-001", "u.s." or "brk.b" in one token
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[._\-/][a-z0-9]+)*")
+
+STOP_WORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because been
+    before being below between both but by can could did do does doing down during
+    each few for from further had has have having he her here hers herself him
+    himself his how i if in into is it its itself just me more most my myself no
+    nor not now of off on once only or other our ours ourselves out over own same
+    she should so some such than that the their theirs them themselves then there
+    these they this those through to too under until up very was we were what when
+    where which while who whom why will with would you your yours yourself
+    yourselves tell show give list please explain describe find get know much many
+    """.split()
+)
+
+
+def tokenize(text: str, min_length: int = 2) -> List[str]:
+    """
+    lowercase and split text into search tokens (stop words kept)
+    """
+    if not text:
+        return []
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if len(token) >= min_length or token.isdigit()
+    ]
+
+
+def tokenize_query(query: str, max_terms: int = 12) -> List[str]:
+    """
+    tokenize a natural-language query into unique keyword terms
+    stop words are removed, first-occurrence order is kept
+    """
+    terms = []
+    seen = set()
+    for token in tokenize(query):
+        if token in STOP_WORDS or token in seen:
+            continue
+        seen.add(token)
+        terms.append(token)
+        if len(terms) >= max_terms:
+            break
+    return terms
+
+
+def build_contains_query(terms: Sequence[str]) -> str:
+    """
+    build a HANA CONTAINS() search string matching any of the terms
+    terms are quoted so punctuation inside identifiers is not parsed as an operator
+    """
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+class BM25Scorer:
+    """
+    Okapi BM25 over a small candidate corpus
+
+    document frequencies are taken from the candidate set itself, which is a good
+    approximation once the full-text index has narrowed the corpus down to the
+    documents that mention at least one query term
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+
+    def score(self, query_terms: Sequence[str], documents: Sequence[Sequence[str]]) -> List[float]:
+        """
+        args:
+            - query_terms: tokenized query
+            - documents: tokenized candidate documents
+        returns:
+            - one BM25 score per document, aligned with the input order
+        """
+        if not documents or not query_terms:
+            return [0.0] * len(documents)
+
+        n_docs = len(documents)
+        avg_len = sum(len(doc) for doc in documents) / n_docs or 1.0
+
+        doc_freq = Counter()
+        for doc in documents:
+            doc_freq.update(set(doc))
+
+        idf = {
+            term: math.log(1.0 + (n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5))
+            for term in set(query_terms)
+        }
+
+        scores = []
+        for doc in documents:
+            term_freq = Counter(doc)
+            norm = self.k1 * (1.0 - self.b + self.b * len(doc) / avg_len)
+            score = 0.0
+            for term in query_terms:
+                tf = term_freq.get(term, 0)
+                if tf:
+                    score += idf[term] * tf * (self.k1 + 1.0) / (tf + norm)
+            scores.append(score)
+        return scores
+
+
+def reciprocal_rank_fusion(rankings: Dict[str, Sequence[Hashable]], k: int = 60) -> List[Any]:
+    """
+    fuse several ranked id lists with reciprocal rank fusion
+
+    args:
+        - rankings: ranked ids per retriever, e.g. {"vector": [...], "lexical": [...]}
+        - k: damping constant, larger values flatten the contribution of top ranks
+    returns:
+        - list of (id, fused_score, {retriever: rank}) sorted by fused score desc
+    """
+    scores: Dict[Hashable, float] = {}
+    ranks: Dict[Hashable, Dict[str, int]] = {}
+
+    for retriever, ids in rankings.items():
+        for rank, doc_id in enumerate(ids, start=1):
+            if retriever in ranks.get(doc_id, {}):
+                continue  # only the best rank of a duplicate counts
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            ranks.setdefault(doc_id, {})[retriever] = rank
+
+    fused = [(doc_id, score, ranks[doc_id]) for doc_id, score in scores.items()]
+    # ties broken by best single rank, then insertion order (stable sort)
+    fused.sort(key=lambda item: (-item[1], min(item[2].values())))
+    return fused
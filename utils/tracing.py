@@ -0,0 +1,495 @@
+"""
+Lightweight OpenTelemetry-style tracing.
+
+Spans carry W3C trace context (trace id, span id, parent span id) and are kept in
+a contextvar, so they follow the request into asyncio tasks (create_task,
+gather), asyncio.to_thread and FastAPI background tasks without any plumbing.
+Plain thread pools don't copy context; submit through `wrap_context`.
+
+Finished spans are batched on a background thread and written by an exporter:
+    - "json": one span per line in TRACING_JSON_PATH (offline analysis)
+    - "otlp": OTLP/HTTP JSON to OTEL_EXPORTER_OTLP_ENDPOINT (collector, Jaeger, Tempo)
+
+usage:
+    with tracer.span("hana.vector_search", top_k=5) as span:
+        ...
+        span.set_attribute("rows", len(rows))
+
+    @traced("agent.analyzer")
+    async def process(self, state): ...
+"""
+
+import os
+import json
+import time
+import queue
+import random
+import inspect
+import logging
+import functools
+import threading
+import contextvars
+import urllib.request
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import tracing_config
+
+logger = logging.getLogger(__name__)
+
+# span kinds (OTLP numbering)
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# status codes (OTLP numbering)
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_trace_id() -> str:
+    return f"{random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{random.getrandbits(64):016x}"
+
+
+class SpanContext:
+    """
+    identity of a span that may live in another process (parsed from traceparent)
+    """
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool = True):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+
+class Span:
+    """
+    one timed operation; attributes and events are recorded only when sampled
+    """
+
+    def __init__(
+        self,
+        name: str,
+        trace_id: str,
+        parent_id: Optional[str] = None,
+        kind: int = KIND_INTERNAL,
+        sampled: bool = True,
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.kind = kind
+        self.sampled = sampled
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        if self.sampled and value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add_event(self, name: str, **attributes):
+        if self.sampled:
+            self.events.append({"name": name, "time_ns": time.time_ns(), "attributes": attributes})
+
+    def set_status(self, status: int, message: str = ""):
+        self.status = status
+        self.status_message = message
+
+    def record_exception(self, exc: BaseException):
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+        self.set_status(STATUS_ERROR, str(exc))
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e6
+
+    @property
+    def traceparent(self) -> str:
+        """
+        W3C traceparent header value of this span
+        """
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "kind": self.kind,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+# ========================================
+# EXPORTERS
+# ========================================
+
+class JsonFileExporter:
+    """
+    append finished spans to a JSON lines file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as handle:
+            for span in spans:
+                handle.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def shutdown(self):
+        pass
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPHttpExporter:
+    """
+    send finished spans to an OTLP/HTTP collector (JSON encoding, /v1/traces)
+    """
+
+    def __init__(self, endpoint: str, service_name: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.timeout = timeout
+
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        otlp_spans = []
+        for span in spans:
+            otlp_span = {
+                "traceId": span.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": _otlp_attributes(span.attributes),
+                "events": [
+                    {
+                        "name": event["name"],
+                        "timeUnixNano": str(event["time_ns"]),
+                        "attributes": _otlp_attributes(event["attributes"]),
+                    }
+                    for event in span.events
+                ],
+                "status": {"code": span.status, "message": span.status_message},
+            }
+            if span.parent_id:
+                otlp_span["parentSpanId"] = span.parent_id
+            otlp_spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _otlp_attributes({"service.name": self.service_name})},
+                    "scopeSpans": [{"scope": {"name": "ai_service"}, "spans": otlp_spans}],
+                }
+            ]
+        }
+
+    def export(self, spans: List[Span]):
+        body = json.dumps(self.encode(spans)).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers=self.headers, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def shutdown(self):
+        pass
+
+
+class BatchSpanProcessor:
+    """
+    queue finished spans and export them in batches from a daemon thread,
+    so exporting never blocks the event loop
+    """
+
+    def __init__(self, exporter, max_batch_size: int = 256, flush_interval: float = 5.0, max_queue_size: int = 10000):
+        self.exporter = exporter
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def on_end(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, Span):
+                batch.append(item)
+                if len(batch) < self.max_batch_size:
+                    continue
+            elif item is None and time.monotonic() < deadline:
+                continue
+
+            # batch full, interval elapsed, or a flush / shutdown marker (an Event)
+            self._export(batch)
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            if isinstance(item, threading.Event):
+                item.set()
+                if item is self._stopped:
+                    return
+
+    def _export(self, batch: List[Span]):
+        if not batch:
+            return
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning(f"Span export failed ({len(batch)} spans dropped): {e}")
+
+    def force_flush(self, timeout: float = 10.0) -> bool:
+        """
+        export everything queued so far; false if the exporter didn't finish in time
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def shutdown(self, timeout: float = 10.0):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(self._stopped)
+        self._stopped.wait(timeout)
+        self.exporter.shutdown()
+
+
+# ========================================
+# TRACER
+# ========================================
+
+class _SpanScope:
+    """
+    context manager (sync and async) that opens a span and makes it current
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, kind: int, parent: Optional[SpanContext], attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.attributes = attributes
+        self.span: Optional[Span] = None
+        self._token = None
+
+    def __enter__(self) -> Span:
+        self.span = self.tracer.start_span(self.name, kind=self.kind, parent=self.parent, attributes=self.attributes)
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.span.record_exception(exc)
+        _current_span.reset(self._token)
+        self.tracer.end_span(self.span)
+        return False
+
+    async def __aenter__(self) -> Span:
+        return self.__enter__()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return self.__exit__(exc_type, exc, tb)
+
+
+class Tracer:
+    """
+    creates spans and hands finished ones to the span processor
+    """
+
+    def __init__(self, config=tracing_config):
+        self.config = config
+        self.enabled = config.enabled
+        self.processor: Optional[BatchSpanProcessor] = None
+        if self.enabled:
+            self.processor = self._build_processor()
+            self.enabled = self.processor is not None
+
+    def _build_processor(self) -> Optional[BatchSpanProcessor]:
+        exporter = None
+        if self.config.exporter == "json":
+            exporter = JsonFileExporter(self.config.json_path)
+        elif self.config.exporter == "otlp":
+            exporter = OTLPHttpExporter(self.config.otlp_endpoint, self.config.service_name, headers=self.config.otlp_headers)
+        else:
+            logger.warning(f"Unknown TRACING_EXPORTER {self.config.exporter!r}, tracing disabled")
+            return None
+
+        logger.info(f"Tracing enabled ({self.config.exporter} exporter, sample ratio {self.config.sample_ratio})")
+        return BatchSpanProcessor(
+            exporter, max_batch_size=self.config.batch_size, flush_interval=self.config.flush_interval
+        )
+
+    def start_span(
+        self,
+        name: str,
+        kind: int = KIND_INTERNAL,
+        parent: Optional[SpanContext] = None,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Span:
+        """
+        new span, child of `parent` (remote) or of the current span; roots are sampled here
+        """
+        parent = parent or _current_span.get()
+        if parent is not None:
+            return Span(name, parent.trace_id, parent.span_id, kind, parent.sampled and self.enabled, attributes)
+
+        sampled = self.enabled and random.random() < self.config.sample_ratio
+        return Span(name, _new_trace_id(), None, kind, sampled, attributes)
+
+    def end_span(self, span: Span):
+        span.end_ns = time.time_ns()
+        if span.status == STATUS_UNSET:
+            span.status = STATUS_OK
+        if span.sampled and self.processor is not None:
+            self.processor.on_end(span)
+
+    def span(self, name: str, kind: int = KIND_INTERNAL, parent: Optional[SpanContext] = None, **attributes) -> _SpanScope:
+        """
+        context manager opening a child of the current span
+        """
+        return _SpanScope(self, name, kind, parent, attributes)
+
+    def force_flush(self, timeout: float = 10.0) -> bool:
+        return self.processor.force_flush(timeout) if self.processor else True
+
+    def shutdown(self):
+        if self.processor:
+            self.processor.shutdown()
+
+
+# global tracer
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+def traced(name: str, kind: int = KIND_INTERNAL, **attributes):
+    """
+    decorator running a sync or async function inside a span
+    """
+
+    def decorator(func: Callable):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(name, kind=kind, **attributes):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(name, kind=kind, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def wrap_context(func: Callable) -> Callable:
+    """
+    bind func to the caller's context (current span) for thread pools
+    and other executors that don't copy contextvars
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+
+# ========================================
+# W3C TRACE CONTEXT PROPAGATION
+# ========================================
+
+def inject_headers(headers: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """
+    add the traceparent of the current span to outgoing HTTP headers
+    """
+    headers = dict(headers or {})
+    span = _current_span.get()
+    if span is not None:
+        headers["traceparent"] = span.traceparent
+    return headers
+
+
+def extract_context(traceparent: Optional[str]) -> Optional[SpanContext]:
+    """
+    parse an incoming traceparent header ("00-<trace id>-<span id>-<flags>")
+    """
+    if not traceparent:
+        return None
+    parts = traceparent.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16)
+        int(parts[2], 16)
+        sampled = bool(int(parts[3], 16) & 0x01)
+    except ValueError:
+        return None
+    if set(parts[1]) == {"0"} or set(parts[2]) == {"0"}:
+        return None
+    return SpanContext(parts[1], parts[2], sampled)